@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Per-frame encode cost of PerKeyRGB.get_custom_light_buffers.
+Compares the original allocate-and-copy-per-byte packer against the current
+preallocated packer, for a full keyboard and for a frame with a few keys lit.
+No keyboard is needed.
+"""
+
+import sys
+import os
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from rkcu.per_key_rgb import PerKeyRGB
+
+def legacy_custom_light_buffers(custom_colors):
+    """The packer as it was before buffers were preallocated, kept for comparison."""
+    BUFFER_SIZE = 65
+    CUSTOM_LIGHT_BUFFERS_SIZE = 7
+
+    led_full_buffer = bytearray(CUSTOM_LIGHT_BUFFERS_SIZE * BUFFER_SIZE)
+
+    for key_index, (red, green, blue) in custom_colors.items():
+        lbi = key_index * 3
+        if lbi + 2 < len(led_full_buffer):
+            led_full_buffer[lbi] = red
+            led_full_buffer[lbi + 1] = green
+            led_full_buffer[lbi + 2] = blue
+
+    buffers = []
+    led_buffer_index = 0
+
+    for i in range(CUSTOM_LIGHT_BUFFERS_SIZE):
+        buffer = bytearray(BUFFER_SIZE)
+        buffer[0] = 0x0a
+        buffer[1] = CUSTOM_LIGHT_BUFFERS_SIZE
+        buffer[2] = i + 1
+
+        if i == 0:
+            buffer[3] = 0x03
+            buffer[4] = 0x7e
+            buffer[5] = 0x01
+            start_index = 6
+        else:
+            start_index = 3
+
+        for buffer_index in range(start_index, BUFFER_SIZE):
+            if led_buffer_index < len(led_full_buffer):
+                buffer[buffer_index] = led_full_buffer[led_buffer_index]
+                led_buffer_index += 1
+
+        buffers.append(buffer)
+
+    return buffers
+
+def time_per_call(func, number):
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    return best / number * 1e6
+
+def benchmark(name, key_indices, number=2000):
+    rgb = PerKeyRGB()
+    for key_index in key_indices:
+        rgb.set_key_color(key_index, 255, key_index % 256, 0)
+
+    expected = [bytes(b) for b in legacy_custom_light_buffers(rgb.custom_colors)]
+    if [bytes(b) for b in rgb.get_custom_light_buffers()] != expected:
+        raise AssertionError("packers disagree")
+
+    before = time_per_call(lambda: legacy_custom_light_buffers(rgb.custom_colors), number)
+    after = time_per_call(rgb.get_custom_light_buffers, number)
+    print(f"{name:<12} before {before:8.2f} us/frame   after {after:8.2f} us/frame   ({before / after:.1f}x)")
+
+if __name__ == "__main__":
+    print("get_custom_light_buffers encode cost")
+    benchmark("113 keys", range(113))
+    benchmark("3 keys", [9, 14, 60])
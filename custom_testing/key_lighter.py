@@ -1,14 +1,12 @@
-import json
 import os
 import keyboard
-import threading
 import time
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from rkcu import RKCU
-    from rkcu.config import get_base_config
+    from rkcu import RKCU, FrameWriter, load_layout
+    from rkcu.reactive import ReactiveLighting
     KEYBOARD_CONTROL_AVAILABLE = True
 except ImportError:
     print("RKCU keyboard control not available")
@@ -16,14 +14,18 @@ except ImportError:
 
 class KeyLighter:
     def __init__(self):
-        self.mapped_keys = {}
-        self.light_timers = {}
+        self.layout = None
         self.rk = None
+        self.writer = None
+        self.lighting = None
         self.keyboard_connected = False
         
         if KEYBOARD_CONTROL_AVAILABLE:
             try:
                 self.rk = RKCU(0x258a, 0x00e0)
+                self.writer = FrameWriter(self.rk, on_error=lambda e: print(f"Error writing to keyboard: {e}"))
+                # one scheduler thread fades every lit key and sends one frame per tick
+                self.lighting = ReactiveLighting(self.rk, color=(255, 255, 255), fade=0.3, writer=self.writer)
                 self.keyboard_connected = True
                 print("Connected to Royal Kludge keyboard for RGB feedback")
             except Exception as e:
@@ -37,62 +39,32 @@ class KeyLighter:
         json_path = os.path.join(script_dir, "keyboard_mapping.json")
         
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if 'mapped_keys' in data:
-                    self.mapped_keys = data['mapped_keys']
-                    print(f"Loaded mapping for {len(self.mapped_keys)} keys")
-                    return True
+            self.layout = load_layout(json_path)
+            print(f"Loaded mapping for {len(self.layout)} keys")
+            return True
         except FileNotFoundError:
             print(f"Error: keyboard_mapping.json not found in {script_dir}")
-        except json.JSONDecodeError:
+        except ValueError:
             print("Error: Invalid JSON in keyboard_mapping.json")
         
         return False
     
-    def light_key(self, key_index, duration=0.3):
-        if not self.keyboard_connected or not self.rk:
+    def light_key(self, key_index):
+        if not self.keyboard_connected or not self.lighting:
             return
             
         try:
-            config = get_base_config()
-            # Set brightness to 5 for visibility
-            config.ANIMATION_BRIGHTNESS = 5
-            config.PER_KEY_RGB.clear_all()
-            config.PER_KEY_RGB.set_key_color(key_index, 255, 255, 255)
-            self.rk.apply_config(config)
-            
-            key_str = str(key_index)
-            if key_str in self.light_timers:
-                self.light_timers[key_str].cancel()
-            
-            timer = threading.Timer(duration, self.turn_off_key, args=[key_index])
-            self.light_timers[key_str] = timer
-            timer.start()
+            self.lighting.press(key_index)
         except Exception as e:
             print(f"Error lighting key {key_index}: {e}")
     
-    def turn_off_key(self, key_index):
-        if not self.keyboard_connected or not self.rk:
-            return
-            
-        try:
-            config = get_base_config()
-            # Set brightness to 0 when turning off keys
-            config.ANIMATION_BRIGHTNESS = 0
-            config.PER_KEY_RGB.clear_all()
-            self.rk.apply_config(config)
-            
-            key_str = str(key_index)
-            if key_str in self.light_timers:
-                del self.light_timers[key_str]
-        except Exception as e:
-            print(f"Error turning off key {key_index}: {e}")
-    
     def on_key_press(self, event):
         key_name = event.name
-        if key_name in self.mapped_keys:
-            index = self.mapped_keys[key_name]
+        # layouts name the number row keys digit0 to digit9; plain numbers are LED indices
+        if key_name.isdigit():
+            key_name = 'digit' + key_name
+        if key_name in self.layout:
+            index = self.layout[key_name]
             print(f"Key '{key_name}' pressed - Index: {index}")
             self.light_key(index)
     
@@ -115,18 +87,13 @@ class KeyLighter:
         except KeyboardInterrupt:
             print("\nStopping key monitoring...")
         finally:
-            if self.keyboard_connected and self.rk:
+            if self.keyboard_connected and self.lighting:
                 try:
-                    config = get_base_config()
-                    # Set brightness to 0 when cleaning up (no keys pressed)
-                    config.ANIMATION_BRIGHTNESS = 0
-                    config.PER_KEY_RGB.clear_all()
-                    self.rk.apply_config(config)
+                    self.lighting.stop()
+                    self.writer.close()
+                    self.rk.close_kb()
                 except:
                     pass
-            
-            for timer in self.light_timers.values():
-                timer.cancel()
 
 if __name__ == "__main__":
     lighter = KeyLighter()
@@ -11,18 +11,58 @@ __version__ = "1.1.0"
 __author__ = "Hardik Srivastava"
 __maintainer__ = "gagan16k"
 
-# Import main classes and functions that users might want to use directly
-from .utils import RKCU
-from .config import Config, get_base_config
-from .per_key_rgb import PerKeyRGB
-from .enums import Animation, Speed, Brightness, RainbowMode, Sleep
+# Main classes and functions that users might want to use directly. They are
+# imported on first access so "import rkcu" stays cheap for the CLI, and hidapi,
+# asyncio and friends are only loaded by code that actually uses them.
+_LAZY_IMPORTS = {
+    'RKCU': '.utils',
+    'FrameWriter': '.writer',
+    'AsyncRKCU': '.aio',
+    'DeviceGroup': '.group',
+    'HidBackend': '.backends',
+    'SimulatedBackend': '.backends',
+    'SimulatedDevice': '.backends',
+    'Config': '.config',
+    'get_base_config': '.config',
+    'PerKeyRGB': '.per_key_rgb',
+    'Profile': '.profile',
+    'Layout': '.layout',
+    'load_layout': '.layout',
+    'Animation': '.enums',
+    'Speed': '.enums',
+    'Brightness': '.enums',
+    'RainbowMode': '.enums',
+    'Sleep': '.enums',
+}
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 # Define what gets imported with "from rkcu import *"
 __all__ = [
     'RKCU',
+    'FrameWriter',
+    'AsyncRKCU',
+    'DeviceGroup',
+    'HidBackend',
+    'SimulatedBackend',
+    'SimulatedDevice',
     'Config', 
     'get_base_config',
     'PerKeyRGB',
+    'Profile',
+    'Layout',
+    'load_layout',
     'Animation',
     'Speed', 
     'Brightness',
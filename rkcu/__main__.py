@@ -2,23 +2,25 @@ import argparse
 import json
 import sys
 
-from .config import get_base_config
-from .utils import RKCU
 from .enums import Animation
 
 # Python based Command Line wrapper for managing profiles on Royal Kludge keyboards
 # author: Hardik Srivastava [oddlyspaced]
 # changes: Gagan K [gagan16k]
 
-parser = argparse.ArgumentParser(
-    prog = 'RKCU - Royal Kludge Config Utility',
-    description = 'Utility to manage profiles on Royal Kludge keyboards with per-key RGB support.'
-)
-
-color_config = get_base_config()
+# both are built on demand so --help and --list-animations don't pay for config or device code
+parser = None
+color_config = None
+# cache key and cached reports of an unmodified --profile; reports is None on a cache miss
+compiled_key = None
+compiled_reports = None
 
 def setup_arg_parser():
     global parser
+    parser = argparse.ArgumentParser(
+        prog = 'RKCU - Royal Kludge Config Utility',
+        description = 'Utility to manage profiles on Royal Kludge keyboards with per-key RGB support.'
+    )
     parser.add_argument('--speed', '-sp', help='Animation speed (1-5)')
     parser.add_argument('--brightness', '-br', help='Brightness level (0-255)')
     parser.add_argument('--sleep', '-sl', help='Sleep timeout (1-5: 5min/10min/20min/30min/never)')
@@ -34,12 +36,35 @@ def setup_arg_parser():
     parser.add_argument('--color', '-c', help='RGB color value in hex format (e.g., ff0000 for red)')
     
     # Per-key RGB options
-    parser.add_argument('--set-key', action='append', help='Set color for a specific key: KEY_INDEX:RRGGBB (can be used multiple times)')
+    parser.add_argument('--set-key', action='append', help='Set color for a specific key: KEY:RRGGBB, where KEY is an index or a key name (can be used multiple times)')
     parser.add_argument('--set-keys-json', help='Set multiple key colors from JSON file')
     parser.add_argument('--clear-custom', action='store_true', help='Clear all custom per-key colors')
+    parser.add_argument('--layout', help='Key layout for key names: a bundled layout name or a keyboard_mapping.json file (default: rk100v2)')
+    parser.add_argument('--list-keys', action='store_true', help='List the key names of the layout and exit')
+    parser.add_argument('--gamma', type=float, help='Gamma applied to per-key colors, e.g. 2.2 (default: 1, no correction)')
+    parser.add_argument('--gain', metavar='R,G,B', help='White balance: per-channel gain between 0 and 1 applied to per-key colors, e.g. 1,0.85,0.7')
+
+    parser.add_argument('--vid', default='0x258a', help='Keyboard vendor id in hex (default: 0x258a)')
+    parser.add_argument('--pid', default='0x00e0', help='Keyboard product id in hex (default: 0x00e0)')
+    parser.add_argument('--all-devices', action='store_true', help='Apply the configuration to every attached keyboard with this VID/PID')
+    parser.add_argument('--simulate', action='store_true', help='Apply the configuration to a simulated keyboard and print what it received')
+
+    parser.add_argument('--profile', metavar='FILE', help='Load mode settings and per-key colors from a binary (see python -m rkcu.profile) or JSON profile; other options override it')
+    parser.add_argument('--via-daemon', nargs='?', const='', metavar='SOCKET', help='Send the configuration to a running rkcud instead of opening the keyboard')
+
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    compile_parser = subparsers.add_parser('compile', help='Pre-encode profiles into the compiled profile cache')
+    compile_parser.add_argument('paths', nargs='+', metavar='PATH', help='Profile files (.json or .rkp) or directories of them')
+    compile_parser.add_argument('--jobs', '-j', type=int, help='Worker processes (default: one per CPU)')
+    compile_parser.add_argument('--max-bytes', type=int, help='Size limit of the cache in bytes; least recently used entries are evicted')
+    stream_parser = subparsers.add_parser('stream', help='Show raw RGB frames (LED count x 3 bytes each) read from stdin or a FIFO')
+    stream_parser.add_argument('source', nargs='?', default='-', help="File or FIFO to read frames from, or '-' for stdin (default)")
+    stream_parser.add_argument('--leds', type=int, help='LEDs per frame; each frame is this many RGB triplets (default: 143)')
 
 def read_args():
+    global color_config, compiled_key, compiled_reports
     args = parser.parse_args()
+    compiled_key = compiled_reports = None
     var = vars(args)
 
     # Handle list animations
@@ -49,6 +74,23 @@ def read_args():
             print(anim)
         sys.exit(0)
 
+    if args.list_keys:
+        from .layout import load_layout
+        try:
+            layout = load_layout(args.layout)
+        except (OSError, ValueError) as e:
+            print(f"Error loading layout: {e}")
+            sys.exit(1)
+        for index, name in sorted(layout.names.items()):
+            print(f"{index:4d}  {name}")
+        sys.exit(0)
+
+    if args.command == 'compile':
+        sys.exit(compile_command(args))
+
+    from .config import get_base_config
+    color_config = get_base_config()
+
     # Handle hex color conversion
     if args.color:
         try:
@@ -67,29 +109,80 @@ def read_args():
             print(f"Set RGB color from hex #{hex_color}: R={red}, G={green}, B={blue}")
         except ValueError as e:
             print(f"Error parsing hex color '{args.color}': {e}")
-            return
+            return args
 
     # Handle clear custom colors
     if args.clear_custom:
         color_config.PER_KEY_RGB.clear_all()
         print("Cleared all custom per-key colors")
     
+    # Handle binary or JSON profile
+    profile = None
+    if args.profile:
+        from .profile import Profile
+        try:
+            with open(args.profile, 'rb') as f:
+                data = f.read()
+            if profile_is_unmodified(args):
+                # written straight from the compiled cache when it has the profile, without decoding it
+                from .compiled import ProfileCache
+                cache = ProfileCache()
+                compiled_key = cache.key(data)
+                compiled_reports = cache.get(compiled_key)
+                if compiled_reports is not None:
+                    print(f"Loaded compiled profile {args.profile}")
+                    return args
+            profile = Profile.decode(data)
+            profile.apply_keys(color_config.PER_KEY_RGB)
+            print(f"Loaded profile {args.profile} ({profile.n_leds} LEDs)")
+        except (OSError, ValueError) as e:
+            print(f"Error loading profile: {e}")
+            sys.exit(1)
+
+    # Key names in --set-key and --set-keys-json are resolved through the layout
+    if args.layout or args.set_key or args.set_keys_json:
+        from .layout import load_layout
+        try:
+            color_config.PER_KEY_RGB.layout = load_layout(args.layout)
+        except (OSError, ValueError) as e:
+            print(f"Error loading layout: {e}")
+            return args
+
+    # Color correction of per-key colors: the command line wins over the profile,
+    # which wins over the layout's default for the model
+    layout = color_config.PER_KEY_RGB.layout
+    saved = profile.correction if profile is not None else None
+    if saved is None and layout is not None:
+        saved = layout.correction
+    if args.gamma is not None or args.gain is not None:
+        from .color import ColorCorrection
+        saved = saved or ColorCorrection()
+        try:
+            color_config.PER_KEY_RGB.color_correction = ColorCorrection.parse(
+                args.gamma if args.gamma is not None else saved.gamma,
+                args.gain if args.gain is not None else saved.gain)
+        except ValueError as e:
+            print(f"Error setting color correction: {e}")
+            return args
+    else:
+        color_config.PER_KEY_RGB.color_correction = saved
+
     # Handle per-key color setting
     if args.set_key:
         for set_key_arg in args.set_key:
             try:
-                key_color = set_key_arg.split(':')
+                key_color = set_key_arg.rsplit(':', 1)
                 if len(key_color) != 2:
-                    raise ValueError("Format should be KEY_INDEX:RRGGBB")
+                    raise ValueError("Format should be KEY:RRGGBB")
                 
-                key_index = int(key_color[0])
+                key_index = color_config.PER_KEY_RGB.key_index(key_color[0])
                 hex_color = key_color[1]
                 
                 color_config.PER_KEY_RGB.set_key_color_hex(key_index, hex_color)
                 print(f"Set key {key_index} to color #{hex_color}")
             except Exception as e:
                 print(f"Error setting key color for '{set_key_arg}': {e}")
-                return
+                return args
     
     # Handle JSON file input
     if args.set_keys_json:
@@ -99,30 +192,164 @@ def read_args():
             
             for key_index, hex_color in keys_data.items():
                 try:
-                    key_idx = int(key_index)
+                    key_idx = color_config.PER_KEY_RGB.key_index(key_index)
                     color_config.PER_KEY_RGB.set_key_color_hex(key_idx, hex_color)
                     print(f"Set key {key_idx} to color #{hex_color}")
                 except ValueError:
                     continue
         except Exception as e:
             print(f"Error loading JSON file: {e}")
-            return
+            return args
     
     update_config(var)
+    if profile is not None:
+        # settings given on the command line win over the profile
+        from .profile import MODE_FIELDS
+        profile.apply_mode(color_config, skip={name for name in MODE_FIELDS if var[name] not in (None, False)})
+    return args
 
 def update_config(var: dict):
     color_config.update(var)
 
+def compile_command(args) -> int:
+    from .compiled import ProfileCache, DEFAULT_MAX_BYTES, compile_profiles
+
+    cache = ProfileCache(max_bytes=args.max_bytes or DEFAULT_MAX_BYTES)
+    results = compile_profiles(args.paths, cache, args.jobs)
+    failed = 0
+    for path, result in results.items():
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"Error compiling {path}: {result}")
+        else:
+            print(f"Compiled {path} -> {result[:12]}")
+    print(f"{len(results) - failed} of {len(results)} profiles compiled into {cache.directory}")
+    return 1 if failed else 0
+
+def stream_command(args, backend=None) -> int:
+    from .per_key_rgb import MAX_KEYS
+    from .stream import stream_frames
+
+    n_leds = args.leds or MAX_KEYS
+    source = sys.stdin.buffer if args.source == '-' else args.source
+    vid, pid = int(args.vid, 16), int(args.pid, 16)
+    try:
+        if args.all_devices:
+            from .group import DeviceGroup
+            rk = DeviceGroup.open(vid, pid, backend)
+        else:
+            from .utils import RKCU
+            rk = RKCU(vid, pid, backend=backend)
+    except IOError as e:
+        print(f"Error: {e}")
+        return 1
+
+    try:
+        stats = stream_frames(rk, source, n_leds, color_config)
+    except KeyboardInterrupt:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        rk.close_kb()
+    if stats.trailing:
+        print(f"Ignored an incomplete frame of {stats.trailing} bytes at the end of the stream")
+    print(f"{stats.frames} frames read, {stats.sent} written, {stats.coalesced} replaced by newer frames")
+    return 0
+
+def profile_is_unmodified(args) -> bool:
+    """True when --profile is written to the keyboard as it is, so its compiled reports can be used."""
+    from .profile import MODE_FIELDS
+
+    if args.command is not None or args.via_daemon is not None:
+        return False
+    overrides = ('color', 'set_key', 'set_keys_json', 'clear_custom', 'gamma', 'gain', 'layout') + MODE_FIELDS
+    return not any(getattr(args, name) not in (None, False) for name in overrides)
+
+def apply_via_daemon(socket_path: str):
+    from .daemon import RKCUClient
+
+    # the resolved settings, so a --profile's mode reaches the daemon as it would the keyboard
+    settings = color_config.settings()
+    keys = {
+        str(key_index): '%02x%02x%02x' % color
+        for key_index, color in color_config.PER_KEY_RGB.custom_colors.items()
+    }
+    correction = color_config.PER_KEY_RGB.color_correction
+    client = RKCUClient(socket_path or None)
+    try:
+        client.apply(settings, keys, correction=correction.to_dict() if correction is not None else None)
+    finally:
+        client.close()
+
+def print_simulated_state(device):
+    state = device.config()
+    print(f"Simulated keyboard received {device.writes} reports ({device.bytes_written} bytes):")
+    print(f"  animation={state.ANIMATION_TYPE.name.lower()} speed={state.ANIMATION_SPEED.value} "
+          f"brightness={state.ANIMATION_BRIGHTNESS} color=#{state.ANIMATION_RED:02x}{state.ANIMATION_GREEN:02x}{state.ANIMATION_BLUE:02x} "
+          f"rainbow={state.ANIMATION_RAINBOW.name.lower()} sleep={state.ANIMATION_SLEEP_DURATION.name.lower()}")
+    for key_index, (red, green, blue) in sorted(state.PER_KEY_RGB.custom_colors.items()):
+        print(f"  key {key_index}: #{red:02x}{green:02x}{blue:02x}")
+
 def main():
     setup_arg_parser()
-    read_args()
+    args = read_args()
 
     if not any(arg in sys.argv for arg in ['--list-keys', '--list-animations', '-la', '-h', '--help']):
-        rk = RKCU(0x258a, 0x00e0)
-        rk.apply_config(color_config)
-        print("Configuration applied successfully!")
+        if args.via_daemon is not None:
+            try:
+                apply_via_daemon(args.via_daemon)
+            except IOError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            print("Configuration sent to rkcud")
+            return
+
+        vid, pid = int(args.vid, 16), int(args.pid, 16)
+        backend = None
+        if args.simulate:
+            from .backends import SimulatedBackend
+            backend = SimulatedBackend(vid=vid, pid=pid)
+
+        if args.command == 'stream':
+            status = stream_command(args, backend)
+            if backend is not None and not status:
+                print_simulated_state(backend.devices[0])
+            sys.exit(status)
+
+        if compiled_reports is not None:
+            reports = compiled_reports
+        elif compiled_key is not None:
+            # compile the profile on its first use
+            from .compiled import ProfileCache
+            reports = [bytes(color_config.report())] + [bytes(b) for b in color_config.get_custom_light_buffers()]
+            ProfileCache().put(compiled_key, reports)
+        else:
+            reports = None
+
+        if args.all_devices:
+            from .group import DeviceGroup
+            group = DeviceGroup.open(vid, pid, backend)
+            if reports:
+                group.send_reports(reports)
+            else:
+                group.apply_config(color_config)
+            group.close_kb()
+            print(f"Configuration applied successfully to {len(group)} keyboards!")
+        else:
+            from .utils import RKCU
+            rk = RKCU(vid, pid, backend=backend)
+            if reports:
+                rk.send_reports(reports)
+            else:
+                rk.apply_config(color_config)
+            print("Configuration applied successfully!")
+
+        if backend is not None:
+            print_simulated_state(backend.devices[0])
         
-        if color_config.PER_KEY_RGB.has_custom_colors():
+        if reports is None and color_config.PER_KEY_RGB.has_custom_colors():
             print(f"Applied custom colors to {len(color_config.PER_KEY_RGB.custom_colors)} keys")
 
 if __name__ == "__main__":
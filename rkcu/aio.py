@@ -0,0 +1,97 @@
+"""
+asyncio interface to RKCU.
+Opening, enumeration and feature report writes run on a dedicated I/O thread,
+so HID calls never block the event loop and writes stay in submission order.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .backends import HidBackend
+from .config import Config
+from .utils import RKCU
+
+class AsyncRKCU:
+    """Awaitable wrapper around an RKCU device; create it with `await AsyncRKCU.open(...)`."""
+
+    def __init__(self, rk: RKCU, executor: ThreadPoolExecutor):
+        self.rk = rk
+        self._executor = executor
+
+    @classmethod
+    async def open(cls, vid, pid, serial=None, use_cache=True, backend=None) -> "AsyncRKCU":
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rkcu-io')
+        loop = asyncio.get_running_loop()
+        try:
+            rk = await loop.run_in_executor(
+                executor, functools.partial(RKCU, vid, pid, serial, use_cache, backend=backend)
+            )
+        except Exception:
+            executor.shutdown(wait=False)
+            raise
+        return cls(rk, executor)
+
+    @staticmethod
+    async def enumerate(vid: int = 0, pid: int = 0, backend=None) -> list:
+        """Enumerate HID interfaces on a worker thread."""
+        backend = backend if backend is not None else HidBackend()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, backend.enumerate, vid, pid)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def send_reports(self, reports: list, force: bool = False):
+        """Send already-encoded reports (mode report first, then any per-key buffers)."""
+        await self._run(self.rk.send_reports, reports, force)
+
+    async def apply_config(self, config: Config, force: bool = False):
+        """Encode config now and send it; the caller may change config as soon as this is called."""
+        reports = [bytes(config.report())] + [bytes(b) for b in config.get_custom_light_buffers()]
+        await self.send_reports(reports, force)
+
+    async def stream(self, frames, fps: Optional[float] = None) -> int:
+        """
+        Apply configs from an (async) iterable, one at a time.
+        The next frame is only pulled once the previous one has been written, so a
+        producer can never get ahead of the keyboard. With fps set, frames are also
+        spaced at that rate. Returns the number of frames written.
+        """
+        period = 1.0 / fps if fps else 0.0
+        loop = asyncio.get_running_loop()
+        next_due = loop.time()
+        count = 0
+
+        async def write(config):
+            nonlocal next_due, count
+            if period:
+                delay = next_due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # don't try to catch up after a slow write, just keep the spacing
+                next_due = max(next_due + period, loop.time())
+            await self.apply_config(config)
+            count += 1
+
+        if hasattr(frames, '__aiter__'):
+            async for config in frames:
+                await write(config)
+        else:
+            for config in frames:
+                await write(config)
+        return count
+
+    async def invalidate_cache(self):
+        await self._run(self.rk.invalidate_cache)
+
+    async def close(self):
+        await self._run(self.rk.close_kb)
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncRKCU":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,274 @@
+"""
+Ambient lighting from images and video.
+A frame source yields (height, width, 3) uint8 images; AmbientEffect samples
+each one onto the keys with a precomputed gather map (a few pixel indices per
+key, built once per frame size) and averages them in one vectorized pass.
+
+    python -m rkcu.ambient picture.ppm
+    python -m rkcu.ambient frames/ --rate 24
+    ffmpeg -i video.mp4 -vf scale=64:36 -f rawvideo -pix_fmt rgb24 - | python -m rkcu.ambient - --size 64x36
+
+PPM images are read natively; other image formats need Pillow.
+"""
+import argparse
+import functools
+import os
+import sys
+import threading
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .effects import Effect
+from .framebuffer import FrameBuffer
+from .geometry import Geometry, load_geometry
+
+DEFAULT_SAMPLES = 3
+IMAGE_SUFFIXES = ('.ppm', '.pnm', '.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+
+def _read_ppm(data: bytes) -> np.ndarray:
+    """Decode a binary (P6) PPM image."""
+    fields = []
+    pos = 0
+    # magic, width, height and maxval, separated by whitespace and '#' comments
+    while len(fields) < 4:
+        while pos < len(data) and data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b'#':
+            pos = data.find(b'\n', pos) + 1 or len(data)
+            continue
+        start = pos
+        while pos < len(data) and not data[pos:pos + 1].isspace() and data[pos:pos + 1] != b'#':
+            pos += 1
+        if start == pos:
+            raise ValueError("PPM header is truncated")
+        fields.append(data[start:pos])
+
+    magic, width, height, maxval = fields[0], int(fields[1]), int(fields[2]), int(fields[3])
+    if magic != b'P6':
+        raise ValueError("Only binary (P6) PPM images are supported")
+    if maxval > 255:
+        raise ValueError("16-bit PPM images are not supported")
+    # exactly one whitespace byte separates the header from the pixels
+    pos += 1
+    size = width * height * 3
+    if len(data) - pos < size:
+        raise ValueError("PPM image is truncated")
+    image = np.frombuffer(data, dtype=np.uint8, count=size, offset=pos).reshape(height, width, 3)
+    if maxval != 255:
+        image = (image.astype(np.uint16) * 255 // maxval).astype(np.uint8)
+    return image
+
+def load_image(path: str) -> np.ndarray:
+    """Read an image file as a (height, width, 3) uint8 array."""
+    if path.lower().endswith(('.ppm', '.pnm')):
+        with open(path, 'rb') as f:
+            return _read_ppm(f.read())
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError(f"Reading {os.path.splitext(path)[1] or 'these'} images needs Pillow (pip install pillow); PPM works without it")
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGB'))
+
+class ImageFileSource:
+    """A single still image."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def frames(self) -> Iterator[np.ndarray]:
+        yield load_image(self.path)
+
+class DirectorySource:
+    """The images in a directory, in name order, at a fixed rate."""
+
+    def __init__(self, path: str, rate: float = 10.0, loop: bool = True):
+        if rate <= 0:
+            raise ValueError("Frame rate must be greater than 0")
+        self.paths = [
+            os.path.join(path, name) for name in sorted(os.listdir(path))
+            if name.lower().endswith(IMAGE_SUFFIXES)
+        ]
+        if not self.paths:
+            raise ValueError(f"No images found in {path}")
+        self.rate = rate
+        self.loop = loop
+
+    def frames(self) -> Iterator[np.ndarray]:
+        period = 1.0 / self.rate
+        next_frame = time.perf_counter()
+        while True:
+            for path in self.paths:
+                yield load_image(path)
+                next_frame += period
+                delay = next_frame - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame = time.perf_counter()
+            if not self.loop:
+                return
+
+class RawVideoSource:
+    """Raw rgb24 frames of a known size from a binary stream, file or FIFO (e.g. ffmpeg -f rawvideo)."""
+
+    def __init__(self, stream, width: int, height: int):
+        if width <= 0 or height <= 0:
+            raise ValueError("Frame size must be positive")
+        self.stream = stream
+        self.width = width
+        self.height = height
+
+    def frames(self) -> Iterator[np.ndarray]:
+        stream = self.stream
+        if isinstance(stream, str):
+            stream = open(stream, 'rb')
+        size = self.width * self.height * 3
+        try:
+            while True:
+                data = stream.read(size)
+                if len(data) < size:
+                    return
+                yield np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+        finally:
+            if stream is not self.stream:
+                stream.close()
+
+class SamplingMap:
+    """Flat pixel indices sampled for each key, for one frame size."""
+
+    def __init__(self, geometry: Geometry, width: int, height: int, samples: int = DEFAULT_SAMPLES):
+        self.width = width
+        self.height = height
+        # the keyboard, one key unit of margin included, is stretched over the whole frame
+        x0, x1 = geometry.x.min() - 0.5, geometry.x.max() + 0.5
+        y0, y1 = geometry.y.min() - 0.5, geometry.y.max() + 0.5
+        scale_x = width / (x1 - x0)
+        scale_y = height / (y1 - y0)
+
+        # a samples x samples grid of points spread over each key
+        offsets = (np.arange(samples) + 0.5) / samples - 0.5
+        dx, dy = np.meshgrid(offsets, offsets)
+        px = ((geometry.x[:, None] - x0 + dx.ravel()) * scale_x).astype(np.intp)
+        py = ((geometry.y[:, None] - y0 + dy.ravel()) * scale_y).astype(np.intp)
+        np.clip(px, 0, width - 1, out=px)
+        np.clip(py, 0, height - 1, out=py)
+        self.indices = py * width + px
+        self.present = geometry.present
+        self.count = samples * samples
+
+    def sample(self, image: np.ndarray) -> np.ndarray:
+        """Average color under each key, as an (n_leds, 3) uint8 array."""
+        if image.shape[:2] != (self.height, self.width):
+            raise ValueError(f"Expected a {self.width}x{self.height} frame, got {image.shape[1]}x{image.shape[0]}")
+        pixels = image.reshape(-1, 3)[self.indices]
+        colors = (pixels.sum(axis=1, dtype=np.uint32) // self.count).astype(np.uint8)
+        colors[~self.present] = 0
+        return colors
+
+@functools.lru_cache(maxsize=16)
+def sampling_map(geometry: Geometry, width: int, height: int, samples: int = DEFAULT_SAMPLES) -> SamplingMap:
+    """SamplingMap for a frame size, built once and reused for every frame of that size."""
+    return SamplingMap(geometry, width, height, samples)
+
+class AmbientEffect(Effect):
+    """
+    Shows the latest frame of a source. The source is read on its own thread
+    and only the newest frame is kept, so a fast source never backs up the engine.
+    """
+
+    def __init__(self, source, geometry: Optional[Geometry] = None, samples: int = DEFAULT_SAMPLES):
+        self.source = source
+        self.geometry = geometry if geometry is not None else load_geometry()
+        self.samples = samples
+        self.frames_read = 0
+        self.error = None
+        # set once the source has no more frames
+        self.finished = threading.Event()
+        self._latest = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, frame: FrameBuffer):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._read, name='rkcu-ambient', daemon=True)
+            self._thread.start()
+
+    def _read(self):
+        try:
+            for image in self.source.frames():
+                with self._lock:
+                    self._latest = image
+                    self.frames_read += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished.set()
+
+    def render(self, frame: FrameBuffer, t: float):
+        with self._lock:
+            image, self._latest = self._latest, None
+        if image is None:
+            # nothing new; keep showing the previous frame
+            return
+        colors = sampling_map(self.geometry, image.shape[1], image.shape[0], self.samples).sample(image)
+        n_leds = min(frame.n_leds, len(colors))
+        frame.pixels[:n_leds] = colors[:n_leds]
+
+def open_source(path: str, size: Optional[str] = None, rate: float = 10.0):
+    """Pick a source for a path: '-' or --size means raw video, a directory means image frames."""
+    if size or path == '-':
+        if not size:
+            raise ValueError("Raw video needs --size WIDTHxHEIGHT")
+        width, _, height = size.lower().partition('x')
+        stream = sys.stdin.buffer if path == '-' else path
+        return RawVideoSource(stream, int(width), int(height))
+    if os.path.isdir(path):
+        return DirectorySource(path, rate)
+    return ImageFileSource(path)
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m rkcu.ambient', description='Light the keyboard from an image, a directory of frames or raw video.')
+    parser.add_argument('source', help="Image file, directory of images, raw rgb24 file or FIFO, or '-' for stdin")
+    parser.add_argument('--size', help='Frame size of raw video, e.g. 64x36')
+    parser.add_argument('--rate', type=float, default=10.0, help='Frames per second for a directory of images (default: 10)')
+    parser.add_argument('--fps', type=float, default=30.0, help='Frames per second sent to the keyboard (default: 30)')
+    parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+    parser.add_argument('--layout', help='Key layout for the key positions (default: rk100v2)')
+    parser.add_argument('--vid', default='0x258a', help='Keyboard vendor id in hex (default: 0x258a)')
+    parser.add_argument('--pid', default='0x00e0', help='Keyboard product id in hex (default: 0x00e0)')
+    args = parser.parse_args()
+
+    from .effects import EffectEngine
+    from .utils import RKCU
+
+    try:
+        source = open_source(args.source, args.size, args.rate)
+        effect = AmbientEffect(source, load_geometry(args.layout))
+        rk = RKCU(int(args.vid, 16), int(args.pid, 16))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    engine = EffectEngine(rk, effect, fps=args.fps)
+    try:
+        if isinstance(source, RawVideoSource):
+            # video ends with its stream; still images stay up until stopped
+            engine.start(args.duration)
+            effect.finished.wait(args.duration)
+            time.sleep(2.0 / args.fps)
+            engine.stop()
+        else:
+            engine.run(args.duration)
+    except KeyboardInterrupt:
+        engine.stop()
+    finally:
+        rk.close_kb()
+    if effect.error is not None:
+        print(f"Error reading frames: {effect.error}")
+    print(f"{effect.frames_read} frames read, {engine.stats.frames} sent, {engine.stats.dropped} dropped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Audio spectrum visualizer.
+PCM blocks from a WAV file or a raw s16le stream are written into a ring that
+keeps only the most recent samples. Each frame analyzes the newest window with
+a Hann-windowed FFT, groups the bins into one logarithmic band per keyboard
+column and lights each column like a level meter. Audio that arrives faster
+than frames are drawn is dropped, so latency stays at one window.
+
+    python -m rkcu.audio song.wav
+    arecord -f S16_LE -r 44100 -c 1 | python -m rkcu.audio - --rate 44100
+"""
+import argparse
+import sys
+import threading
+import time
+import wave
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .effects import Effect
+from .framebuffer import FrameBuffer
+from .geometry import Geometry, load_geometry
+
+DEFAULT_BLOCK = 512
+DEFAULT_WINDOW = 2048
+
+def _to_mono(data: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Decode interleaved PCM to mono float32 samples in -1..1."""
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768
+    elif sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        # sign-extend 24-bit little endian samples through the top byte of an int32
+        samples = (raw[:, 0].astype(np.int32) << 8 | raw[:, 1].astype(np.int32) << 16 | raw[:, 2].astype(np.int32) << 24) / 2147483648.0
+    elif sample_width == 4:
+        samples = np.frombuffer(data, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width of {sample_width} bytes")
+    samples = samples[:len(samples) // channels * channels].astype(np.float32, copy=False)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+class WavSource:
+    """PCM blocks from a WAV file, paced to real time by default."""
+
+    def __init__(self, path: str, block: int = DEFAULT_BLOCK, realtime: bool = True):
+        self.path = path
+        self.block = block
+        self.realtime = realtime
+        with wave.open(path, 'rb') as wav:
+            if wav.getcomptype() != 'NONE':
+                raise ValueError("Only uncompressed PCM WAV files are supported")
+            self.rate = wav.getframerate()
+
+    def blocks(self) -> Iterator[np.ndarray]:
+        period = self.block / self.rate
+        with wave.open(self.path, 'rb') as wav:
+            width, channels = wav.getsampwidth(), wav.getnchannels()
+            next_block = time.perf_counter()
+            while True:
+                data = wav.readframes(self.block)
+                if not data:
+                    return
+                yield _to_mono(data, width, channels)
+                if self.realtime:
+                    next_block += period
+                    delay = next_block - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+class PCMSource:
+    """Raw signed 16-bit little-endian PCM from a binary stream, file or FIFO."""
+
+    def __init__(self, stream, rate: int = 44100, channels: int = 1, block: int = DEFAULT_BLOCK):
+        if rate <= 0 or channels <= 0:
+            raise ValueError("Sample rate and channel count must be positive")
+        self.stream = stream
+        self.rate = rate
+        self.channels = channels
+        self.block = block
+
+    def blocks(self) -> Iterator[np.ndarray]:
+        stream = self.stream
+        if isinstance(stream, str):
+            stream = open(stream, 'rb')
+        frame = self.channels * 2
+        size = self.block * frame
+        # a read can end inside a sample or between the channels of one;
+        # those bytes are kept and decoded with the next read
+        pending = b''
+        try:
+            while True:
+                data = stream.read(size)
+                if not data:
+                    return
+                data = pending + data
+                whole = len(data) - len(data) % frame
+                pending = data[whole:]
+                if whole:
+                    yield _to_mono(data[:whole], 2, self.channels)
+        finally:
+            if stream is not self.stream:
+                stream.close()
+
+class SampleRing:
+    """The most recent `size` samples; older samples are overwritten, never queued."""
+
+    def __init__(self, size: int = DEFAULT_WINDOW):
+        self.size = size
+        self._buffer = np.zeros(size * 2, dtype=np.float32)
+        self._lock = threading.Lock()
+        # samples written in total, and the total when the window was last read
+        self.written = 0
+        self._read_at = 0
+        # samples that were overwritten before any frame looked at them
+        self.dropped = 0
+
+    def write(self, samples: np.ndarray):
+        samples = samples[-self.size:]
+        count = len(samples)
+        with self._lock:
+            # keep the window contiguous: shift left and append
+            buffer = self._buffer
+            buffer[:self.size - count] = buffer[count:self.size]
+            buffer[self.size - count:self.size] = samples
+            self.written += count
+
+    def latest(self) -> Optional[np.ndarray]:
+        """A copy of the newest window, or None if nothing new arrived since the last call."""
+        with self._lock:
+            new = self.written - self._read_at
+            if not new:
+                return None
+            if new > self.size:
+                self.dropped += new - self.size
+            self._read_at = self.written
+            return self._buffer[:self.size].copy()
+
+class Spectrum:
+    """Windowed FFT grouped into logarithmically spaced bands, scaled to 0..1 levels."""
+
+    def __init__(self, rate: int, size: int = DEFAULT_WINDOW, bands: int = 19,
+                 fmin: float = 40.0, fmax: float = 16000.0, range_db: float = 50.0):
+        self.window = np.hanning(size).astype(np.float32)
+        freqs = np.fft.rfftfreq(size, 1.0 / rate)
+        edges = np.geomspace(fmin, min(fmax, rate / 2), bands + 1)
+        low = np.searchsorted(freqs, edges[:-1])
+        high = np.searchsorted(freqs, edges[1:])
+        # every band gets at least one bin, even where the bins are wider than the band
+        self._low = np.minimum(low, len(freqs) - 1)
+        self._high = np.maximum(high, self._low + 1)
+        self.range_db = range_db
+        # loudest recent band, decaying so quiet passages still show
+        self._peak_db = -np.inf
+        self._levels = np.zeros(bands, dtype=np.float32)
+
+    def analyze(self, samples: np.ndarray, release: float = 0.85) -> np.ndarray:
+        power = np.abs(np.fft.rfft(samples * self.window)) ** 2
+        cumulative = np.concatenate(([0.0], np.cumsum(power)))
+        band_power = (cumulative[self._high] - cumulative[self._low]) / (self._high - self._low)
+        db = 10 * np.log10(band_power + 1e-12)
+
+        self._peak_db = max(db.max(), self._peak_db - 0.5)
+        levels = np.clip((db - (self._peak_db - self.range_db)) / self.range_db, 0.0, 1.0)
+        # rise at once, fall gradually
+        self._levels = np.maximum(levels, self._levels * release).astype(np.float32)
+        return self._levels
+
+class AudioVisualizer(Effect):
+    """Level meter per keyboard column: bass on the left, treble on the right."""
+
+    def __init__(self, source, geometry: Optional[Geometry] = None, window: int = DEFAULT_WINDOW,
+                 low=(0, 255, 0), high=(255, 0, 0)):
+        self.source = source
+        self.geometry = geometry if geometry is not None else load_geometry()
+        self.ring = SampleRing(window)
+        self.spectrum = Spectrum(source.rate, window, self.geometry.cols)
+        self.error = None
+        # set once the source has no more audio
+        self.finished = threading.Event()
+        self._thread = None
+
+        geometry = self.geometry
+        # fraction of the column height at which each key lights, and its color
+        height = (geometry.rows - geometry.row) / geometry.rows
+        self._threshold = height - 0.5 / geometry.rows
+        self._colors = (np.outer(1 - height, low) + np.outer(height, high)).astype(np.uint8)
+        self._colors[~geometry.present] = 0
+
+    def start(self, frame: FrameBuffer):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._read, name='rkcu-audio', daemon=True)
+            self._thread.start()
+
+    def _read(self):
+        try:
+            for block in self.source.blocks():
+                self.ring.write(block)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished.set()
+
+    def render(self, frame: FrameBuffer, t: float):
+        samples = self.ring.latest()
+        if samples is None:
+            return
+        levels = self.spectrum.analyze(samples)
+        lit = levels[self.geometry.col] >= self._threshold
+        n_leds = min(frame.n_leds, self.geometry.n_leds)
+        frame.pixels[:n_leds] = np.where(lit[:n_leds, None], self._colors[:n_leds], 0)
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m rkcu.audio', description='Show an audio spectrum on the keyboard.')
+    parser.add_argument('source', help="WAV file, or '-' / a FIFO for raw s16le PCM")
+    parser.add_argument('--rate', type=int, default=44100, help='Sample rate of raw PCM (default: 44100)')
+    parser.add_argument('--channels', type=int, default=1, help='Channels of raw PCM (default: 1)')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help=f'FFT size in samples (default: {DEFAULT_WINDOW})')
+    parser.add_argument('--fps', type=float, default=30.0, help='Frames per second sent to the keyboard (default: 30)')
+    parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+    parser.add_argument('--layout', help='Key layout for the key positions (default: rk100v2)')
+    parser.add_argument('--vid', default='0x258a', help='Keyboard vendor id in hex (default: 0x258a)')
+    parser.add_argument('--pid', default='0x00e0', help='Keyboard product id in hex (default: 0x00e0)')
+    args = parser.parse_args()
+
+    from .effects import EffectEngine
+    from .utils import RKCU
+
+    try:
+        if args.source == '-' or not args.source.lower().endswith('.wav'):
+            stream = sys.stdin.buffer if args.source == '-' else args.source
+            source = PCMSource(stream, args.rate, args.channels)
+        else:
+            source = WavSource(args.source)
+        effect = AudioVisualizer(source, load_geometry(args.layout), args.window)
+        rk = RKCU(int(args.vid, 16), int(args.pid, 16))
+    except (OSError, ValueError, wave.Error) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    engine = EffectEngine(rk, effect, fps=args.fps)
+    try:
+        engine.start(args.duration)
+        effect.finished.wait(args.duration)
+        engine.stop()
+    except KeyboardInterrupt:
+        engine.stop()
+    finally:
+        rk.close_kb()
+    if effect.error is not None:
+        print(f"Error reading audio: {effect.error}")
+    print(f"{engine.stats.frames} frames sent, {effect.ring.dropped} stale samples dropped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Device backends for RKCU.
+HidBackend talks to real keyboards through hidapi. SimulatedBackend provides
+in-memory keyboards that decode the feature reports they receive, for
+development and benchmarking on machines without a keyboard attached.
+"""
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from .config import Config
+from .enums import Animation, Speed, Brightness, RainbowMode, Sleep
+from .per_key_rgb import (
+    PerKeyRGB,
+    BUFFER_SIZE,
+    CUSTOM_LIGHT_BUFFERS_SIZE,
+    PACKET_PAYLOAD_SIZES,
+    LED_BUFFER_SIZE,
+    MAX_KEYS,
+)
+
+class HidBackend:
+    """Real keyboards through the hidapi package."""
+
+    # paths stay valid between runs, so RKCU may cache them on disk
+    cache_paths = True
+
+    def enumerate(self, vid, pid) -> list:
+        import hid
+        return hid.enumerate(vid, pid)
+
+    def open_path(self, path):
+        import hid
+        h = hid.device()
+        h.open_path(path)
+        return h
+
+    def interface_info(self, path) -> Optional[dict]:
+        """
+        Interface number and usage pages behind a path without enumerating, or
+        None where that isn't known. Only Linux hidraw nodes are supported: their
+        numbers are reused after a replug, so a cached path may name another
+        interface of the same keyboard.
+        """
+        if isinstance(path, bytes):
+            path = path.decode('utf-8', errors='ignore')
+        if not path.startswith('/dev/hidraw'):
+            return None
+        device = os.path.realpath(os.path.join('/sys/class/hidraw', os.path.basename(path), 'device'))
+        try:
+            with open(os.path.join(device, 'report_descriptor'), 'rb') as f:
+                descriptor = f.read()
+            # the HID device sits below its USB interface
+            with open(os.path.join(os.path.dirname(device), 'bInterfaceNumber'), 'r') as f:
+                interface_number = int(f.read(), 16)
+        except (OSError, ValueError):
+            return None
+        return {'interface_number': interface_number, 'usage_pages': usage_pages(descriptor)}
+
+def usage_pages(descriptor: bytes) -> List[int]:
+    """Usage pages declared in a HID report descriptor, in order."""
+    pages = []
+    i = 0
+    while i < len(descriptor):
+        prefix = descriptor[i]
+        if prefix == 0xfe:
+            # long item: size and tag bytes follow the prefix
+            i += 3 + (descriptor[i + 1] if i + 1 < len(descriptor) else 0)
+            continue
+        size = (0, 1, 2, 4)[prefix & 0x03]
+        if prefix & 0xfc == 0x04:
+            pages.append(int.from_bytes(descriptor[i + 1:i + 1 + size], 'little'))
+        i += 1 + size
+    return pages
+
+class SimulatedDevice:
+    """In-memory keyboard that decodes mode reports and per-key RGB buffers."""
+
+    def __init__(self, serial: str = 'SIM0', latency: float = 0.0):
+        self.serial = serial
+        # seconds each send_feature_report blocks for, to mimic the USB round trip
+        self.latency = latency
+        self.writes = 0
+        self.bytes_written = 0
+        self.mode_report = None
+        self.led_buffer = bytearray(LED_BUFFER_SIZE)
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def send_feature_report(self, data) -> int:
+        data = bytes(data)
+        if self.closed:
+            raise IOError("device is closed")
+        if len(data) != BUFFER_SIZE or data[0] != 0x0a:
+            raise IOError(f"unexpected report of {len(data)} bytes")
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            if data[1:5] == b'\x01\x01\x02\x29':
+                self.mode_report = data
+            elif data[1] == CUSTOM_LIGHT_BUFFERS_SIZE and 1 <= data[2] <= CUSTOM_LIGHT_BUFFERS_SIZE:
+                index = data[2] - 1
+                payload_size = PACKET_PAYLOAD_SIZES[index]
+                offset = sum(PACKET_PAYLOAD_SIZES[:index])
+                self.led_buffer[offset:offset + payload_size] = data[BUFFER_SIZE - payload_size:]
+            else:
+                raise IOError(f"unknown report header {data[:3].hex()}")
+            self.writes += 1
+            self.bytes_written += len(data)
+        return len(data)
+
+    def key_color(self, key_index: int) -> Tuple[int, int, int]:
+        """Color last sent for one key."""
+        lbi = key_index * 3
+        return tuple(self.led_buffer[lbi:lbi + 3])
+
+    def key_colors(self, n_leds: int = MAX_KEYS) -> List[Tuple[int, int, int]]:
+        """Colors last sent for the first n_leds keys."""
+        return [self.key_color(i) for i in range(n_leds)]
+
+    def config(self) -> Optional[Config]:
+        """Rebuild a Config from the last mode report and per-key colors, or None before any mode report."""
+        if self.mode_report is None:
+            return None
+
+        report = self.mode_report
+        per_key_rgb = PerKeyRGB()
+        if report[5] == Animation.CUSTOM.value:
+            # unset keys are sent as black, so black keys read back as unset
+            for key_index, color in enumerate(self.key_colors()):
+                if any(color):
+                    per_key_rgb.set_key_color(key_index, *color)
+
+        return Config(
+            Animation(report[5]),
+            Speed(report[7]),
+            Brightness(report[8]),
+            report[9],
+            report[10],
+            report[11],
+            RainbowMode(report[12]),
+            Sleep(report[13]),
+            per_key_rgb,
+        )
+
+    def get_product_string(self) -> str:
+        return 'Simulated RK keyboard'
+
+    def get_serial_number_string(self) -> str:
+        return self.serial
+
+    def close(self):
+        self.closed = True
+
+class SimulatedBackend:
+    """Backend with a fixed set of simulated keyboards."""
+
+    cache_paths = False
+
+    def __init__(self, count: int = 1, vid=0x258a, pid=0x00e0, latency: float = 0.0):
+        self.vid = vid
+        self.pid = pid
+        self.devices = [SimulatedDevice(f'SIM{i}', latency) for i in range(count)]
+
+    def enumerate(self, vid, pid) -> list:
+        if (vid and vid != self.vid) or (pid and pid != self.pid):
+            return []
+        return [
+            {
+                'path': f'sim:{i}'.encode('ascii'),
+                'vendor_id': self.vid,
+                'product_id': self.pid,
+                'serial_number': device.serial,
+                'product_string': device.get_product_string(),
+                'usage_page': 65280,
+                'interface_number': 1,
+            }
+            for i, device in enumerate(self.devices)
+        ]
+
+    def open_path(self, path):
+        device = self._device_at(path)
+        if device is None:
+            raise IOError(f"no simulated device at {path}")
+        device.closed = False
+        return device
+
+    def interface_info(self, path) -> Optional[dict]:
+        if self._device_at(path) is None:
+            return None
+        return {'interface_number': 1, 'usage_pages': [65280]}
+
+    def _device_at(self, path) -> Optional[SimulatedDevice]:
+        if isinstance(path, bytes):
+            path = path.decode('ascii', errors='ignore')
+        if not path.startswith('sim:') or not path[4:].isdigit() or int(path[4:]) >= len(self.devices):
+            return None
+        return self.devices[int(path[4:])]
@@ -0,0 +1,261 @@
+"""
+Microbenchmarks for the encode and apply paths.
+
+    python -m rkcu.bench                         # run and print
+    python -m rkcu.bench --save baseline.json    # store the results
+    python -m rkcu.bench --baseline baseline.json --threshold 0.2
+    python -m rkcu.bench --check-import          # enforce the import-time budget
+
+Results are written as JSON. When compared against a baseline, the command
+exits with status 1 if any benchmark got slower by more than the threshold.
+No keyboard is needed: the apply benchmarks use a SimulatedBackend.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from .backends import SimulatedBackend
+from .config import get_base_config
+from .per_key_rgb import PerKeyRGB
+from .utils import RKCU
+
+# keys 0-112 are the ones the RK100 actually has
+KEY_COUNT = 113
+FRAME_BUDGET_60_FPS = 1.0 / 60
+
+# milliseconds a fresh interpreter may spend importing these modules
+IMPORT_BUDGETS_MS = {
+    'rkcu': 25.0,
+    'rkcu.__main__': 50.0,
+}
+# modules that importing the package or the CLI must not pull in
+DEFERRED_MODULES = ('hid', 'numpy', 'asyncio', 'concurrent.futures', 'socketserver', 'rkcu.utils', 'rkcu.config')
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'modules': [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+def _rainbow_hex(key_index: int) -> str:
+    return '%02x%02x%02x' % ((key_index * 7) % 256, (key_index * 13) % 256, (key_index * 29) % 256)
+
+def _full_per_key_rgb() -> PerKeyRGB:
+    rgb = PerKeyRGB()
+    for key_index in range(KEY_COUNT):
+        rgb.set_key_color_hex(key_index, _rainbow_hex(key_index))
+    return rgb
+
+def _bench_config_report():
+    config = get_base_config()
+    return config.report
+
+def _bench_set_key_color_hex():
+    rgb = PerKeyRGB()
+    colors = [_rainbow_hex(i) for i in range(KEY_COUNT)]
+
+    def run():
+        for key_index, hex_color in enumerate(colors):
+            rgb.set_key_color_hex(key_index, hex_color)
+    return run
+
+def _bench_custom_light_buffers():
+    return _full_per_key_rgb().get_custom_light_buffers
+
+def _bench_framebuffer_light_buffers():
+    try:
+        from .framebuffer import FrameBuffer
+    except ImportError:
+        return None
+    fb = FrameBuffer(KEY_COUNT)
+    fb.assign(fb.pixels + 1)
+    return fb.get_custom_light_buffers
+
+def _bench_json_profile_load(tmpdir):
+    path = os.path.join(tmpdir, 'profile.json')
+    with open(path, 'w') as f:
+        json.dump({str(i): _rainbow_hex(i) for i in range(KEY_COUNT)}, f)
+
+    def run():
+        # the same steps as --set-keys-json
+        config = get_base_config()
+        with open(path, 'r') as f:
+            keys_data = json.load(f)
+        for key_index, hex_color in keys_data.items():
+            config.PER_KEY_RGB.set_key_color_hex(int(key_index), hex_color)
+    return run
+
+def _bench_binary_profile_load(tmpdir):
+    from .profile import load_reports, Profile
+    path = os.path.join(tmpdir, 'profile.rkp')
+    profile = Profile(KEY_COUNT)
+    for key_index in range(KEY_COUNT):
+        profile.set_key_color(key_index, *bytes.fromhex(_rainbow_hex(key_index)))
+    profile.save(path)
+    return lambda: load_reports(path)
+
+def _bench_compiled_profile_load(tmpdir):
+    from .compiled import ProfileCache
+    path = os.path.join(tmpdir, 'compiled.json')
+    with open(path, 'w') as f:
+        json.dump({str(i): _rainbow_hex(i) for i in range(KEY_COUNT)}, f)
+    cache = ProfileCache(os.path.join(tmpdir, 'compiled'))
+    cache.load(path)
+    return lambda: cache.load(path)
+
+def _bench_apply_config(latency, changing):
+    rk = RKCU(0x258a, 0x00e0, backend=SimulatedBackend(latency=latency))
+    config = get_base_config()
+    config.PER_KEY_RGB = _full_per_key_rgb()
+    state = {'frame': 0}
+
+    def run():
+        state['frame'] += 1
+        if changing == 'all':
+            # every key changes, so all 7 per-key packets are resent
+            for key_index in range(KEY_COUNT):
+                config.PER_KEY_RGB.set_key_color(key_index, state['frame'] % 256, key_index, 0)
+        else:
+            # one key changes, so only its packet is resent
+            config.PER_KEY_RGB.set_key_color(10, state['frame'] % 256, 0, 0)
+        rk.apply_config(config)
+    return run
+
+def benchmarks(latency: float, tmpdir: str):
+    """Name to zero-argument callable; entries whose dependencies are missing are skipped."""
+    candidates = {
+        'config_report': _bench_config_report(),
+        'set_key_color_hex_113': _bench_set_key_color_hex(),
+        'get_custom_light_buffers_113': _bench_custom_light_buffers(),
+        'framebuffer_light_buffers_113': _bench_framebuffer_light_buffers(),
+        'json_profile_load_113': _bench_json_profile_load(tmpdir),
+        'binary_profile_load_113': _bench_binary_profile_load(tmpdir),
+        'compiled_profile_load_113': _bench_compiled_profile_load(tmpdir),
+        'apply_config_all_keys': _bench_apply_config(latency, 'all'),
+        'apply_config_one_key': _bench_apply_config(latency, 'one'),
+    }
+    return {name: func for name, func in candidates.items() if func is not None}
+
+def measure(func, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """Time func, returning per-call microseconds (best and median of repeat runs)."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    # scale up so each run takes at least min_time
+    if elapsed < min_time:
+        number = max(number, int(number * min_time / max(elapsed, 1e-9)))
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {'best_us': min(runs), 'median_us': statistics.median(runs), 'calls': number * repeat}
+
+def measure_import(module: str, runs: int = 5) -> dict:
+    """Import module in fresh interpreters; returns the best time and any deferred modules it loaded."""
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_root, env.get('PYTHONPATH')]))
+    code = _IMPORT_PROBE.format(module=module, deferred=DEFERRED_MODULES)
+
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', code], env=env, check=True, stdout=subprocess.PIPE
+        ).stdout
+        samples.append(json.loads(output))
+    return {'best_ms': min(s['ms'] for s in samples), 'loaded': samples[0]['modules']}
+
+def check_import_budget() -> list:
+    """Return a description of every import that is over budget or loads deferred modules."""
+    problems = []
+    for module, budget_ms in IMPORT_BUDGETS_MS.items():
+        result = measure_import(module)
+        print(f"import {module}: {result['best_ms']:.1f} ms (budget {budget_ms:.0f} ms)")
+        if result['best_ms'] > budget_ms:
+            problems.append(f"import {module} took {result['best_ms']:.1f} ms, budget is {budget_ms:.0f} ms")
+        if result['loaded']:
+            problems.append(f"import {module} loaded {', '.join(result['loaded'])}")
+    return problems
+
+def run_all(latency: float = 0.0, only=None) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='rkcu-bench-') as tmpdir:
+        for name, func in benchmarks(latency, tmpdir).items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            results[name] = measure(func)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'simulated_latency_s': latency,
+        'results': results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Return (name, baseline_us, current_us, change) for every benchmark slower than threshold."""
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        change = result['best_us'] / base['best_us'] - 1
+        if change > threshold:
+            regressions.append((name, base['best_us'], result['best_us'], change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m rkcu.bench', description='Benchmark rkcu encode and apply paths.')
+    parser.add_argument('--save', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against results saved earlier with --save')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown against the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Simulated seconds per feature report for the apply benchmarks')
+    parser.add_argument('--only', action='append', help='Only run benchmarks whose name contains this (can be used multiple times)')
+    parser.add_argument('--check-import', action='store_true', help='Only check the import-time budget and exit with status 1 if it is exceeded')
+    args = parser.parse_args()
+
+    if args.check_import:
+        problems = check_import_budget()
+        for problem in problems:
+            print(f"FAIL {problem}")
+        sys.exit(1 if problems else 0)
+
+    report = run_all(args.latency, args.only)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    print(f"{'benchmark':<32}{'best us':>12}{'median us':>12}{'baseline us':>14}")
+    for name, result in report['results'].items():
+        base = baseline.get('results', {}).get(name, {}).get('best_us') if baseline else None
+        base_text = f"{base:14.2f}" if base else f"{'-':>14}"
+        print(f"{name:<32}{result['best_us']:12.2f}{result['median_us']:12.2f}{base_text}")
+
+    for name in ('apply_config_all_keys', 'apply_config_one_key'):
+        if name in report['results']:
+            frame_time = report['results'][name]['median_us'] / 1e6
+            verdict = "ok" if frame_time < FRAME_BUDGET_60_FPS else "too slow"
+            print(f"{name}: {1 / frame_time:.0f} frames/s max, 60 FPS {verdict}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.save}")
+
+    if baseline:
+        regressions = compare(report, baseline, args.threshold)
+        for name, base_us, current_us, change in regressions:
+            print(f"REGRESSION {name}: {base_us:.2f} us -> {current_us:.2f} us (+{change:.0%})")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
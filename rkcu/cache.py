@@ -0,0 +1,72 @@
+"""
+On-disk cache of resolved keyboard configuration interfaces.
+Saves the HID path found by enumeration so later connections can open it directly.
+"""
+import json
+import os
+from typing import Optional
+
+HID_PATHS_FILE = 'hid_paths.json'
+
+def cache_dir() -> str:
+    """Cache directory from $RKCU_CACHE_DIR, else the platform's user cache directory."""
+    if os.environ.get('RKCU_CACHE_DIR'):
+        return os.environ['RKCU_CACHE_DIR']
+    if os.name == 'nt' and os.environ.get('LOCALAPPDATA'):
+        return os.path.join(os.environ['LOCALAPPDATA'], 'rkcu', 'cache')
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'rkcu')
+
+def _device_key(vid: int, pid: int, serial: Optional[str]) -> str:
+    return f"{vid:04x}:{pid:04x}:{serial or ''}"
+
+def _load_entries() -> dict:
+    try:
+        with open(os.path.join(cache_dir(), HID_PATHS_FILE), 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        return entries if isinstance(entries, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_entries(entries: dict):
+    # the cache is only an optimization, so failing to write it is not an error
+    try:
+        directory = cache_dir()
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f'{HID_PATHS_FILE}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, os.path.join(directory, HID_PATHS_FILE))
+    except OSError:
+        pass
+
+def load_hid_path(vid: int, pid: int, serial: Optional[str] = None) -> Optional[dict]:
+    """
+    Return the cached entry ({'path': bytes, 'product': str, 'serial': str,
+    'interface_number': int, 'usage_page': int}) or None.
+    """
+    entry = _load_entries().get(_device_key(vid, pid, serial))
+    if not isinstance(entry, dict) or 'path' not in entry:
+        return None
+    return dict(entry, path=entry['path'].encode('latin-1'))
+
+def store_hid_path(vid: int, pid: int, serial: Optional[str], path, product: str, device_serial: str,
+                   interface_number: Optional[int] = None, usage_page: Optional[int] = None):
+    """Remember the configuration interface path for a keyboard, and which interface it was."""
+    if isinstance(path, str):
+        path = path.encode('utf-8')
+    entries = _load_entries()
+    entries[_device_key(vid, pid, serial)] = {
+        'path': path.decode('latin-1'),
+        'product': product or '',
+        'serial': device_serial or '',
+        'interface_number': interface_number,
+        'usage_page': usage_page,
+    }
+    _save_entries(entries)
+
+def forget_hid_path(vid: int, pid: int, serial: Optional[str] = None):
+    """Drop a cached path that no longer opens the right device."""
+    entries = _load_entries()
+    if entries.pop(_device_key(vid, pid, serial), None) is not None:
+        _save_entries(entries)
@@ -0,0 +1,68 @@
+"""
+Color correction for per-key RGB.
+LEDs respond roughly linearly to the values they are sent, so colors picked on
+a screen look washed out, and the three channels differ in brightness.
+ColorCorrection combines a gamma curve and per-channel gain into one 256-entry
+lookup table per channel, applied with bytes.translate to the whole staging
+buffer just before it is packed. Tables are built the first time they are
+used and shared by every correction with the same gamma and gain.
+"""
+import functools
+from typing import Sequence, Tuple
+
+@functools.lru_cache(maxsize=32)
+def _tables(gamma: float, gain: Tuple[float, float, float]) -> Tuple[bytes, bytes, bytes]:
+    curve = [(value / 255) ** gamma for value in range(256)]
+    return tuple(bytes(round(255 * channel_gain * level) for level in curve) for channel_gain in gain)
+
+class ColorCorrection:
+    """Gamma curve and per-channel gain as three 256-entry lookup tables."""
+
+    def __init__(self, gamma: float = 1.0, gain: Sequence[float] = (1.0, 1.0, 1.0)):
+        if gamma <= 0:
+            raise ValueError("Gamma must be greater than 0")
+        gain = tuple(float(g) for g in gain)
+        if len(gain) != 3 or not all(0.0 <= g <= 1.0 for g in gain):
+            raise ValueError("Gain needs three values between 0 and 1 (red, green, blue)")
+        self.gamma = float(gamma)
+        self.gain = gain
+
+    @property
+    def tables(self) -> Tuple[bytes, bytes, bytes]:
+        """Red, green and blue lookup tables."""
+        return _tables(self.gamma, self.gain)
+
+    @classmethod
+    def parse(cls, gamma=None, gain=None) -> "ColorCorrection":
+        """Build from command-line style values: a gamma number and a 'R,G,B' gain string."""
+        if isinstance(gain, str):
+            try:
+                gain = [float(part) for part in gain.split(',')]
+            except ValueError:
+                raise ValueError("Gain must be three comma separated numbers, e.g. 1,0.9,0.8")
+        return cls(float(gamma) if gamma is not None else 1.0, gain if gain is not None else (1.0, 1.0, 1.0))
+
+    def is_identity(self) -> bool:
+        return self.gamma == 1.0 and self.gain == (1.0, 1.0, 1.0)
+
+    def to_dict(self) -> dict:
+        return {'gamma': self.gamma, 'gain': list(self.gain)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ColorCorrection":
+        return cls(data.get('gamma', 1.0), data.get('gain', (1.0, 1.0, 1.0)))
+
+    def correct(self, red: int, green: int, blue: int) -> Tuple[int, int, int]:
+        """Corrected value of one color."""
+        return self.tables[0][red], self.tables[1][green], self.tables[2][blue]
+
+    def apply(self, source, target: bytearray):
+        """Write the corrected copy of a flat RGB buffer into target (which may be source)."""
+        for channel, table in enumerate(self.tables):
+            target[channel::3] = source[channel::3].translate(table)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ColorCorrection) and (self.gamma, self.gain) == (other.gamma, other.gain)
+
+    def __repr__(self) -> str:
+        return f"ColorCorrection(gamma={self.gamma}, gain={self.gain})"
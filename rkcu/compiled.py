@@ -0,0 +1,164 @@
+"""
+On-disk cache of fully encoded profiles.
+A profile (a --set-keys-json file or a binary profile) is encoded once into
+the feature reports RKCU writes; later applies read those bytes back instead
+of building a Config. Entries are keyed by a hash of the profile contents and
+the least recently used ones are evicted once the cache grows past its size
+limit.
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from .cache import cache_dir
+from .per_key_rgb import BUFFER_SIZE
+from .profile import Profile
+
+# bump when the encoding changes so old entries stop matching
+COMPILED_VERSION = b'rkcu-compiled-1'
+DEFAULT_MAX_BYTES = 1024 * 1024
+ENTRY_SUFFIX = '.bin'
+PROFILE_SUFFIXES = ('.json', '.rkp')
+
+def encode_profile(data: bytes) -> List[bytes]:
+    """Encode profile file contents, binary or JSON, into feature reports."""
+    config = Profile.decode(data).to_config()
+    return [bytes(config.report())] + [bytes(b) for b in config.get_custom_light_buffers()]
+
+class ProfileCache:
+    """Encoded profiles stored in <cache dir>/compiled, bounded to max_bytes."""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or os.path.join(cache_dir(), 'compiled')
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(data: bytes) -> str:
+        return hashlib.sha256(COMPILED_VERSION + data).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[List[bytes]]:
+        """Stored reports for key, or None on a miss or a damaged entry."""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if not data or len(data) % BUFFER_SIZE:
+            return None
+        try:
+            # mark as recently used for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return [data[i:i + BUFFER_SIZE] for i in range(0, len(data), BUFFER_SIZE)]
+
+    def put(self, key: str, reports: List[bytes], evict: bool = True):
+        # the cache is only an optimization, so failing to write it is not an error
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._entry_path(key)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(reports))
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        if evict:
+            self.evict()
+
+    def load(self, profile_path: str) -> List[bytes]:
+        """Reports for a profile file, encoding and storing them on a miss."""
+        with open(profile_path, 'rb') as f:
+            data = f.read()
+        key = self.key(data)
+        reports = self.get(key)
+        if reports is None:
+            reports = encode_profile(data)
+            self.put(key, reports)
+        return reports
+
+    def entries(self) -> list:
+        """(mtime, size, path) for every entry, oldest first."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _compile_one(directory: str, profile_path: str):
+    # runs in a worker process; eviction is left to the parent
+    cache = ProfileCache(directory)
+    with open(profile_path, 'rb') as f:
+        data = f.read()
+    key = cache.key(data)
+    if cache.get(key) is None:
+        cache.put(key, encode_profile(data), evict=False)
+    return key
+
+def profile_files(paths: List[str]) -> List[str]:
+    """Expand directories into the profile files they contain."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith(PROFILE_SUFFIXES) and os.path.isfile(os.path.join(path, name))
+            )
+        else:
+            files.append(path)
+    return files
+
+def compile_profiles(paths: List[str], cache: Optional[ProfileCache] = None, jobs: Optional[int] = None) -> dict:
+    """
+    Encode every profile in paths (files or directories) into the cache using a
+    process pool. Returns {profile path: cache key or the exception it raised}.
+    """
+    cache = cache or ProfileCache()
+    files = profile_files(paths)
+    results = {}
+    if files:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {path: executor.submit(_compile_one, cache.directory, path) for path in files}
+            for path, future in futures.items():
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    results[path] = e
+        cache.evict()
+    return results
@@ -37,6 +37,19 @@ class Config:
         self.ANIMATION_RAINBOW = RainbowMode.from_value(var['rainbow'])
         self.ANIMATION_SLEEP_DURATION = Sleep.from_value(5 if var['sleep'] is None else int(var['sleep']))
 
+    def settings(self) -> dict:
+        """Mode settings under their command line names; update() turns them back into this config."""
+        return {
+            'animation': self.ANIMATION_TYPE.name.lower(),
+            'speed': self.ANIMATION_SPEED.value,
+            'brightness': self.ANIMATION_BRIGHTNESS,
+            'red': self.ANIMATION_RED,
+            'green': self.ANIMATION_GREEN,
+            'blue': self.ANIMATION_BLUE,
+            'rainbow': self.ANIMATION_RAINBOW == RainbowMode.ON,
+            'sleep': self.ANIMATION_SLEEP_DURATION.value,
+        }
+
     def report(self) -> bytearray:
         if self.PER_KEY_RGB.has_custom_colors():
             animation_mode = Animation.CUSTOM.value
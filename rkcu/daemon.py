@@ -0,0 +1,329 @@
+"""
+rkcud - keeps the keyboard's HID interface open and serves commands over a Unix socket.
+
+Each request is one line of JSON and gets one line of JSON back:
+
+    {"cmd": "apply", "settings": {...}, "keys": {"15": "ff0000"}}   replace the whole config
+    {"cmd": "set_keys", "keys": {"15": "ff0000"}, "clear": ["16"]}  change some per-key colors
+    {"cmd": "stream", "leds": 113}                                  switch to raw frame streaming
+    {"cmd": "metrics", "format": "json"}                           transport metrics ("json" or "prometheus")
+    {"cmd": "ping"}
+
+settings uses the same names as the command line (speed, brightness, sleep, animation,
+rainbow, red, green, blue); missing ones take the CLI defaults. apply may also carry a
+"correction" ({"gamma": 2.2, "gain": [1, 0.9, 0.8]}) used instead of the daemon's own
+--gamma/--gain for that config. After a stream request is
+acknowledged the connection carries raw frames of leds * 3 RGB bytes until it is closed.
+
+With --shm the daemon also creates a shared-memory framebuffer (see rkcu.shm) and
+shows its frame whenever a local process changes it.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+from .backends import SimulatedBackend
+from .color import ColorCorrection
+from .config import get_base_config
+from .enums import Animation
+from .per_key_rgb import PacketPacker, PerKeyRGB, MAX_KEYS
+from .shm import SharedFrameBuffer, default_shm_path
+from .utils import RKCU
+
+SETTINGS = ('animation', 'speed', 'brightness', 'sleep', 'rainbow', 'red', 'green', 'blue')
+
+def default_socket_path() -> str:
+    """Socket path from $RKCU_SOCKET, else $XDG_RUNTIME_DIR/rkcud.sock, else /tmp/rkcud-<uid>.sock."""
+    if os.environ.get('RKCU_SOCKET'):
+        return os.environ['RKCU_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'rkcud.sock')
+    return os.path.join('/tmp', f'rkcud-{os.getuid()}.sock')
+
+def _key_index(value) -> int:
+    key_index = int(value)
+    if not 0 <= key_index < MAX_KEYS:
+        raise ValueError(f"Key index must be between 0 and {MAX_KEYS - 1}")
+    return key_index
+
+def _parse_keys(keys) -> dict:
+    """Validate a {"index": "rrggbb"} mapping into {index: (r, g, b)}."""
+    staged = PerKeyRGB()
+    for key_index, hex_color in (keys or {}).items():
+        staged.set_key_color_hex(_key_index(key_index), hex_color)
+    return staged.custom_colors
+
+def _read_exactly(rfile, view) -> bool:
+    """Fill view from rfile, returning False if the stream ends first."""
+    filled = 0
+    while filled < len(view):
+        count = rfile.readinto(view[filled:])
+        if not count:
+            return False
+        filled += count
+    return True
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if request.get('cmd') == 'stream':
+                    self._stream(int(request.get('leds', MAX_KEYS)))
+                    return
+                self._reply(self.server.rkcud.handle(request))
+            except Exception as e:
+                self._reply({'ok': False, 'error': str(e)})
+
+    def _reply(self, response: dict):
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+    def _stream(self, leds: int):
+        if not 0 < leds <= MAX_KEYS:
+            raise ValueError(f"LED count must be between 1 and {MAX_KEYS}")
+
+        self._reply({'ok': True})
+        frame = bytearray(leds * 3)
+        view = memoryview(frame)
+        while _read_exactly(self.rfile, view):
+            self.server.rkcud.send_frame(frame)
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class RKCUDaemon:
+    """Owns one RKCU device and applies commands from any number of socket clients."""
+
+    def __init__(self, vid, pid, socket_path: str = None, backend=None, correction=None,
+                 shm_path: str = None, shm_poll: float = 0.01):
+        self.vid = vid
+        self.pid = pid
+        self.backend = backend
+        self.socket_path = socket_path or default_socket_path()
+        # rkcu.color.ColorCorrection applied to every per-key frame
+        self.correction = correction
+        self.config = get_base_config()
+        self.config.PER_KEY_RGB.color_correction = correction
+        self.rk = RKCU(vid, pid, backend=backend)
+        self._lock = threading.Lock()
+        self._packer = PacketPacker(self.config.PER_KEY_RGB.color_correction)
+        self._server = None
+        # shared-memory framebuffer polled every shm_poll seconds, created when serving starts
+        if shm_poll <= 0:
+            raise ValueError("Shared framebuffer poll interval must be greater than 0")
+        self.shm_path = (shm_path or default_shm_path()) if shm_path is not None else None
+        self.shm_poll = shm_poll
+        self.shared = None
+        self._stop = threading.Event()
+
+    def handle(self, request: dict) -> dict:
+        """Run one command and return its response."""
+        cmd = request.get('cmd')
+        if cmd == 'ping':
+            return {'ok': True}
+        if cmd == 'metrics':
+            if request.get('format') == 'prometheus':
+                return {'ok': True, 'metrics': self.rk.metrics.to_prometheus()}
+            return {'ok': True, 'metrics': self.rk.metrics.snapshot()}
+
+        with self._lock:
+            if cmd == 'apply':
+                config = get_base_config()
+                settings = request.get('settings') or {}
+                config.update({name: settings.get(name) for name in SETTINGS})
+                correction = request.get('correction')
+                config.PER_KEY_RGB.color_correction = ColorCorrection.from_dict(correction) if correction else self.correction
+                for key_index, color in _parse_keys(request.get('keys')).items():
+                    config.PER_KEY_RGB.set_key_color(key_index, *color)
+                self.config = config
+            elif cmd == 'set_keys':
+                # everything is checked before anything changes, so a bad entry leaves the config as it was
+                clear = [_key_index(key_index) for key_index in request.get('clear') or []]
+                colors = _parse_keys(request.get('keys'))
+                for key_index in clear:
+                    self.config.PER_KEY_RGB.clear_key(key_index)
+                for key_index, color in colors.items():
+                    self.config.PER_KEY_RGB.set_key_color(key_index, *color)
+            else:
+                raise ValueError(f"Unknown command: {cmd}")
+
+            self._write('apply_config', self.config, request.get('force', False))
+            return {'ok': True, 'custom_keys': len(self.config.PER_KEY_RGB.custom_colors)}
+
+    def send_frame(self, frame):
+        """Show a raw RGB frame using the current mode settings."""
+        with self._lock:
+            report = self.config.report()
+            report[5] = Animation.CUSTOM.value
+            self._write('send_reports', [report] + self._packer.pack_from(frame))
+
+    def _watch_shared(self):
+        """Send the shared frame whenever its sequence counter moves."""
+        frame = bytearray(self.shared.frame_size)
+        seen = self.shared.seq
+        while not self._stop.wait(self.shm_poll):
+            seq = self.shared.read(frame)
+            if seq is None or seq == seen:
+                continue
+            seen = seq
+            try:
+                self.send_frame(frame)
+            except IOError as e:
+                print(f"Error: {e}", file=sys.stderr)
+
+    def _write(self, method: str, *args):
+        try:
+            getattr(self.rk, method)(*args)
+        except IOError:
+            # the keyboard may have been replugged; find it again and retry once
+            self.rk.reopen()
+            getattr(self.rk, method)(*args)
+
+    def serve_forever(self):
+        """Listen on the socket until shutdown() is called."""
+        if os.path.exists(self.socket_path):
+            # refuse to steal the socket from a daemon that is still running
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise IOError(f"rkcud is already running on {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)
+            finally:
+                probe.close()
+
+        old_umask = os.umask(0o077)
+        try:
+            self._server = _Server(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.rkcud = self
+
+        watcher = None
+        try:
+            if self.shm_path is not None:
+                self.shared = SharedFrameBuffer.create(self.shm_path)
+                self._stop.clear()
+                watcher = threading.Thread(target=self._watch_shared, name='rkcud-shm', daemon=True)
+                watcher.start()
+            self._server.serve_forever()
+        finally:
+            self._stop.set()
+            if watcher is not None:
+                watcher.join()
+            if self.shared is not None:
+                os.unlink(self.shared.path)
+                self.shared.close()
+                self.shared = None
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.rk.close_kb()
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
+
+class RKCUClient:
+    """Thin client for a running rkcud."""
+
+    def __init__(self, socket_path: str = None):
+        self.socket_path = socket_path or default_socket_path()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(self.socket_path)
+        except OSError as e:
+            self._sock.close()
+            raise IOError(f"Could not connect to rkcud at {self.socket_path}: {e}")
+        self._file = self._sock.makefile('rwb')
+
+    def request(self, request: dict) -> dict:
+        self._file.write(json.dumps(request).encode('utf-8') + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise IOError("rkcud closed the connection")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise IOError(f"rkcud: {response.get('error')}")
+        return response
+
+    def apply(self, settings: dict, keys: dict = None, force: bool = False, correction: dict = None) -> dict:
+        """
+        Replace the daemon's config with these CLI-style settings and per-key hex
+        colors, color corrected with `correction` (ColorCorrection.to_dict()) if given.
+        """
+        request = {'cmd': 'apply', 'settings': settings, 'keys': keys or {}, 'force': force}
+        if correction is not None:
+            request['correction'] = correction
+        return self.request(request)
+
+    def set_keys(self, keys: dict, clear: list = None) -> dict:
+        """Change some per-key colors, leaving the rest of the config as it is."""
+        return self.request({'cmd': 'set_keys', 'keys': keys, 'clear': clear or []})
+
+    def metrics(self, format: str = 'json'):
+        """The daemon device's transport metrics, as a dict or as Prometheus text."""
+        return self.request({'cmd': 'metrics', 'format': format})['metrics']
+
+    def stream(self, leds: int = MAX_KEYS):
+        """Switch the connection to raw frame streaming; returns a function that sends one frame."""
+        self.request({'cmd': 'stream', 'leds': leds})
+        frame_size = leds * 3
+
+        def send_frame(rgb):
+            if len(rgb) != frame_size:
+                raise ValueError(f"Frame must be {frame_size} bytes")
+            self._file.write(rgb)
+            self._file.flush()
+
+        return send_frame
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='rkcud',
+        description='Keep a Royal Kludge keyboard open and accept rkcu commands over a Unix socket.'
+    )
+    parser.add_argument('--socket', '-s', help=f'Socket path (default: {default_socket_path()})')
+    parser.add_argument('--vid', default='0x258a', help='Keyboard vendor id (default: 0x258a)')
+    parser.add_argument('--pid', default='0x00e0', help='Keyboard product id (default: 0x00e0)')
+    parser.add_argument('--simulate', action='store_true', help='Serve a simulated keyboard instead of real hardware')
+    parser.add_argument('--gamma', type=float, help='Gamma correction for per-key colors, e.g. 2.2')
+    parser.add_argument('--gain', help='Per-channel gain for per-key colors as R,G,B, e.g. 1,0.9,0.8')
+    parser.add_argument('--shm', nargs='?', const='', metavar='PATH', help='Also serve a shared-memory framebuffer (default path: $RKCU_SHM, else $XDG_RUNTIME_DIR/rkcu.fb)')
+    parser.add_argument('--shm-poll', type=float, default=0.01, help='Seconds between checks of the shared framebuffer (default: 0.01)')
+    args = parser.parse_args()
+
+    vid, pid = int(args.vid, 16), int(args.pid, 16)
+    backend = SimulatedBackend(vid=vid, pid=pid) if args.simulate else None
+    try:
+        correction = ColorCorrection.parse(args.gamma, args.gain)
+        daemon = RKCUDaemon(vid, pid, args.socket, backend, correction, args.shm, args.shm_poll)
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"rkcud listening on {daemon.socket_path}")
+    if daemon.shm_path is not None:
+        print(f"Shared framebuffer at {daemon.shm_path}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping rkcud...")
+    except IOError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
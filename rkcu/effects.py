@@ -0,0 +1,186 @@
+"""
+Host-side lighting effects.
+An EffectEngine renders an Effect into a FrameBuffer at a fixed frame rate and
+sends each frame through RKCU, keeping count of frames that were dropped or late.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from .config import Config, get_base_config
+from .enums import Brightness
+from .framebuffer import FrameBuffer
+from .geometry import Geometry
+
+class Effect:
+    """Base class for effects; subclasses fill the frame in render()."""
+
+    def start(self, frame: FrameBuffer):
+        """Called once before the first frame."""
+        pass
+
+    def render(self, frame: FrameBuffer, t: float):
+        """Draw the frame shown t seconds after the engine started."""
+        raise NotImplementedError
+
+class FunctionEffect(Effect):
+    """Wraps a render(frame, t) function as an Effect."""
+
+    def __init__(self, render: Callable[[FrameBuffer, float], None]):
+        self._render = render
+
+    def render(self, frame: FrameBuffer, t: float):
+        self._render(frame, t)
+
+class Breathing(Effect):
+    """Fades every key in and out of one color."""
+
+    def __init__(self, color: Tuple[int, int, int], period: float = 4.0):
+        self.color = np.array(color, dtype=np.float32)
+        self.period = period
+
+    def render(self, frame: FrameBuffer, t: float):
+        level = 0.5 - 0.5 * np.cos(2 * np.pi * t / self.period)
+        frame.pixels[:] = self.color * level
+
+def hue_to_rgb(hue: np.ndarray) -> np.ndarray:
+    """Fully saturated colors for hues in 0..1, as an (n, 3) float array in 0..255."""
+    # three phase-shifted triangle waves
+    offsets = np.array([0.0, 2.0 / 3.0, 1.0 / 3.0], dtype=np.float32)
+    channels = np.abs((hue[:, None] + offsets) % 1.0 * 6.0 - 3.0) - 1.0
+    return np.clip(channels, 0.0, 1.0) * 255
+
+class RainbowWave(Effect):
+    """
+    Scrolls a rainbow across the keys, left to right with a geometry, else in
+    LED order. With a geometry built from the hardware order (every bundled
+    layout so far) "left to right" means by LED column, not physical position.
+    """
+
+    def __init__(self, speed: float = 0.25, spread: float = 1.0, geometry: Optional[Geometry] = None):
+        self.speed = speed
+        self.spread = spread
+        self.geometry = geometry
+        self._phase = None
+
+    def start(self, frame: FrameBuffer):
+        if self.geometry is not None:
+            # the geometry may cover fewer LEDs than the frame; the rest stay black
+            self._phase = self.geometry.u[:frame.n_leds] * self.spread
+        else:
+            self._phase = np.arange(frame.n_leds, dtype=np.float32) / frame.n_leds * self.spread
+
+    def render(self, frame: FrameBuffer, t: float):
+        n_leds = len(self._phase)
+        frame.pixels[:n_leds] = hue_to_rgb((self._phase + t * self.speed) % 1.0)
+        frame.pixels[n_leds:] = 0
+
+class Ripple(Effect):
+    """
+    Rings of color spreading out from a key. Distances come from the geometry;
+    without "positions" in the layout they are measured on the uniform LED
+    index grid (six LEDs per column), so rings are only roughly round on the
+    real keyboard.
+    """
+
+    def __init__(self, geometry: Geometry, center: int, color: Tuple[int, int, int] = (255, 255, 255),
+                 speed: float = 8.0, width: float = 1.5, period: float = 2.0):
+        self.geometry = geometry
+        self.center = center
+        self.color = np.array(color, dtype=np.float32)
+        # key units per second, ring width in key units, seconds between rings
+        self.speed = speed
+        self.width = width
+        self.period = period
+        self._distance = None
+
+    def start(self, frame: FrameBuffer):
+        # the geometry may cover fewer LEDs than the frame; the rest stay black
+        self._distance = self.geometry.distances[self.center, :frame.n_leds]
+
+    def render(self, frame: FrameBuffer, t: float):
+        n_leds = len(self._distance)
+        radius = (t % self.period) * self.speed
+        level = np.clip(1.0 - np.abs(self._distance - radius) / self.width, 0.0, 1.0)
+        frame.pixels[:n_leds] = level[:, None] * self.color
+        frame.pixels[n_leds:] = 0
+
+@dataclass
+class FrameStats:
+    """Counters kept by an EffectEngine while it runs."""
+    frames: int = 0
+    dropped: int = 0
+    late: int = 0
+    max_lateness: float = 0.0
+
+class EffectEngine:
+    """Renders an effect at a target frame rate and writes the frames through RKCU."""
+
+    def __init__(self, rk, effect, fps: float = 30, config: Optional[Config] = None, frame: Optional[FrameBuffer] = None):
+        if fps <= 0:
+            raise ValueError("FPS must be greater than 0")
+
+        self.rk = rk
+        self.effect = effect if isinstance(effect, Effect) else FunctionEffect(effect)
+        self.fps = fps
+        self.frame = frame if frame is not None else FrameBuffer()
+        if config is None:
+            config = get_base_config()
+            config.ANIMATION_BRIGHTNESS = Brightness.LEVEL_5.value
+        config.PER_KEY_RGB = self.frame
+        self.config = config
+        self.stats = FrameStats()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self, duration: Optional[float] = None):
+        """Render frames until stop() is called or duration seconds have passed."""
+        period = 1.0 / self.fps
+        # every key starts set to black so effects can write pixels directly
+        self.frame.fill((0, 0, 0))
+        self.effect.start(self.frame)
+        self._stop.clear()
+
+        start = time.perf_counter()
+        index = 0
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if duration is not None and now - start >= duration:
+                break
+
+            # skip frames whose slot has already passed instead of falling further behind
+            due = int((now - start) / period)
+            if due > index:
+                self.stats.dropped += due - index
+                index = due
+
+            self.effect.render(self.frame, index * period)
+            self.rk.apply_config(self.config)
+            self.stats.frames += 1
+
+            lateness = time.perf_counter() - (start + (index + 1) * period)
+            if lateness > 0:
+                self.stats.late += 1
+                self.stats.max_lateness = max(self.stats.max_lateness, lateness)
+
+            index += 1
+            delay = start + index * period - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+
+    def start(self, duration: Optional[float] = None):
+        """Run the engine on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("Effect engine is already running")
+        self._thread = threading.Thread(target=self.run, args=(duration,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop rendering and wait for the background thread, if any."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
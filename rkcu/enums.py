@@ -127,6 +127,9 @@ class Animation(Enum):
         }
         if value in list(values.keys()):
             return values[value]
+        elif isinstance(value, str) and value.upper() in Animation.__members__:
+            # the names printed by list_animations
+            return Animation[value.upper()]
         else :
             print("warning: unable to find specified animation, using Neon Stream")
             return Animation.NEON_STREAM # default value
@@ -0,0 +1,151 @@
+"""
+NumPy-backed per-key RGB framebuffer.
+Stores every key color in one contiguous (n_leds, 3) uint8 array so effects can
+update the whole keyboard with vectorized operations instead of per-key calls.
+"""
+from collections.abc import MutableMapping
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from .per_key_rgb import PerKeyRGB, PacketPacker, MAX_KEYS
+
+
+class _ColorMap(MutableMapping):
+    """Dict view over a FrameBuffer so code using custom_colors keeps working."""
+
+    def __init__(self, framebuffer: "FrameBuffer"):
+        self._fb = framebuffer
+
+    def __getitem__(self, key_index: int) -> Tuple[int, int, int]:
+        if not self._fb._is_set(key_index):
+            raise KeyError(key_index)
+        red, green, blue = self._fb.pixels[key_index]
+        return (int(red), int(green), int(blue))
+
+    def __setitem__(self, key_index: int, color: Tuple[int, int, int]):
+        self._fb.set_key_color(key_index, *color)
+
+    def __delitem__(self, key_index: int):
+        if not self._fb._is_set(key_index):
+            raise KeyError(key_index)
+        self._fb.clear_key(key_index)
+
+    def __iter__(self) -> Iterator[int]:
+        return (int(i) for i in np.flatnonzero(self._fb.mask))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._fb.mask))
+
+
+class FrameBuffer(PerKeyRGB):
+    """Per-key RGB lighting backed by a contiguous (n_leds, 3) uint8 array."""
+
+    def __init__(self, n_leds: int = MAX_KEYS, layout=None):
+        if not 0 < n_leds <= MAX_KEYS:
+            raise ValueError(f"LED count must be between 1 and {MAX_KEYS}")
+
+        self.n_leds = n_leds
+        self.layout = layout
+        self._packer = PacketPacker()
+        # pixels is a view into the packer's staging buffer, laid out exactly like the packet payload
+        self.pixels = np.frombuffer(self._packer.led_buffer, dtype=np.uint8)[:n_leds * 3].reshape(n_leds, 3)
+        # keys that have a custom color set; unset keys are kept black in pixels
+        self.mask = np.zeros(n_leds, dtype=bool)
+        if layout is not None:
+            # the model's default color correction
+            self.color_correction = layout.correction
+
+    def __getstate__(self):
+        return {'n_leds': self.n_leds, 'layout': self.layout, 'correction': self._packer.correction,
+                'pixels': self.pixels.tobytes(), 'mask': self.mask.copy()}
+
+    def __setstate__(self, state):
+        # pixels has to be rebuilt as a view into the new packer's staging buffer
+        self.__init__(state['n_leds'], state.get('layout'))
+        self.pixels.flat[:] = np.frombuffer(state['pixels'], dtype=np.uint8)
+        self.mask[:] = state['mask']
+        self._packer.correction = state.get('correction')
+
+    @property
+    def custom_colors(self) -> _ColorMap:
+        return _ColorMap(self)
+
+    def _is_set(self, key_index) -> bool:
+        return isinstance(key_index, (int, np.integer)) and 0 <= key_index < self.n_leds and bool(self.mask[key_index])
+
+    def _check_index(self, key_index: int):
+        if not 0 <= key_index < self.n_leds:
+            raise ValueError(f"Key index must be between 0 and {self.n_leds - 1}")
+
+    @staticmethod
+    def _check_color(color) -> np.ndarray:
+        color = np.asarray(color)
+        if color.shape[-1:] != (3,):
+            raise ValueError("Colors must have 3 channels (red, green, blue)")
+        if color.size and (color.min() < 0 or color.max() > 255):
+            raise ValueError("RGB values must be between 0 and 255")
+        return color.astype(np.uint8, copy=False)
+
+    def set_key_color(self, key_index: int, red: int, green: int, blue: int):
+        """Set RGB color for a specific key."""
+        if not (0 <= red <= 255 and 0 <= green <= 255 and 0 <= blue <= 255):
+            raise ValueError("RGB values must be between 0 and 255")
+        if isinstance(key_index, str):
+            key_index = self.key_index(key_index)
+        self._check_index(key_index)
+
+        self.pixels[key_index] = (red, green, blue)
+        self.mask[key_index] = True
+
+    def clear_key(self, key_index: int):
+        """Remove custom color for a specific key."""
+        key_index = self.key_index(key_index)
+        if 0 <= key_index < self.n_leds:
+            self.pixels[key_index] = 0
+            self.mask[key_index] = False
+
+    def clear_all(self):
+        """Remove all custom colors."""
+        self.pixels[:] = 0
+        self.mask[:] = False
+
+    def has_custom_colors(self) -> bool:
+        """Check if any custom colors are set."""
+        return bool(self.mask.any())
+
+    def fill(self, color: Tuple[int, int, int]):
+        """Set every key to the same color."""
+        self.pixels[:] = self._check_color(color)
+        self.mask[:] = True
+
+    def set_slice(self, start: int, stop: int, color: Tuple[int, int, int]):
+        """Set keys start..stop-1 to the same color."""
+        self.pixels[start:stop] = self._check_color(color)
+        self.mask[start:stop] = True
+
+    def set_mask(self, mask, colors):
+        """Set the keys selected by a boolean mask to one color or to one color per selected key."""
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != self.mask.shape:
+            raise ValueError(f"Mask must have shape ({self.n_leds},)")
+        self.pixels[mask] = self._check_color(colors)
+        self.mask |= mask
+
+    def assign(self, colors):
+        """Replace the whole frame from an (n_leds, 3) array, marking every key as set."""
+        colors = self._check_color(colors)
+        if colors.shape != self.pixels.shape:
+            raise ValueError(f"Frame must have shape ({self.n_leds}, 3)")
+        self.pixels[:] = colors
+        self.mask[:] = True
+
+    def get_custom_light_buffers(self) -> list:
+        """
+        Generate the custom light mode buffers for the keyboard.
+        The same bytearrays are reused and overwritten by the next call.
+        """
+        if not self.has_custom_colors():
+            return []
+
+        return self._packer.pack()
@@ -0,0 +1,121 @@
+"""
+Physical key positions for spatial effects.
+A Geometry holds x/y coordinates (in key units, 1u = one key pitch) and the
+row and column of every LED as NumPy arrays, plus distance and neighbor tables
+built on first use, so waves, ripples and gradients are computed over all keys
+at once.
+
+LED indices run column-major in hardware order (esc=0, `=1, tab=2, ...), six
+LEDs per column, so the default geometry places LED i at row i % 6 and column
+i // 6. That is a uniform grid: row stagger, wide keys and the gaps between
+key blocks are not modelled, so distances are only approximate. A layout file
+can give real coordinates with a "positions" entry mapping LED indices to
+[x, y]; the bundled layouts don't have one yet.
+"""
+import functools
+from typing import Optional
+
+import numpy as np
+
+from .layout import Layout, load_layout
+from .per_key_rgb import MAX_KEYS
+
+# LEDs per hardware column
+ROWS = 6
+DEFAULT_NEIGHBORS = 8
+
+class Geometry:
+    """Per-LED coordinates, rows and columns for one keyboard model."""
+
+    def __init__(self, x, y, row, col, present=None):
+        self.x = np.asarray(x, dtype=np.float32)
+        self.y = np.asarray(y, dtype=np.float32)
+        self.row = np.asarray(row, dtype=np.intp)
+        self.col = np.asarray(col, dtype=np.intp)
+        self.n_leds = len(self.x)
+        if not 0 < self.n_leds <= MAX_KEYS:
+            raise ValueError(f"LED count must be between 1 and {MAX_KEYS}")
+        if not len(self.y) == len(self.row) == len(self.col) == self.n_leds:
+            raise ValueError("Geometry arrays must all have one entry per LED")
+        # LEDs that have a physical key; absent ones are left out of neighbor tables
+        self.present = np.ones(self.n_leds, dtype=bool) if present is None else np.asarray(present, dtype=bool)
+        self.rows = int(self.row.max()) + 1
+        self.cols = int(self.col.max()) + 1
+        # coordinates scaled to 0..1 across and down the keyboard, for gradients
+        self.u = self._normalize(self.x)
+        self.v = self._normalize(self.y)
+        self._distances = None
+        self._neighbors = {}
+
+    @staticmethod
+    def _normalize(values: np.ndarray) -> np.ndarray:
+        span = values.max() - values.min()
+        return (values - values.min()) / (span if span else 1.0)
+
+    @classmethod
+    def grid(cls, n_leds: int = MAX_KEYS, absent=(), positions=None) -> "Geometry":
+        """
+        Geometry from the hardware order: one key unit per row and column,
+        except for LEDs given explicit (x, y) positions.
+        """
+        index = np.arange(n_leds)
+        row = index % ROWS
+        col = index // ROWS
+        x = col + 0.5
+        y = row + 0.5
+        for i, (key_x, key_y) in (positions or {}).items():
+            if i < n_leds:
+                x[i] = key_x
+                y[i] = key_y
+        present = np.ones(n_leds, dtype=bool)
+        present[[i for i in absent if i < n_leds]] = False
+        return cls(x, y, row, col, present)
+
+    @classmethod
+    def from_layout(cls, layout: Layout) -> "Geometry":
+        return cls.grid(layout.n_leds, layout.absent, layout.positions)
+
+    @property
+    def xy(self) -> np.ndarray:
+        """(n_leds, 2) array of coordinates."""
+        return np.stack([self.x, self.y], axis=1)
+
+    @property
+    def distances(self) -> np.ndarray:
+        """(n_leds, n_leds) table of distances between keys in key units, built on first use."""
+        if self._distances is None:
+            dx = self.x[:, None] - self.x[None, :]
+            dy = self.y[:, None] - self.y[None, :]
+            self._distances = np.hypot(dx, dy)
+        return self._distances
+
+    def distance_from(self, x: float, y: float) -> np.ndarray:
+        """Distance from a point to every key."""
+        return np.hypot(self.x - x, self.y - y)
+
+    def angle_from(self, x: float, y: float) -> np.ndarray:
+        """Angle in radians from a point to every key."""
+        return np.arctan2(self.y - y, self.x - x)
+
+    def neighbors(self, k: int = DEFAULT_NEIGHBORS) -> np.ndarray:
+        """
+        (n_leds, k) table of the k nearest present keys to each LED, nearest
+        first, not including the LED itself.
+        """
+        table = self._neighbors.get(k)
+        if table is None:
+            distances = self.distances.copy()
+            np.fill_diagonal(distances, np.inf)
+            distances[:, ~self.present] = np.inf
+            count = min(k, int(self.present.sum()) - 1)
+            table = np.argsort(distances, axis=1, kind='stable')[:, :count]
+            self._neighbors[k] = table
+        return table
+
+@functools.lru_cache(maxsize=None)
+def load_geometry(layout_name_or_path: Optional[str] = None) -> Geometry:
+    """
+    Geometry for a bundled layout name or layout file, built once per process.
+    Without a "positions" entry in the layout this is the uniform hardware grid.
+    """
+    return Geometry.from_layout(load_layout(layout_name_or_path))
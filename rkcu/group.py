@@ -0,0 +1,101 @@
+"""
+Multiple keyboards driven as one.
+A DeviceGroup opens every attached RK keyboard and writes to all of them in
+parallel, releasing the writes together so the boards change at the same time.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .config import Config
+from .utils import RKCU
+
+class DeviceGroup:
+    """A set of RKCU devices that receive their frames together."""
+
+    def __init__(self, devices: list):
+        if not devices:
+            raise ValueError("A device group needs at least one device")
+        self.devices = list(devices)
+        self._executor = ThreadPoolExecutor(max_workers=len(self.devices), thread_name_prefix='rkcu-group')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, vid=0x258a, pid=0x00e0, backend=None) -> "DeviceGroup":
+        """Open every attached keyboard with this VID/PID."""
+        interfaces = RKCU.find_kb_interfaces(vid, pid, backend)
+        if not interfaces:
+            raise IOError("RK keyboard not found. Please check VID and PID.")
+
+        devices = []
+        try:
+            for device_info in interfaces:
+                devices.append(RKCU(vid, pid, path=device_info['path'], backend=backend))
+        except IOError:
+            for rk in devices:
+                rk.close_kb()
+            raise
+        return cls(devices)
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def apply_config(self, config, force: bool = False, at: Optional[float] = None):
+        """
+        Send one config to every device, or one config per device from a list.
+        All writes start together once every device is ready; with `at` (a
+        time.perf_counter() timestamp) they start at that moment instead.
+        """
+        if isinstance(config, Config):
+            configs = [config] * len(self.devices)
+        else:
+            configs = list(config)
+            if len(configs) != len(self.devices):
+                raise ValueError(f"Expected {len(self.devices)} configs, got {len(configs)}")
+
+        # encode up front so the per-device threads only do I/O
+        encoded = {}
+        frames = []
+        for cfg in configs:
+            if id(cfg) not in encoded:
+                encoded[id(cfg)] = [bytes(cfg.report())] + [bytes(b) for b in cfg.get_custom_light_buffers()]
+            frames.append(encoded[id(cfg)])
+        self.send_reports(frames, force, at)
+
+    def send_reports(self, frames: list, force: bool = False, at: Optional[float] = None):
+        """Send encoded reports to every device, or one list of reports per device, releasing all writes together."""
+        if frames and isinstance(frames[0], (bytes, bytearray)):
+            frames = [frames] * len(self.devices)
+        elif len(frames) != len(self.devices):
+            raise ValueError(f"Expected {len(self.devices)} report lists, got {len(frames)}")
+
+        with self._lock:
+            barrier = threading.Barrier(len(self.devices))
+
+            def deliver(rk, reports):
+                barrier.wait()
+                if at is not None:
+                    delay = at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                rk.send_reports(reports, force)
+
+            futures = [self._executor.submit(deliver, rk, reports) for rk, reports in zip(self.devices, frames)]
+            errors = []
+            for index, future in enumerate(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(f"device {index}: {e}")
+            if errors:
+                raise IOError("; ".join(errors))
+
+    def invalidate_cache(self):
+        for rk in self.devices:
+            rk.invalidate_cache()
+
+    def close_kb(self):
+        for rk in self.devices:
+            rk.close_kb()
+        self._executor.shutdown(wait=True)
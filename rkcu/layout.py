@@ -0,0 +1,108 @@
+"""
+Key layouts: the mapping between key names and LED indices for a keyboard model.
+Layouts use the keyboard_mapping.json format produced by
+custom_testing/keyboard_input_mapper.py and are parsed once per process.
+Besides the key names a layout may give "n_leds", "positions" (see
+rkcu.geometry) and a "color_correction" such as {"gamma": 2.2, "gain":
+[1, 0.9, 0.8]}, the model's default for rkcu.color.ColorCorrection.
+"""
+import functools
+import json
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+from .color import ColorCorrection
+
+DEFAULT_LAYOUT = 'rk100v2'
+LAYOUTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts')
+
+class Layout:
+    """Name to LED index lookups for one keyboard model."""
+
+    def __init__(self, name: str, keys: Dict[str, int], absent: Iterable[int] = (), n_leds: Optional[int] = None,
+                 positions: Optional[Dict[int, Tuple[float, float]]] = None,
+                 correction: Optional[ColorCorrection] = None):
+        self.name = name
+        # names are matched case-insensitively; numeric strings always mean LED indices,
+        # so keys named "0" to "9" are renamed "digit0" to "digit9"
+        self.indices = {}
+        for key_name, index in keys.items():
+            key_name = key_name.strip().lower()
+            if key_name.isdigit():
+                key_name = 'digit' + key_name
+            self.indices[key_name] = int(index)
+        self.names = {index: key_name for key_name, index in self.indices.items()}
+        # LED indices the hardware skips; they have no key
+        self.absent = frozenset(int(index) for index in absent)
+        if n_leds is None:
+            n_leds = max(list(self.names) + list(self.absent)) + 1 if self.names or self.absent else 0
+        self.n_leds = n_leds
+        # optional physical key positions (LED index to x, y in key units); see rkcu.geometry
+        self.positions = {int(index): (float(x), float(y)) for index, (x, y) in (positions or {}).items()}
+        # default color correction for this model's LEDs; see rkcu.color
+        self.correction = correction
+
+    @classmethod
+    def from_dict(cls, data: dict, name: Optional[str] = None) -> "Layout":
+        if not isinstance(data.get('mapped_keys'), dict):
+            raise ValueError("Layout has no 'mapped_keys' mapping")
+        return cls(
+            name or data.get('keyboard', ''),
+            data['mapped_keys'],
+            data.get('skipped_indices', ()),
+            data.get('n_leds'),
+            data.get('positions'),
+            ColorCorrection.from_dict(data['color_correction']) if data.get('color_correction') else None,
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "Layout":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __contains__(self, key_name) -> bool:
+        return isinstance(key_name, str) and key_name.strip().lower() in self.indices
+
+    def __getitem__(self, key_name: str) -> int:
+        return self.indices[key_name.strip().lower()]
+
+    def resolve(self, key) -> int:
+        """
+        LED index for a key name, a numeric string or an index. A numeric
+        string is always an LED index, never the name of a digit key.
+        """
+        if isinstance(key, str):
+            if key.strip().isdigit():
+                return int(key)
+            index = self.indices.get(key.strip().lower())
+            if index is None:
+                raise ValueError(f"Unknown key '{key}' in layout {self.name}")
+            return index
+        return key
+
+    def name_of(self, index: int) -> Optional[str]:
+        return self.names.get(index)
+
+    def is_absent(self, index: int) -> bool:
+        return index in self.absent
+
+@functools.lru_cache(maxsize=None)
+def load_layout(name_or_path: Optional[str] = None) -> Layout:
+    """
+    Load a bundled layout by name (e.g. 'rk100v2') or a layout file by path.
+    Results are cached, so repeated calls cost a dict lookup.
+    """
+    name_or_path = name_or_path or DEFAULT_LAYOUT
+    if os.path.isfile(name_or_path):
+        return Layout.from_file(name_or_path)
+    path = os.path.join(LAYOUTS_DIR, name_or_path.lower() + '.json')
+    if not os.path.isfile(path):
+        raise ValueError(f"Unknown layout '{name_or_path}'. Available: {', '.join(available_layouts())}")
+    return Layout.from_file(path)
+
+def available_layouts() -> list:
+    """Names of the bundled layouts."""
+    return sorted(name[:-5] for name in os.listdir(LAYOUTS_DIR) if name.endswith('.json'))
@@ -0,0 +1,149 @@
+"""
+Transport metrics for RKCU devices.
+Counts reports, bytes, skips, short writes and errors, and keeps write-latency
+histograms for mode reports and per-key packets separately.
+"""
+import json
+import threading
+from typing import Sequence
+
+REPORT_KINDS = ('mode', 'per_key')
+
+# upper bounds in seconds; the last bucket (+Inf) is implicit
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # counts[i] is the number of observations in (buckets[i-1], buckets[i]]; the extra slot is +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> list:
+        """(upper bound, observations <= bound) pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (the maximum if it falls in +Inf)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return self.max if bound == float('inf') else bound
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': {('+Inf' if bound == float('inf') else repr(bound)): total for bound, total in self.cumulative()},
+        }
+
+class TransportMetrics:
+    """Counters and latency histograms for one device, safe to read from any thread."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.reports = dict.fromkeys(REPORT_KINDS, 0)
+            self.skipped = dict.fromkeys(REPORT_KINDS, 0)
+            self.bytes_written = dict.fromkeys(REPORT_KINDS, 0)
+            self.short_writes = dict.fromkeys(REPORT_KINDS, 0)
+            self.errors = dict.fromkeys(REPORT_KINDS, 0)
+            self.latency = {kind: Histogram(self._buckets) for kind in REPORT_KINDS}
+
+    def record_write(self, kind: str, written: int, seconds: float):
+        """Count a complete write; short writes are errors and go to record_error."""
+        with self._lock:
+            self.reports[kind] += 1
+            self.bytes_written[kind] += written
+            self.latency[kind].observe(seconds)
+
+    def record_skip(self, kind: str):
+        with self._lock:
+            self.skipped[kind] += 1
+
+    def record_error(self, kind: str, seconds: float, written: int = None):
+        """Count a failed write; `written` is given for a short write that sent only part of the report."""
+        with self._lock:
+            self.errors[kind] += 1
+            if written is not None:
+                self.short_writes[kind] += 1
+                self.bytes_written[kind] += max(written, 0)
+            self.latency[kind].observe(seconds)
+
+    def snapshot(self) -> dict:
+        """All metrics as plain data, per report kind."""
+        with self._lock:
+            return {
+                kind: {
+                    'reports': self.reports[kind],
+                    'skipped': self.skipped[kind],
+                    'bytes_written': self.bytes_written[kind],
+                    'short_writes': self.short_writes[kind],
+                    'errors': self.errors[kind],
+                    'latency_seconds': self.latency[kind].to_dict(),
+                }
+                for kind in REPORT_KINDS
+            }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix: str = 'rkcu', labels: dict = None) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        extra = ''.join(f',{name}="{value}"' for name, value in (labels or {}).items())
+        counters = (
+            ('reports_total', 'Feature reports written.', 'reports'),
+            ('reports_skipped_total', 'Reports skipped because they matched the last one sent.', 'skipped'),
+            ('bytes_written_total', 'Bytes written in feature reports.', 'bytes_written'),
+            ('short_writes_total', 'Feature reports written only partially.', 'short_writes'),
+            ('errors_total', 'Feature report writes that failed.', 'errors'),
+        )
+
+        lines = []
+        with self._lock:
+            for name, help_text, attribute in counters:
+                lines.append(f'# HELP {prefix}_{name} {help_text}')
+                lines.append(f'# TYPE {prefix}_{name} counter')
+                for kind in REPORT_KINDS:
+                    lines.append(f'{prefix}_{name}{{report="{kind}"{extra}}} {getattr(self, attribute)[kind]}')
+
+            lines.append(f'# HELP {prefix}_write_seconds Feature report write latency.')
+            lines.append(f'# TYPE {prefix}_write_seconds histogram')
+            for kind in REPORT_KINDS:
+                histogram = self.latency[kind]
+                for bound, total in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{prefix}_write_seconds_bucket{{report="{kind}"{extra},le="{le}"}} {total}')
+                lines.append(f'{prefix}_write_seconds_sum{{report="{kind}"{extra}}} {histogram.sum}')
+                lines.append(f'{prefix}_write_seconds_count{{report="{kind}"{extra}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
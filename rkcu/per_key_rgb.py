@@ -4,16 +4,104 @@ Allows setting individual RGB colors for each key on the keyboard.
 """
 from typing import Dict, Tuple
 
+BUFFER_SIZE = 65
+CUSTOM_LIGHT_BUFFERS_SIZE = 7
+# bytes of color data carried by each packet: the first one has a 6-byte header, the rest 3
+PACKET_PAYLOAD_SIZES = [BUFFER_SIZE - 6] + [BUFFER_SIZE - 3] * (CUSTOM_LIGHT_BUFFERS_SIZE - 1)
+# highest number of keys whose colors fit in the custom light packets
+MAX_KEYS = sum(PACKET_PAYLOAD_SIZES) // 3
+# size of the flat RGB staging buffer the packets are filled from
+LED_BUFFER_SIZE = CUSTOM_LIGHT_BUFFERS_SIZE * BUFFER_SIZE
+_BLACK = bytes(LED_BUFFER_SIZE)
+
+class PacketPacker:
+    """Preallocated custom light packets filled from a flat RGB staging buffer."""
+
+    def __init__(self, correction=None):
+        self.led_buffer = bytearray(LED_BUFFER_SIZE)
+        # rkcu.color.ColorCorrection applied on the way into the packets; led_buffer itself is left as set
+        self.correction = correction
+        self._corrected = bytearray(LED_BUFFER_SIZE)
+        self.buffers = []
+        # (packet payload, staging slice) pairs copied on every pack, from led_buffer or the corrected copy
+        self._copies = []
+        self._corrected_copies = []
+
+        led_view = memoryview(self.led_buffer)
+        corrected_view = memoryview(self._corrected)
+        offset = 0
+        for i, payload_size in enumerate(PACKET_PAYLOAD_SIZES):
+            buffer = bytearray(BUFFER_SIZE)
+            buffer[0] = 0x0a
+            buffer[1] = CUSTOM_LIGHT_BUFFERS_SIZE
+            buffer[2] = i + 1
+            if i == 0:
+                buffer[3] = 0x03
+                buffer[4] = 0x7e
+                buffer[5] = 0x01
+
+            payload = memoryview(buffer)[BUFFER_SIZE - payload_size:]
+            self._copies.append((payload, led_view[offset:offset + payload_size]))
+            self._corrected_copies.append((payload, corrected_view[offset:offset + payload_size]))
+            self.buffers.append(buffer)
+            offset += payload_size
+
+    def __getstate__(self):
+        # memoryviews can't be pickled or copied, so rebuild them from the staging bytes
+        return bytes(self.led_buffer), self.correction
+
+    def __setstate__(self, state):
+        led_buffer, correction = state
+        self.__init__(correction)
+        self.led_buffer[:] = led_buffer
+
+    def pack(self) -> list:
+        """Copy the staging buffer, color corrected if set, into the packets and return them."""
+        copies = self._copies
+        if self.correction is not None:
+            self.correction.apply(self.led_buffer, self._corrected)
+            copies = self._corrected_copies
+        for payload, leds in copies:
+            payload[:] = leds
+        return self.buffers
+
+    def pack_from(self, rgb) -> list:
+        """Pack a flat RGB bytes-like frame, padding missing keys with black."""
+        size = min(len(rgb), LED_BUFFER_SIZE)
+        self.led_buffer[:size] = memoryview(rgb)[:size]
+        self.led_buffer[size:] = _BLACK[size:]
+        return self.pack()
+
 class PerKeyRGB:
     """Manages per-key RGB lighting configuration."""
+
+    # rkcu.layout.Layout used to resolve key names; integer indices work without one
+    layout = None
     
-    def __init__(self):
+    def __init__(self, layout=None):
         self.custom_colors: Dict[int, Tuple[int, int, int]] = {}
+        self._packer = PacketPacker()
+        self.layout = layout
+        if layout is not None:
+            # the model's default color correction
+            self.color_correction = layout.correction
+    
+    def key_index(self, key) -> int:
+        """Resolve a key name through the layout; indices and numeric strings are LED indices."""
+        if not isinstance(key, str):
+            return key
+        if key.strip().isdigit():
+            return int(key)
+        if self.layout is None:
+            raise ValueError(f"Key '{key}' can only be set by name with a layout")
+        return self.layout.resolve(key)
     
     def set_key_color(self, key_index: int, red: int, green: int, blue: int):
-        """Set RGB color for a specific key."""
+        """Set RGB color for a specific key, by index or by name if a layout is set."""
         if not (0 <= red <= 255 and 0 <= green <= 255 and 0 <= blue <= 255):
             raise ValueError("RGB values must be between 0 and 255")
+        if isinstance(key_index, str):
+            key_index = self.key_index(key_index)
         
         self.custom_colors[key_index] = (red, green, blue)
     
@@ -22,6 +110,8 @@ class PerKeyRGB:
         hex_color = hex_color.lstrip('#')
         if len(hex_color) != 6:
             raise ValueError("Hex color must be 6 characters (e.g., 'ff0000' for red)")
+        # resolved here so an unknown name isn't reported as a bad color below
+        key_index = self.key_index(key_index)
         
         try:
             red = int(hex_color[0:2], 16)
@@ -33,6 +123,7 @@ class PerKeyRGB:
     
     def clear_key(self, key_index: int):
         """Remove custom color for a specific key."""
+        key_index = self.key_index(key_index)
         if key_index in self.custom_colors:
             del self.custom_colors[key_index]
     
@@ -40,49 +131,35 @@ class PerKeyRGB:
         """Remove all custom colors."""
         self.custom_colors.clear()
     
+    @property
+    def color_correction(self):
+        """rkcu.color.ColorCorrection applied to every packed frame, or None."""
+        return self._packer.correction
+    
+    @color_correction.setter
+    def color_correction(self, correction):
+        self._packer.correction = None if correction is None or correction.is_identity() else correction
+    
     def has_custom_colors(self) -> bool:
         """Check if any custom colors are set."""
         return len(self.custom_colors) > 0
     
     def get_custom_light_buffers(self) -> list:
-        """Generate the custom light mode buffers for the keyboard."""
+        """
+        Generate the custom light mode buffers for the keyboard.
+        The same bytearrays are reused and overwritten by the next call.
+        """
         if not self.has_custom_colors():
             return []
         
-        BUFFER_SIZE = 65
-        CUSTOM_LIGHT_BUFFERS_SIZE = 7
-        
-        led_full_buffer = bytearray(CUSTOM_LIGHT_BUFFERS_SIZE * BUFFER_SIZE)
+        led_buffer = self._packer.led_buffer
+        led_buffer[:] = _BLACK
         
         for key_index, (red, green, blue) in self.custom_colors.items():
             lbi = key_index * 3
-            if lbi + 2 < len(led_full_buffer):
-                led_full_buffer[lbi] = red
-                led_full_buffer[lbi + 1] = green
-                led_full_buffer[lbi + 2] = blue
-        
-        buffers = []
-        led_buffer_index = 0
-        
-        for i in range(CUSTOM_LIGHT_BUFFERS_SIZE):
-            buffer = bytearray(BUFFER_SIZE)
-            buffer[0] = 0x0a
-            buffer[1] = CUSTOM_LIGHT_BUFFERS_SIZE
-            buffer[2] = i + 1
-            
-            if i == 0:
-                buffer[3] = 0x03
-                buffer[4] = 0x7e
-                buffer[5] = 0x01
-                start_index = 6
-            else:
-                start_index = 3
-            
-            for buffer_index in range(start_index, BUFFER_SIZE):
-                if led_buffer_index < len(led_full_buffer):
-                    buffer[buffer_index] = led_full_buffer[led_buffer_index]
-                    led_buffer_index += 1
-            
-            buffers.append(buffer)
+            if lbi + 2 < LED_BUFFER_SIZE:
+                led_buffer[lbi] = red
+                led_buffer[lbi + 1] = green
+                led_buffer[lbi + 2] = blue
         
-        return buffers
\ No newline at end of file
+        return self._packer.pack()
@@ -0,0 +1,329 @@
+"""
+Compact binary per-key profiles.
+
+A profile file holds a 48-byte header, the raw RGB payload and a bitmask of
+which keys are set:
+
+    offset  size  field
+    0       4     magic b'RKCP'
+    4       1     format version (2)
+    5       1     flags (bit 0: per-key colors are set)
+    6       2     LED count, little endian
+    8       16    model name, ASCII, NUL padded
+    24      8     animation, speed, brightness, red, green, blue, rainbow, sleep
+    32      16    color correction: gamma, red, green and blue gain (float32)
+    48      n*3   RGB for LEDs 0..n-1, unset keys black, before correction
+    48+n*3  n/8   set-key bitmask, LSB first
+
+Version 1 files have no color correction field (a 32-byte header) and are
+still read.
+
+The payload has the same layout as the custom light staging buffer, so loading
+is a single copy from the memory-mapped file into the packets.
+
+    python -m rkcu.profile to-binary profile.json profile.rkp
+    python -m rkcu.profile to-json profile.rkp profile.json
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+from typing import Optional
+
+from .color import ColorCorrection
+from .config import Config, get_base_config
+from .enums import Animation, Speed, Brightness, RainbowMode, Sleep
+from .per_key_rgb import PerKeyRGB, PacketPacker, MAX_KEYS
+
+MAGIC = b'RKCP'
+VERSION = 2
+FLAG_CUSTOM = 0x01
+HEADER = struct.Struct('<4sBBH16s8B4f')
+# version 1 header, without color correction
+HEADER_V1 = struct.Struct('<4sBBH16s8B')
+MODEL_SIZE = 16
+
+# mode settings in header order, as named on the command line
+MODE_FIELDS = ('animation', 'speed', 'brightness', 'red', 'green', 'blue', 'rainbow', 'sleep')
+
+def _mask_size(n_leds: int) -> int:
+    return (n_leds + 7) // 8
+
+class Profile:
+    """Mode settings plus raw per-key colors for one keyboard model."""
+
+    def __init__(self, n_leds: int, model: str = '', mode: Optional[bytes] = None,
+                 rgb: Optional[bytes] = None, mask: Optional[bytes] = None,
+                 correction: Optional[ColorCorrection] = None):
+        if not 0 < n_leds <= MAX_KEYS:
+            raise ValueError(f"LED count must be between 1 and {MAX_KEYS}")
+        self.n_leds = n_leds
+        self.model = model
+        self.correction = correction
+        # raw header bytes for the 8 mode settings; see MODE_FIELDS
+        self.mode = bytearray(mode if mode is not None else Profile._default_mode())
+        self.rgb = bytearray(rgb if rgb is not None else n_leds * 3)
+        self.mask = bytearray(mask if mask is not None else _mask_size(n_leds))
+        if len(self.mode) != 8 or len(self.rgb) != n_leds * 3 or len(self.mask) != _mask_size(n_leds):
+            raise ValueError("Profile data does not match its LED count")
+
+    @staticmethod
+    def _mode_bytes(config: Config) -> bytes:
+        return bytes([
+            config.ANIMATION_TYPE.value,
+            config.ANIMATION_SPEED.value,
+            config.ANIMATION_BRIGHTNESS,
+            config.ANIMATION_RED,
+            config.ANIMATION_GREEN,
+            config.ANIMATION_BLUE,
+            config.ANIMATION_RAINBOW.value,
+            config.ANIMATION_SLEEP_DURATION.value,
+        ])
+
+    @staticmethod
+    def _default_mode() -> bytes:
+        # the settings the command line uses when none are given, as with --set-keys-json
+        config = get_base_config()
+        config.update(dict.fromkeys(MODE_FIELDS))
+        return Profile._mode_bytes(config)
+
+    def has_custom_colors(self) -> bool:
+        return any(self.mask)
+
+    def is_set(self, key_index: int) -> bool:
+        return bool(self.mask[key_index >> 3] & (1 << (key_index & 7)))
+
+    def set_key_color(self, key_index: int, red: int, green: int, blue: int):
+        if not 0 <= key_index < self.n_leds:
+            raise ValueError(f"Key index must be between 0 and {self.n_leds - 1}")
+        self.rgb[key_index * 3:key_index * 3 + 3] = bytes((red, green, blue))
+        self.mask[key_index >> 3] |= 1 << (key_index & 7)
+
+    @classmethod
+    def from_config(cls, config: Config, n_leds: int = MAX_KEYS, model: str = '') -> "Profile":
+        profile = cls(n_leds, model, cls._mode_bytes(config), correction=config.PER_KEY_RGB.color_correction)
+        for key_index, color in config.PER_KEY_RGB.custom_colors.items():
+            if key_index < n_leds:
+                profile.set_key_color(key_index, *color)
+        return profile
+
+    def apply_keys(self, per_key_rgb: PerKeyRGB):
+        """Copy the set keys into a PerKeyRGB (or FrameBuffer), leaving other keys untouched."""
+        for key_index in range(self.n_leds):
+            if self.is_set(key_index):
+                lbi = key_index * 3
+                per_key_rgb.set_key_color(key_index, *self.rgb[lbi:lbi + 3])
+
+    def apply_mode(self, config: Config, skip=()):
+        """Copy the mode settings into a config, except the ones named in skip."""
+        animation, speed, brightness, red, green, blue, rainbow, sleep = self.mode
+        values = {
+            'animation': ('ANIMATION_TYPE', Animation(animation)),
+            'speed': ('ANIMATION_SPEED', Speed(speed)),
+            'brightness': ('ANIMATION_BRIGHTNESS', Brightness(brightness).value),
+            'red': ('ANIMATION_RED', red),
+            'green': ('ANIMATION_GREEN', green),
+            'blue': ('ANIMATION_BLUE', blue),
+            'rainbow': ('ANIMATION_RAINBOW', RainbowMode(rainbow)),
+            'sleep': ('ANIMATION_SLEEP_DURATION', Sleep(sleep)),
+        }
+        for name, (attribute, value) in values.items():
+            if name not in skip:
+                setattr(config, attribute, value)
+
+    def to_config(self, per_key_rgb: Optional[PerKeyRGB] = None) -> Config:
+        config = get_base_config()
+        if per_key_rgb is not None:
+            config.PER_KEY_RGB = per_key_rgb
+        self.apply_mode(config)
+        self.apply_keys(config.PER_KEY_RGB)
+        config.PER_KEY_RGB.color_correction = self.correction
+        return config
+
+    def to_bytes(self) -> bytes:
+        model = self.model.encode('ascii', errors='replace')[:MODEL_SIZE]
+        flags = FLAG_CUSTOM if self.has_custom_colors() else 0
+        correction = self.correction or ColorCorrection()
+        header = HEADER.pack(MAGIC, VERSION, flags, self.n_leds, model, *self.mode, correction.gamma, *correction.gain)
+        return header + bytes(self.rgb) + bytes(self.mask)
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def from_buffer(cls, data) -> "Profile":
+        with memoryview(data) as view:
+            n_leds, model, mode, correction, rgb_start, rgb_end, mask_end = _parse(view)
+            return cls(n_leds, model, mode, bytes(view[rgb_start:rgb_end]), bytes(view[rgb_end:mask_end]), correction)
+
+    @classmethod
+    def load(cls, path: str) -> "Profile":
+        with _mapped(path) as data:
+            return cls.from_buffer(data)
+
+    def to_json_dict(self) -> dict:
+        """The --set-keys-json layout (index to hex) plus model and mode entries, which that loader skips."""
+        data = {'model': self.model, 'mode': dict(zip(MODE_FIELDS, self.mode))}
+        if self.correction is not None:
+            data['correction'] = self.correction.to_dict()
+        for key_index in range(self.n_leds):
+            if self.is_set(key_index):
+                data[str(key_index)] = self.rgb[key_index * 3:key_index * 3 + 3].hex()
+        return data
+
+    @classmethod
+    def decode(cls, data: bytes) -> "Profile":
+        """Profile file contents, binary or JSON."""
+        if data[:len(MAGIC)] == MAGIC:
+            return cls.from_buffer(data)
+        try:
+            decoded = json.loads(data)
+        except ValueError:
+            raise ValueError("Not an RKCU profile (neither binary nor JSON)")
+        return cls.from_json_dict(decoded)
+
+    @classmethod
+    def from_json_dict(cls, data: dict, n_leds: Optional[int] = None) -> "Profile":
+        if not isinstance(data, dict):
+            raise ValueError("A JSON profile must be an object of key colors")
+        if 'mapped_keys' in data:
+            raise ValueError("This is a key layout, not a profile")
+        keys = {}
+        for key, value in data.items():
+            try:
+                keys[int(key)] = value
+            except ValueError:
+                continue
+        if not keys and not isinstance(data.get('mode'), dict):
+            raise ValueError("No key colors by LED index or mode settings in the profile")
+        if n_leds is None:
+            n_leds = data.get('n_leds') or max(MAX_KEYS if not keys else max(keys) + 1, 1)
+        profile = cls(n_leds, data.get('model', ''))
+        if isinstance(data.get('correction'), dict):
+            profile.correction = ColorCorrection.from_dict(data['correction'])
+        if isinstance(data.get('mode'), dict):
+            base = dict(zip(MODE_FIELDS, profile.mode))
+            base.update(data['mode'])
+            profile.mode = bytearray(int(base[name]) for name in MODE_FIELDS)
+        for key_index, hex_color in keys.items():
+            hex_color = hex_color.lstrip('#') if isinstance(hex_color, str) else ''
+            if len(hex_color) != 6:
+                raise ValueError(f"Invalid hex color for key {key_index}: {hex_color}")
+            profile.set_key_color(key_index, *bytes.fromhex(hex_color))
+        return profile
+
+class _mapped:
+    """Read-only memory map of a file, usable as a context manager."""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is empty, not an RKCU profile")
+
+    def __enter__(self):
+        return self._map
+
+    def __exit__(self, *exc):
+        self._map.close()
+        self._file.close()
+
+def _parse(view: memoryview):
+    """
+    Validate a profile header; returns (n_leds, model, mode, color correction,
+    start and end of the RGB payload, end of the mask).
+    """
+    if len(view) < HEADER_V1.size:
+        raise ValueError("File is too short to be an RKCU profile")
+    magic, version, flags, n_leds, model, *mode = HEADER_V1.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not an RKCU profile (bad magic)")
+    if version not in (1, VERSION):
+        raise ValueError(f"Unsupported RKCU profile version {version}")
+    if not 0 < n_leds <= MAX_KEYS:
+        raise ValueError(f"Invalid LED count {n_leds} in profile")
+
+    correction = None
+    rgb_start = HEADER_V1.size
+    if version >= 2:
+        if len(view) < HEADER.size:
+            raise ValueError("RKCU profile is truncated")
+        # float32 fields; round off the single precision noise
+        gamma, *gain = (round(value, 6) for value in HEADER.unpack_from(view)[-4:])
+        if gamma != 1.0 or gain != [1.0, 1.0, 1.0]:
+            correction = ColorCorrection(gamma, gain)
+        rgb_start = HEADER.size
+
+    rgb_end = rgb_start + n_leds * 3
+    mask_end = rgb_end + _mask_size(n_leds)
+    if len(view) < mask_end:
+        raise ValueError("RKCU profile is truncated")
+    model = model.rstrip(b'\0').decode('ascii', errors='replace')
+    return n_leds, model, bytes(mode), correction, rgb_start, rgb_end, mask_end
+
+def load_reports(path: str, packer: Optional[PacketPacker] = None) -> list:
+    """
+    Encode a profile file straight into feature reports for RKCU.send_reports.
+    The RGB payload is copied from the memory map into the packets in one step;
+    pass a packer to reuse its buffers between calls.
+    """
+    # views into the map are released by their with blocks, so it can be closed even on errors
+    with _mapped(path) as data, memoryview(data) as view:
+        n_leds, model, mode, correction, rgb_start, rgb_end, mask_end = _parse(view)
+        config = get_base_config()
+        Profile(1, mode=mode).apply_mode(config)
+        report = config.report()
+        if not any(view[rgb_end:mask_end]):
+            return [bytes(report)]
+
+        report[5] = Animation.CUSTOM.value
+        packer = packer or PacketPacker()
+        packer.correction = correction
+        with view[rgb_start:rgb_end] as rgb:
+            return [bytes(report)] + [bytes(b) for b in packer.pack_from(rgb)]
+
+def json_to_binary(json_path: str, binary_path: str, n_leds: Optional[int] = None, model: Optional[str] = None):
+    with open(json_path, 'r', encoding='utf-8') as f:
+        profile = Profile.from_json_dict(json.load(f), n_leds)
+    if model is not None:
+        profile.model = model
+    profile.save(binary_path)
+    return profile
+
+def binary_to_json(binary_path: str, json_path: str):
+    profile = Profile.load(binary_path)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(profile.to_json_dict(), f, indent=2)
+    return profile
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m rkcu.profile', description='Convert RKCU per-key profiles between JSON and binary.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    to_binary = subparsers.add_parser('to-binary', help='Convert a --set-keys-json file to a binary profile')
+    to_binary.add_argument('source')
+    to_binary.add_argument('target')
+    to_binary.add_argument('--leds', type=int, help='LED count (default: highest key index + 1)')
+    to_binary.add_argument('--model', help='Keyboard model name to store in the header')
+
+    to_json = subparsers.add_parser('to-json', help='Convert a binary profile to JSON')
+    to_json.add_argument('source')
+    to_json.add_argument('target')
+
+    args = parser.parse_args()
+    try:
+        if args.command == 'to-binary':
+            profile = json_to_binary(args.source, args.target, args.leds, args.model)
+        else:
+            profile = binary_to_json(args.source, args.target)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Wrote {args.target} ({profile.n_leds} LEDs)")
+
+if __name__ == "__main__":
+    main()
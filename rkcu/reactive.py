@@ -0,0 +1,145 @@
+"""
+Reactive lighting: keys light up when pressed and fade back to black.
+One scheduler thread owns the frame. Key presses only record a deadline in a
+min-heap; every tick the scheduler expires finished keys, recomputes the
+fading ones and submits a single coalesced frame through a FrameWriter, so
+fast typing never creates more than one thread or more than one frame per tick.
+"""
+import heapq
+import threading
+import time
+from typing import Optional, Tuple
+
+from .config import Config, get_base_config
+from .enums import Brightness
+from .per_key_rgb import PerKeyRGB
+from .writer import FrameWriter
+
+class ReactiveLighting:
+    """Lights pressed keys and fades them out, writing at most fps frames per second."""
+
+    def __init__(self, rk, color: Tuple[int, int, int] = (255, 255, 255), hold: float = 0.05, fade: float = 0.3,
+                 fps: float = 60, config: Optional[Config] = None, layout=None, writer: Optional[FrameWriter] = None):
+        if fps <= 0:
+            raise ValueError("FPS must be greater than 0")
+        if hold < 0 or fade < 0:
+            raise ValueError("Hold and fade times can't be negative")
+
+        self.rk = rk
+        self.color = tuple(color)
+        # seconds a key stays at full color, then seconds it takes to fade to black
+        self.hold = hold
+        self.fade = fade
+        self.fps = fps
+        if config is None:
+            config = get_base_config()
+            config.ANIMATION_BRIGHTNESS = Brightness.LEVEL_5.value
+        config.PER_KEY_RGB = PerKeyRGB(layout)
+        self.config = config
+        self.frames = 0
+
+        self._own_writer = writer is None
+        self.writer = writer if writer is not None else FrameWriter(rk)
+        self._cond = threading.Condition()
+        # key index -> (press time, color, generation); a new press of the same key bumps the generation
+        self._active = {}
+        # (end time, generation, key index); entries for keys pressed again since are stale and skipped
+        self._deadlines = []
+        self._generation = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='rkcu-reactive', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def press(self, key, color: Optional[Tuple[int, int, int]] = None):
+        """Light a key (index, or name with a layout); pressing it again restarts its fade."""
+        key_index = self.config.PER_KEY_RGB.key_index(key)
+        color = tuple(color) if color is not None else self.color
+        if not all(0 <= c <= 255 for c in color):
+            raise ValueError("RGB values must be between 0 and 255")
+
+        now = time.perf_counter()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Reactive lighting is stopped")
+            self._generation += 1
+            self._active[key_index] = (now, color, self._generation)
+            heapq.heappush(self._deadlines, (now + self.hold + self.fade, self._generation, key_index))
+            self._cond.notify()
+
+    @property
+    def active_keys(self) -> int:
+        with self._cond:
+            return len(self._active)
+
+    def stop(self):
+        """Stop the scheduler, turning every lit key off."""
+        with self._cond:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+        if self._own_writer:
+            self.writer.close()
+
+    def _level(self, now: float, pressed: float) -> float:
+        elapsed = now - pressed - self.hold
+        if elapsed <= 0:
+            return 1.0
+        if elapsed >= self.fade:
+            return 0.0
+        return 1.0 - elapsed / self.fade
+
+    def _render(self, now: float):
+        """Expire finished keys and draw the rest; called with the lock held."""
+        per_key_rgb = self.config.PER_KEY_RGB
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _, generation, key_index = heapq.heappop(deadlines)
+            entry = self._active.get(key_index)
+            if entry is not None and entry[2] == generation:
+                del self._active[key_index]
+                # faded keys stay set to black so the keyboard stays in custom mode
+                per_key_rgb.set_key_color(key_index, 0, 0, 0)
+
+        for key_index, (pressed, color, _) in self._active.items():
+            level = self._level(now, pressed)
+            per_key_rgb.set_key_color(key_index, *(int(c * level) for c in color))
+
+    def _run(self):
+        period = 1.0 / self.fps
+        next_tick = time.perf_counter()
+        while True:
+            with self._cond:
+                # sleep until a key is pressed; while keys are lit, wake once per tick
+                while not self._active and not self._stopped:
+                    self._cond.wait()
+                    next_tick = time.perf_counter()
+                if self._stopped:
+                    break
+                now = time.perf_counter()
+                while now < next_tick and not self._stopped:
+                    # presses notify too, but only take effect on the next tick
+                    self._cond.wait(next_tick - now)
+                    now = time.perf_counter()
+                if self._stopped:
+                    break
+                self._render(now)
+                self.writer.submit(self.config)
+                self.frames += 1
+            # drop missed ticks instead of bursting to catch up
+            next_tick = max(next_tick + period, now)
+
+        with self._cond:
+            for key_index in self._active:
+                self.config.PER_KEY_RGB.set_key_color(key_index, 0, 0, 0)
+            self._active.clear()
+            self._deadlines.clear()
+            if self.config.PER_KEY_RGB.has_custom_colors():
+                self.writer.submit(self.config)
@@ -0,0 +1,195 @@
+"""
+Shared-memory framebuffer.
+The device owner (rkcud --shm) creates a small memory-mapped file holding one
+frame of key colors. Any local process can map the same file and change
+colors in place; the owner polls a sequence counter and sends the frame when
+it changes, so there is no serialization and no socket round trip per update.
+
+File layout, all little endian:
+
+    offset  size  field
+    0       4     magic b'RKFB'
+    4       1     format version (1)
+    5       1     reserved
+    6       2     LED count
+    8       8     sequence counter
+    16      n*3   RGB for LEDs 0..n-1
+
+Writers take an exclusive flock on the file, make the counter odd, write the
+colors and make it even again. A reader copies the colors between two reads
+of the counter and keeps the copy only when both are the same even value, so
+it never sees half of an update. Writing from another language only needs
+the same steps.
+
+    from rkcu.shm import SharedFrameBuffer
+
+    with SharedFrameBuffer.open() as fb:
+        fb.set_key_color(15, 255, 0, 0)
+        with fb.update() as rgb:        # several keys as one change
+            rgb[0:3] = b'\\x00\\xff\\x00'
+            rgb[3:6] = b'\\x00\\x00\\xff'
+"""
+import contextlib
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+
+from .per_key_rgb import MAX_KEYS
+
+MAGIC = b'RKFB'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHQ')
+SEQ = struct.Struct('<Q')
+SEQ_OFFSET = 8
+# attempts to copy a consistent frame before giving up until the next poll
+READ_ATTEMPTS = 100
+
+def default_shm_path() -> str:
+    """Framebuffer path from $RKCU_SHM, else $XDG_RUNTIME_DIR/rkcu.fb, else /dev/shm/rkcu-<uid>.fb."""
+    if os.environ.get('RKCU_SHM'):
+        return os.environ['RKCU_SHM']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'rkcu.fb')
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else '/tmp'
+    return os.path.join(directory, f'rkcu-{os.getuid()}.fb')
+
+class SharedFrameBuffer:
+    """One frame of key colors in a memory-mapped file, shared between processes."""
+
+    def __init__(self, path: str, fd: int, layout=None):
+        self.path = path
+        self.layout = layout
+        self._fd = fd
+        try:
+            size = os.fstat(fd).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path} is too short to be an RKCU framebuffer")
+            self._map = mmap.mmap(fd, size)
+        except Exception:
+            os.close(fd)
+            raise
+
+        magic, version, _, n_leds, _ = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or not 0 < n_leds <= MAX_KEYS or size < HEADER.size + n_leds * 3:
+            self.close()
+            raise ValueError(f"{path} is not an RKCU framebuffer")
+        self.n_leds = n_leds
+        self.frame_size = n_leds * 3
+        # flock only excludes other processes; threads sharing this object also need a lock
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, path: Optional[str] = None, n_leds: int = MAX_KEYS, mode: int = 0o600) -> "SharedFrameBuffer":
+        """Create (or reset in place) a framebuffer with every key black."""
+        if not 0 < n_leds <= MAX_KEYS:
+            raise ValueError(f"LED count must be between 1 and {MAX_KEYS}")
+        path = path or default_shm_path()
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, mode)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # rewritten in place so processes that already mapped the file keep working
+            os.ftruncate(fd, HEADER.size + n_leds * 3)
+            os.pwrite(fd, HEADER.pack(MAGIC, VERSION, 0, n_leds, 0) + bytes(n_leds * 3), 0)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        except OSError:
+            os.close(fd)
+            raise
+        return cls(path, fd)
+
+    @classmethod
+    def open(cls, path: Optional[str] = None, layout=None) -> "SharedFrameBuffer":
+        """Map an existing framebuffer, e.g. one created by rkcud --shm."""
+        path = path or default_shm_path()
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except OSError as e:
+            raise IOError(f"Could not open framebuffer {path}: {e}")
+        return cls(path, fd, layout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def seq(self) -> int:
+        return SEQ.unpack_from(self._map, SEQ_OFFSET)[0]
+
+    @contextlib.contextmanager
+    def update(self):
+        """Lock the frame and yield a writable view of its RGB bytes; readers see all changes at once."""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                seq = self.seq
+                # a writer that died mid-update leaves the counter odd; carry on from there
+                seq += 1 if seq % 2 == 0 else 0
+                SEQ.pack_into(self._map, SEQ_OFFSET, seq)
+                with memoryview(self._map)[HEADER.size:HEADER.size + self.frame_size] as rgb:
+                    try:
+                        yield rgb
+                    finally:
+                        SEQ.pack_into(self._map, SEQ_OFFSET, seq + 1)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _resolve(self, key) -> int:
+        if isinstance(key, str):
+            if key.strip().isdigit():
+                key = int(key)
+            elif self.layout is None:
+                raise ValueError(f"Key '{key}' can only be set by name with a layout")
+            else:
+                key = self.layout.resolve(key)
+        if not 0 <= key < self.n_leds:
+            raise ValueError(f"Key index must be between 0 and {self.n_leds - 1}")
+        return key
+
+    def set_key_color(self, key, red: int, green: int, blue: int):
+        """Set one key (index, or name with a layout)."""
+        self.set_colors({key: (red, green, blue)})
+
+    def set_colors(self, colors: Dict[object, Tuple[int, int, int]]):
+        """Set several keys as one change."""
+        entries = [(self._resolve(key) * 3, bytes(color)) for key, color in colors.items()]
+        with self.update() as rgb:
+            for offset, color in entries:
+                rgb[offset:offset + 3] = color
+
+    def write(self, frame, offset: int = 0):
+        """Replace the colors of LEDs offset.. with a flat RGB bytes-like frame."""
+        start = offset * 3
+        if start < 0 or start + len(frame) > self.frame_size:
+            raise ValueError(f"Frame doesn't fit in {self.n_leds} LEDs")
+        with self.update() as rgb:
+            rgb[start:start + len(frame)] = frame
+
+    def fill(self, color: Tuple[int, int, int]):
+        self.write(bytes(color) * self.n_leds)
+
+    def read(self, into: bytearray) -> Optional[int]:
+        """
+        Copy a consistent frame into `into` without locking; returns the
+        sequence number it belongs to, or None if writers kept it busy.
+        """
+        end = HEADER.size + self.frame_size
+        for _ in range(READ_ATTEMPTS):
+            seq = self.seq
+            if seq % 2:
+                continue
+            into[:self.frame_size] = self._map[HEADER.size:end]
+            if self.seq == seq:
+                return seq
+        return None
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,83 @@
+"""
+Raw RGB frame streaming.
+Frames of n_leds * 3 bytes (red, green, blue per key, in LED order) are read
+from a binary stream such as stdin, a file or a FIFO directly into the packet
+staging buffer, so no per-key parsing happens, and are handed to a FrameWriter
+as soon as they are complete. A producer that is faster than the keyboard
+only replaces the frame waiting to be written; it never builds up a backlog.
+
+    some-producer | python -m rkcu stream --leds 113
+    mkfifo /tmp/rk.fifo && python -m rkcu stream /tmp/rk.fifo
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import Config, get_base_config
+from .enums import Animation
+from .per_key_rgb import PacketPacker, MAX_KEYS
+from .writer import FrameWriter
+
+@dataclass
+class StreamStats:
+    """Counters of one stream_frames call."""
+    frames: int = 0
+    sent: int = 0
+    # frames replaced by a newer one before they were written
+    coalesced: int = 0
+    # bytes of an incomplete frame at the end of the stream
+    trailing: int = 0
+
+def read_frame(stream, view) -> int:
+    """Fill view from stream; returns the number of bytes read, less than len(view) at the end."""
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+def stream_frames(rk, stream, n_leds: int = MAX_KEYS, config: Optional[Config] = None,
+                  writer: Optional[FrameWriter] = None) -> StreamStats:
+    """
+    Show every complete frame read from a binary stream (or a path) until it
+    ends. Mode settings (brightness, speed, ...) and color correction come
+    from config.
+    """
+    if not 0 < n_leds <= MAX_KEYS:
+        raise ValueError(f"LED count must be between 1 and {MAX_KEYS}")
+    config = config if config is not None else get_base_config()
+    report = config.report()
+    report[5] = Animation.CUSTOM.value
+    report = bytes(report)
+
+    packer = PacketPacker(config.PER_KEY_RGB.color_correction)
+    # frames land straight in the staging buffer; keys past n_leds stay black
+    view = memoryview(packer.led_buffer)[:n_leds * 3]
+    own_writer = writer is None
+    writer = writer if writer is not None else FrameWriter(rk)
+    stats = StreamStats()
+    sent, coalesced, error = writer.sent, writer.coalesced, writer.last_error
+
+    source = open(stream, 'rb', buffering=0) if isinstance(stream, str) else stream
+    try:
+        while True:
+            count = read_frame(source, view)
+            if count < len(view):
+                stats.trailing = count
+                break
+            # the writer keeps the reports until they are sent, so they are copied out of the packets
+            writer.submit_reports([report] + [bytes(buffer) for buffer in packer.pack()])
+            stats.frames += 1
+        writer.flush()
+    finally:
+        if source is not stream:
+            source.close()
+        if own_writer:
+            writer.close()
+        view.release()
+    stats.sent = writer.sent - sent
+    stats.coalesced = writer.coalesced - coalesced
+    if writer.last_error is not error:
+        raise IOError(f"Failed to write frame: {writer.last_error}")
+    return stats
@@ -0,0 +1,315 @@
+"""
+Keyframe timelines.
+A timeline lists keyframes of mode settings and per-key colors at given times.
+Colors are interpolated between keyframes and encoded into feature reports
+ahead of playback, into a ring of a fixed number of frames that the player
+tops up while it waits for the next frame's time. Writes only send bytes on
+schedule, and memory stays the same however long the timeline runs.
+
+    {
+      "fps": 30,
+      "loop": true,
+      "layout": "rk100v2",
+      "keyframes": [
+        {"time": 0, "mode": {"brightness": 5}, "fill": "000000"},
+        {"time": 1, "keys": {"esc": "ff0000", "space": "0000ff"}},
+        {"time": 2, "keys": {"esc": "000000"}, "interpolation": "step"}
+      ]
+    }
+
+Mode settings use the command-line names and carry over to later keyframes
+until changed. A keyframe's colors are exactly the keys it lists ("fill" sets
+every key first); "interpolation" is "linear" (default) or "step" and applies
+to the time leading up to the next keyframe.
+
+    python -m rkcu.timeline show.json
+"""
+import argparse
+import bisect
+import collections
+import json
+import sys
+import threading
+import time
+from typing import Callable, Iterator, List, Union
+
+import numpy as np
+
+from .config import get_base_config
+from .effects import FrameStats
+from .enums import Animation
+from .per_key_rgb import PacketPacker, MAX_KEYS
+from .profile import MODE_FIELDS
+
+INTERPOLATIONS = ('linear', 'step')
+# frames encoded ahead of playback; two seconds at 60 fps
+RING_FRAMES = 120
+
+def _parse_hex(hex_color: str) -> tuple:
+    hex_color = hex_color.lstrip('#')
+    if len(hex_color) != 6:
+        raise ValueError(f"Invalid hex color '{hex_color}'")
+    return tuple(bytes.fromhex(hex_color))
+
+class Keyframe:
+    """Mode report and key colors at one point in time."""
+
+    def __init__(self, time: float, mode: dict, colors: np.ndarray, mask: np.ndarray, interpolation: str = 'linear'):
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Interpolation must be one of {', '.join(INTERPOLATIONS)}")
+        self.time = time
+        self.mode = mode
+        self.colors = colors
+        self.mask = mask
+        self.interpolation = interpolation
+
+        config = get_base_config()
+        config.update(mode)
+        # mode report without per-key colors; frames that set keys switch it to custom
+        self.report = config.report()
+
+class Timeline:
+    """Keyframes sorted by time, rendered to encoded frames with render()."""
+
+    def __init__(self, keyframes: List[Keyframe], fps: float = 30, loop: bool = False):
+        if not keyframes:
+            raise ValueError("A timeline needs at least one keyframe")
+        if fps <= 0:
+            raise ValueError("FPS must be greater than 0")
+        self.keyframes = sorted(keyframes, key=lambda keyframe: keyframe.time)
+        self.times = [keyframe.time for keyframe in self.keyframes]
+        self.fps = fps
+        self.loop = loop
+
+    @property
+    def duration(self) -> float:
+        return self.times[-1]
+
+    @property
+    def frame_count(self) -> int:
+        return int(self.duration * self.fps) + 1
+
+    @classmethod
+    def from_dict(cls, data: dict, n_leds: int = MAX_KEYS) -> "Timeline":
+        layout = None
+        mode = dict.fromkeys(MODE_FIELDS)
+        mode['rainbow'] = False
+        keyframes = []
+        for entry in data.get('keyframes', []):
+            # settings carry over from the previous keyframe
+            mode = dict(mode)
+            for name, value in entry.get('mode', {}).items():
+                if name == 'color':
+                    mode['red'], mode['green'], mode['blue'] = _parse_hex(value)
+                elif name in MODE_FIELDS:
+                    mode[name] = value
+                else:
+                    raise ValueError(f"Unknown mode setting '{name}'")
+
+            colors = np.zeros((n_leds, 3), dtype=np.uint8)
+            mask = np.zeros(n_leds, dtype=bool)
+            if 'fill' in entry:
+                colors[:] = _parse_hex(entry['fill'])
+                mask[:] = True
+            for key, hex_color in entry.get('keys', {}).items():
+                if isinstance(key, str) and not key.isdigit():
+                    if layout is None:
+                        from .layout import load_layout
+                        layout = load_layout(data.get('layout'))
+                    key_index = layout.resolve(key)
+                else:
+                    key_index = int(key)
+                if not 0 <= key_index < n_leds:
+                    raise ValueError(f"Key index {key_index} is out of range")
+                colors[key_index] = _parse_hex(hex_color)
+                mask[key_index] = True
+
+            if 'time' not in entry:
+                raise ValueError("Every keyframe needs a 'time'")
+            keyframes.append(Keyframe(float(entry['time']), mode, colors, mask, entry.get('interpolation', 'linear')))
+        return cls(keyframes, data.get('fps', 30), data.get('loop', False))
+
+    @classmethod
+    def load(cls, path: str) -> "Timeline":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def frame_at(self, t: float):
+        """(mode report, colors, set-key mask) at time t."""
+        index = bisect.bisect_right(self.times, t) - 1
+        if index < 0:
+            index = 0
+        current = self.keyframes[index]
+        if index == len(self.keyframes) - 1 or current.interpolation == 'step' or t <= current.time:
+            return current.report, current.colors, current.mask
+
+        following = self.keyframes[index + 1]
+        alpha = (t - current.time) / (following.time - current.time)
+        colors = current.colors + (following.colors.astype(np.float32) - current.colors) * alpha
+        return current.report, np.rint(colors).astype(np.uint8), current.mask | following.mask
+
+    def render(self) -> Iterator[list]:
+        """
+        Encode the frames one at a time, one list of feature reports per 1/fps
+        seconds. Consecutive identical frames are the same list.
+        """
+        packer = PacketPacker()
+        frame = None
+        previous_key = None
+        for index in range(self.frame_count):
+            report, colors, mask = self.frame_at(index / self.fps)
+            if mask.any():
+                report = bytearray(report)
+                report[5] = Animation.CUSTOM.value
+                # keys without a color are sent black
+                rgb = np.where(mask[:, None], colors, 0).astype(np.uint8).tobytes()
+                frame_key = (bytes(report), rgb)
+            else:
+                frame_key = (bytes(report), None)
+
+            if frame_key != previous_key:
+                if frame_key[1] is None:
+                    frame = [frame_key[0]]
+                else:
+                    frame = [frame_key[0]] + [bytes(b) for b in packer.pack_from(frame_key[1])]
+                previous_key = frame_key
+            yield frame
+
+class TimelinePlayer:
+    """
+    Writes encoded frames at their scheduled times, skipping frames it is too
+    late for. frames is a list of frames, or a function returning a new
+    iterator over them for every pass (like Timeline.render); at most
+    ring_size frames are rendered ahead.
+    """
+
+    def __init__(self, rk, frames: Union[List[list], Callable[[], Iterator[list]]], fps: float,
+                 loop: bool = False, ring_size: int = RING_FRAMES):
+        if not callable(frames) and not frames:
+            raise ValueError("Nothing to play")
+        if ring_size < 1:
+            raise ValueError("The ring needs room for at least one frame")
+        self.rk = rk
+        self.frames = frames
+        self.fps = fps
+        self.loop = loop
+        self.ring_size = ring_size
+        self.stats = FrameStats()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_timeline(cls, rk, timeline: Timeline) -> "TimelinePlayer":
+        return cls(rk, timeline.render, timeline.fps, timeline.loop)
+
+    def _passes(self) -> Iterator[list]:
+        """Every frame to play, over and over when looping."""
+        while True:
+            empty = True
+            for frame in (self.frames() if callable(self.frames) else self.frames):
+                empty = False
+                yield frame
+            if empty or not self.loop:
+                return
+
+    def play(self):
+        """Play once (or until stop() when looping), blocking the caller."""
+        period = 1.0 / self.fps
+        self._stop.clear()
+        source = self._passes()
+        ring = collections.deque()
+
+        def fill(until=None):
+            # render ahead until the ring is full, the frames run out or `until` comes
+            while len(ring) < self.ring_size:
+                if until is not None and time.perf_counter() >= until:
+                    return
+                frame = next(source, None)
+                if frame is None:
+                    return
+                ring.append(frame)
+
+        fill()
+        start = time.perf_counter()
+        index = 0
+        previous = None
+        while not self._stop.is_set():
+            if not ring:
+                fill()
+                if not ring:
+                    break
+
+            frame = ring.popleft()
+            # repeated frames were rendered as the same list; nothing to write
+            if frame is not previous:
+                self.rk.send_reports(frame)
+                previous = frame
+            self.stats.frames += 1
+
+            lateness = time.perf_counter() - (start + (index + 1) * period)
+            if lateness > 0:
+                self.stats.late += 1
+                self.stats.max_lateness = max(self.stats.max_lateness, lateness)
+                # skip the frames whose slot has already passed
+                for _ in range(int(lateness / period)):
+                    if not ring:
+                        fill()
+                        if not ring:
+                            break
+                    ring.popleft()
+                    self.stats.dropped += 1
+                    index += 1
+
+            index += 1
+            due = start + index * period
+            # encode the frames to come while waiting for this one's slot to end
+            fill(due)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+
+    def start(self):
+        """Play on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("Timeline is already playing")
+        self._thread = threading.Thread(target=self.play, name='rkcu-timeline', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m rkcu.timeline', description='Play a keyframe timeline on the keyboard.')
+    parser.add_argument('timeline', help='Timeline JSON file')
+    parser.add_argument('--fps', type=float, help='Override the frame rate of the timeline')
+    parser.add_argument('--loop', action='store_true', help='Loop until interrupted')
+    parser.add_argument('--vid', default='0x258a', help='Keyboard vendor id in hex (default: 0x258a)')
+    parser.add_argument('--pid', default='0x00e0', help='Keyboard product id in hex (default: 0x00e0)')
+    args = parser.parse_args()
+
+    from .utils import RKCU
+
+    try:
+        timeline = Timeline.load(args.timeline)
+        if args.fps:
+            timeline.fps = args.fps
+        rk = RKCU(int(args.vid, 16), int(args.pid, 16))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Playing {timeline.frame_count} frames at {timeline.fps:g} fps")
+    player = TimelinePlayer(rk, timeline.render, timeline.fps, timeline.loop or args.loop)
+    try:
+        player.play()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rk.close_kb()
+    print(f"{player.stats.frames} frames played, {player.stats.dropped} dropped")
+
+if __name__ == "__main__":
+    main()
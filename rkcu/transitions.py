@@ -0,0 +1,145 @@
+"""
+Crossfades between per-key frames.
+A Transition blends from the frame on the keyboard to a target frame over a
+duration, shaped by an easing curve. Keys whose colors already match are left
+alone and the rest are interpolated together in one vectorized lerp per
+frame; frames go out through an EffectEngine, so the keyboard's write cache
+skips every packet whose keys did not change.
+
+    from rkcu.transitions import crossfade
+
+    rk.apply_config(editor_config)
+    crossfade(rk, terminal_config, duration=0.4, current=editor_config)
+"""
+import copy
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from .effects import Effect, EffectEngine, FrameStats
+from .framebuffer import FrameBuffer
+from .per_key_rgb import PerKeyRGB, CUSTOM_LIGHT_BUFFERS_SIZE, MAX_KEYS
+
+DEFAULT_FPS = 30.0
+MAX_FPS = 60.0
+
+def linear(x: float) -> float:
+    return x
+
+def ease_in(x: float) -> float:
+    return x * x
+
+def ease_out(x: float) -> float:
+    return x * (2.0 - x)
+
+def ease_in_out(x: float) -> float:
+    return x * x * (3.0 - 2.0 * x)
+
+def sine(x: float) -> float:
+    return 0.5 - 0.5 * np.cos(np.pi * x)
+
+EASINGS = {
+    'linear': linear,
+    'ease_in': ease_in,
+    'ease_out': ease_out,
+    'ease_in_out': ease_in_out,
+    'sine': sine,
+}
+
+def frame_colors(per_key_rgb: Optional[PerKeyRGB], n_leds: int = MAX_KEYS):
+    """(n_leds, 3) uint8 colors and set-key mask of a PerKeyRGB; None is an empty frame."""
+    colors = np.zeros((n_leds, 3), dtype=np.uint8)
+    mask = np.zeros(n_leds, dtype=bool)
+    if isinstance(per_key_rgb, FrameBuffer):
+        count = min(n_leds, per_key_rgb.n_leds)
+        colors[:count] = per_key_rgb.pixels[:count]
+        mask[:count] = per_key_rgb.mask[:count]
+    elif per_key_rgb is not None:
+        for key_index, color in per_key_rgb.custom_colors.items():
+            if key_index < n_leds:
+                colors[key_index] = color
+                mask[key_index] = True
+    return colors, mask
+
+def sustainable_fps(rk, default: float = DEFAULT_FPS, ceiling: float = MAX_FPS) -> float:
+    """
+    Frame rate the keyboard can keep up with, from the write latencies it has
+    seen so far: one mode report plus every per-key packet per frame.
+    """
+    metrics = getattr(rk, 'metrics', None)
+    if metrics is None:
+        return default
+    latency = metrics.snapshot()
+    mode, per_key = latency['mode']['latency_seconds'], latency['per_key']['latency_seconds']
+    if not per_key['count']:
+        return default
+    frame_seconds = per_key['sum'] / per_key['count'] * CUSTOM_LIGHT_BUFFERS_SIZE
+    if mode['count']:
+        frame_seconds += mode['sum'] / mode['count']
+    if frame_seconds <= 0:
+        return ceiling
+    return min(ceiling, 1.0 / frame_seconds)
+
+class Transition(Effect):
+    """Blends one per-key frame into another over duration seconds."""
+
+    def __init__(self, source: Optional[PerKeyRGB], target: Optional[PerKeyRGB], duration: float = 0.5,
+                 easing: Union[str, Callable[[float], float]] = 'ease_in_out', n_leds: int = MAX_KEYS):
+        if duration < 0:
+            raise ValueError("Duration can't be negative")
+        if isinstance(easing, str):
+            if easing not in EASINGS:
+                raise ValueError(f"Easing must be one of {', '.join(EASINGS)}")
+            easing = EASINGS[easing]
+        self.duration = duration
+        self.easing = easing
+
+        source_colors, source_mask = frame_colors(source, n_leds)
+        self.target, self.target_mask = frame_colors(target, n_leds)
+        self.source = source_colors
+        # keys set in either frame stay set while fading; keys only in the source fade to black
+        self.mask = source_mask | self.target_mask
+        self.changed = np.flatnonzero((source_colors != self.target).any(axis=1))
+        self._start = source_colors[self.changed].astype(np.float32)
+        self._delta = self.target[self.changed].astype(np.float32) - self._start
+
+    @property
+    def keys_changed(self) -> int:
+        return len(self.changed)
+
+    def start(self, frame: FrameBuffer):
+        count = min(frame.n_leds, len(self.source))
+        frame.pixels[:count] = self.source[:count]
+        frame.mask[:count] = self.mask[:count]
+
+    def render(self, frame: FrameBuffer, t: float):
+        if t >= self.duration:
+            frame.pixels[self.changed] = self.target[self.changed]
+            frame.mask[:] = self.target_mask[:frame.n_leds]
+            return
+        level = self.easing(t / self.duration)
+        frame.pixels[self.changed] = np.rint(self._start + self._delta * level)
+
+def crossfade(rk, target, duration: float = 0.5, easing: Union[str, Callable[[float], float]] = 'ease_in_out',
+              current=None, fps: Optional[float] = None) -> FrameStats:
+    """
+    Fade the keyboard from `current` (the Config or PerKeyRGB last applied;
+    None means no per-key colors) to the target Config, blocking until done.
+    Frames are sent at fps, by default the rate the keyboard has sustained so
+    far, dropping frames rather than running over. The target config is
+    applied unchanged at the end.
+    """
+    source = getattr(current, 'PER_KEY_RGB', current)
+    per_key_rgb = target.PER_KEY_RGB
+    transition = Transition(source, per_key_rgb, duration, easing)
+    if transition.keys_changed and duration > 0:
+        frame = FrameBuffer(layout=per_key_rgb.layout)
+        frame.color_correction = per_key_rgb.color_correction
+        # the engine draws into its own frame, so the caller's config is left as it is
+        engine = EffectEngine(rk, transition, fps or sustainable_fps(rk), copy.copy(target), frame)
+        engine.run(duration)
+        stats = engine.stats
+    else:
+        stats = FrameStats()
+    rk.apply_config(target)
+    return stats
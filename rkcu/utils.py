@@ -1,13 +1,63 @@
-import hid
+import threading
+import time
+
+from . import cache
+from .backends import HidBackend
 from .config import Config
+from .metrics import TransportMetrics
 
 # utility class for RK Color Utility
 class RKCU:
-    def __init__(self, vid, pid):
-        self.device = self.find_kb_hid(vid, pid)
+    def __init__(self, vid, pid, serial=None, use_cache=True, path=None, backend=None):
+        # where devices are found and opened; HidBackend unless e.g. a SimulatedBackend is given
+        self.backend = backend if backend is not None else HidBackend()
+        self.vid, self.pid, self.serial = vid, pid, serial
+        self.use_cache = use_cache
+        self.path = path
+        # set while the device was opened from the path cache rather than found by enumeration
+        self._cached_key = None
+        if path is not None:
+            # a specific interface, e.g. one of several boards found by find_kb_interfaces
+            self.device = self._open_path(path)
+        else:
+            self.device = self.open_kb_hid(vid, pid, serial, use_cache)
+        # last bytes successfully sent for each report, keyed by its 3-byte header
+        self._sent_reports = {}
+        # serializes writes so reports from different threads never interleave
+        self._lock = threading.Lock()
+        self.metrics = TransportMetrics()
     
-    def find_kb_hid(self, vid, pid):
-        rk_devices = hid.enumerate(vid, pid)
+    def open_kb_hid(self, vid, pid, serial=None, use_cache=True):
+        """Open the configuration interface, trying the cached path before enumerating."""
+        use_cache = use_cache and self.backend.cache_paths
+        if use_cache:
+            entry = cache.load_hid_path(vid, pid, serial)
+            if entry is not None:
+                device = self._open_cached(entry)
+                if device is not None:
+                    self._cached_key = (vid, pid, serial)
+                    return device
+                cache.forget_hid_path(vid, pid, serial)
+
+        self._cached_key = None
+        target_interface = self.find_kb_interface(vid, pid, serial)
+        device = self._open_path(target_interface['path'])
+        if use_cache:
+            cache.store_hid_path(
+                vid, pid, serial, target_interface['path'],
+                target_interface.get('product_string'), target_interface.get('serial_number'),
+                target_interface.get('interface_number'), target_interface.get('usage_page'),
+            )
+        return device
+
+    def find_kb_hid(self, vid, pid, serial=None):
+        return self._open_path(self.find_kb_interface(vid, pid, serial)['path'])
+
+    def find_kb_interface(self, vid, pid, serial=None):
+        """Enumerate HID interfaces and return the info dict of the keyboard's configuration interface."""
+        rk_devices = self.backend.enumerate(vid, pid)
+        if serial:
+            rk_devices = [d for d in rk_devices if d.get('serial_number') == serial]
         if not rk_devices:
             raise IOError("RK keyboard not found. Please check VID and PID.")
 
@@ -32,32 +82,154 @@ class RKCU:
         if not target_interface:
             raise IOError("Could not find the configuration interface (usage_page=65280) for the keyboard.")
         
+        return target_interface
+
+    @staticmethod
+    def find_kb_interfaces(vid, pid, backend=None):
+        """Enumerate HID interfaces and return one configuration interface info dict per attached keyboard."""
+        backend = backend if backend is not None else HidBackend()
+        config_interfaces = [d for d in backend.enumerate(vid, pid) if d.get('usage_page', 0) == 65280]
+
+        def path_str(device_info):
+            path = device_info['path']
+            return path.decode('utf-8', errors='ignore') if isinstance(path, bytes) else str(path)
+
+        # on Windows every board exposes exactly one Col05 collection
+        col05 = [d for d in config_interfaces if 'Col05' in path_str(d)]
+        if col05:
+            return col05
+
+        # elsewhere every interface has its own path, and one board may expose several
+        # configuration interfaces; boards are told apart by serial number, keeping the
+        # first interface of each the way find_kb_interface does for a single board
+        boards = {}
+        unidentified = []
+        for device_info in config_interfaces:
+            serial = device_info.get('serial_number')
+            if serial:
+                boards.setdefault((device_info.get('vendor_id'), device_info.get('product_id'), serial), device_info)
+            else:
+                unidentified.append(device_info)
+
+        if unidentified:
+            # without a serial number only the interface number is comparable across boards:
+            # take the interface number find_kb_interface would use on every board
+            interface = unidentified[0].get('interface_number')
+            for device_info in unidentified:
+                if device_info.get('interface_number') == interface:
+                    boards.setdefault((device_info.get('vendor_id'), device_info.get('product_id'), device_info['path']), device_info)
+        return list(boards.values())
+
+    def _open_path(self, path):
         try:
-            path = target_interface['path']
-            h = hid.device()
-            h.open_path(path)
-            return h
+            return self.backend.open_path(path)
         except Exception as e:
             raise IOError(f"Could not open the keyboard configuration interface: {e}")
-    
-    def apply_config(self, config: Config):
-        data_to_send = config.report()
+
+    def _open_cached(self, entry):
+        # a stale path may now belong to another device, or to another interface of the same
+        # keyboard (hidraw nodes are renumbered on replug), so check both before using it
+        info = self.backend.interface_info(entry['path'])
+        if info is not None and (info.get('interface_number') != entry.get('interface_number')
+                                 or entry.get('usage_page') not in info.get('usage_pages', ())):
+            return None
         try:
-            result = self.device.send_feature_report(bytes(data_to_send))
-            if result != len(data_to_send):
-                raise IOError(f"Failed to send complete config. Expected {len(data_to_send)} bytes, sent {result}")
-        except Exception as e:
-            raise IOError(f"Failed to send config to keyboard: {e}")
-        
-        # Send per-key RGB buffers if they exist
-        custom_buffers = config.get_custom_light_buffers()
-        for buffer in custom_buffers:
+            h = self.backend.open_path(entry['path'])
+        except Exception:
+            return None
+        try:
+            if entry.get('product') and h.get_product_string() != entry['product']:
+                raise IOError("product changed")
+            if entry.get('serial') and h.get_serial_number_string() != entry['serial']:
+                raise IOError("serial number changed")
+            return h
+        except Exception:
             try:
-                result = self.device.send_feature_report(bytes(buffer))
-                if result != len(buffer):
-                    raise IOError(f"Failed to send complete custom RGB buffer. Expected {len(buffer)} bytes, sent {result}")
-            except Exception as e:
-                raise IOError(f"Failed to send custom RGB buffer to keyboard: {e}")
+                h.close()
+            except Exception:
+                pass
+            return None
     
+    def apply_config(self, config: Config, force: bool = False):
+        """Send a config, skipping reports identical to the last ones sent unless force is set."""
+        self.send_reports([config.report()] + config.get_custom_light_buffers(), force)
+
+    def send_reports(self, reports: list, force: bool = False):
+        """Send an encoded mode report followed by any per-key RGB buffers."""
+        with self._lock:
+            try:
+                self._send_reports(reports, force)
+            except IOError:
+                if self._cached_key is None:
+                    raise
+                # the cached path opened but may not be the configuration interface;
+                # find the interface again and send everything once more
+                self._reopen()
+                self._send_reports(reports, True)
+
+    def _send_reports(self, reports: list, force: bool):
+        if len(reports) == 1:
+            # the keyboard left custom mode, so its per-key state is unknown again
+            self._forget_custom_buffers()
+
+        for report in reports:
+            if report[1] == 0x01:
+                self._send_report(report, "config", "mode", force)
+            else:
+                self._send_report(report, "custom RGB buffer", "per_key", force)
+
+    def reopen(self):
+        """Close the device and open it again, enumerating instead of trusting the path cache."""
+        with self._lock:
+            self._reopen()
+
+    def _reopen(self):
+        try:
+            self.device.close()
+        except Exception:
+            pass
+        self._sent_reports.clear()
+        if self.path is not None:
+            self.device = self._open_path(self.path)
+            return
+        if self.use_cache and self.backend.cache_paths:
+            cache.forget_hid_path(self.vid, self.pid, self.serial)
+        self.device = self.open_kb_hid(self.vid, self.pid, self.serial, self.use_cache)
+
+    def invalidate_cache(self):
+        """Forget what was last sent so the next apply_config resends everything."""
+        with self._lock:
+            self._sent_reports.clear()
+
+    def _send_report(self, report, name: str, kind: str, force: bool):
+        data = bytes(report)
+        key = data[:3]
+        if not force and self._sent_reports.get(key) == data:
+            self.metrics.record_skip(kind)
+            return False
+
+        # drop the cached copy first so a failed write is retried next time
+        self._sent_reports.pop(key, None)
+        start = time.perf_counter()
+        try:
+            result = self.device.send_feature_report(data)
+        except Exception as e:
+            self.metrics.record_error(kind, time.perf_counter() - start)
+            raise IOError(f"Failed to send {name} to keyboard: {e}")
+
+        elapsed = time.perf_counter() - start
+        if result != len(data):
+            self.metrics.record_error(kind, elapsed, result)
+            raise IOError(f"Short write of {name}: expected {len(data)} bytes, sent {result}")
+        self.metrics.record_write(kind, result, elapsed)
+
+        self._sent_reports[key] = data
+        return True
+
+    def _forget_custom_buffers(self):
+        # per-key buffers are the only reports not using the 0x0a 0x01 header
+        for key in [key for key in self._sent_reports if key[1] != 0x01]:
+            del self._sent_reports[key]
+
     def close_kb(self):
         self.device.close()
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Single writer thread for an RKCU device.
+Frames submitted from any thread are encoded immediately and sent by one
+background thread; a frame that is still waiting when a newer one arrives is
+replaced, so the keyboard always catches up to the latest state.
+"""
+import threading
+from typing import Callable, Optional
+
+from .config import Config
+
+class FrameWriter:
+    """Latest-wins frame queue in front of an RKCU device."""
+
+    def __init__(self, rk, on_error: Optional[Callable[[Exception], None]] = None):
+        self.rk = rk
+        self.on_error = on_error
+        self.last_error = None
+        self.sent = 0
+        # frames replaced by a newer one before they were sent
+        self.coalesced = 0
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='rkcu-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, config: Config, force: bool = False):
+        """Queue a config; it is encoded now, so the caller may keep changing it."""
+        reports = [bytes(config.report())] + [bytes(b) for b in config.get_custom_light_buffers()]
+        self.submit_reports(reports, force)
+
+    def submit_reports(self, reports: list, force: bool = False):
+        """Queue already-encoded reports (mode report first, then any per-key buffers)."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Frame writer is closed")
+            if self._pending is not None:
+                self.coalesced += 1
+                # a forced frame stays forced even if a newer frame replaces it
+                force = force or self._pending[1]
+            self._pending = (reports, force)
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted frame has been written; returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def close(self):
+        """Write any pending frame, then stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                reports, force = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                self.rk.send_reports(reports, force)
+                self.sent += 1
+            except Exception as e:
+                self.last_error = e
+                if self.on_error is not None:
+                    self.on_error(e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -31,6 +31,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/gagan16k/rkcu",
     packages=find_packages(),
+    package_data={"rkcu": ["layouts/*.json"]},
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: End Users/Desktop",
@@ -50,6 +51,13 @@ setup(
         "hidapi>=0.10.1",
     ],
     extras_require={
+        "numpy": [
+            "numpy>=1.17",
+        ],
+        "images": [
+            "numpy>=1.17",
+            "Pillow>=8.0",
+        ],
         "dev": [
             "pytest>=6.0",
             "black>=21.0.0",
@@ -59,6 +67,7 @@ setup(
     entry_points={
         "console_scripts": [
             "rkcu=rkcu.__main__:main",
+            "rkcud=rkcu.daemon:main",
         ],
     },
     keywords="royal kludge keyboard rgb lighting config utility",
@@ -0,0 +1,21 @@
+import pytest
+
+from rkcu import RKCU, SimulatedBackend
+
+
+@pytest.fixture
+def backend():
+    return SimulatedBackend()
+
+
+@pytest.fixture
+def rk(backend):
+    # use_cache=False keeps the tests away from the HID path cache in the user's cache directory
+    device = RKCU(0x258a, 0x00e0, use_cache=False, backend=backend)
+    yield device
+    device.close_kb()
+
+
+@pytest.fixture
+def device(backend, rk):
+    return backend.devices[0]
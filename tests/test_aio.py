@@ -0,0 +1,61 @@
+import asyncio
+
+from rkcu import SimulatedBackend, get_base_config
+from rkcu.aio import AsyncRKCU
+
+
+def red_frame(red):
+    config = get_base_config()
+    config.ANIMATION_RED = red
+    return config
+
+
+def open_keyboard(backend):
+    return AsyncRKCU.open(0x258a, 0x00e0, use_cache=False, backend=backend)
+
+
+def test_stream_pulls_a_frame_only_after_the_last_is_written():
+    backend = SimulatedBackend(latency=0.005)
+    device = backend.devices[0]
+    written_before_pull = []
+
+    async def frames():
+        for red in range(5):
+            written_before_pull.append(device.writes)
+            yield red_frame(red)
+
+    async def main():
+        async with await open_keyboard(backend) as keyboard:
+            return await keyboard.stream(frames())
+
+    assert asyncio.run(main()) == 5
+    # every frame is one mode report, and the producer never got ahead of the keyboard
+    assert written_before_pull == [0, 1, 2, 3, 4]
+    assert device.config().ANIMATION_RED == 4
+
+
+def test_stream_spaces_frames_at_fps():
+    backend = SimulatedBackend()
+
+    async def main():
+        async with await open_keyboard(backend) as keyboard:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            count = await keyboard.stream([red_frame(red) for red in range(4)], fps=50)
+            return count, loop.time() - start
+
+    count, elapsed = asyncio.run(main())
+    assert count == 4
+    # three gaps of 20 ms between four frames
+    assert elapsed >= 0.055
+
+
+def test_writes_keep_submission_order():
+    backend = SimulatedBackend(latency=0.002)
+
+    async def main():
+        async with await open_keyboard(backend) as keyboard:
+            await asyncio.gather(*(keyboard.apply_config(red_frame(red)) for red in range(10)))
+
+    asyncio.run(main())
+    assert backend.devices[0].config().ANIMATION_RED == 9
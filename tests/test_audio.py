@@ -0,0 +1,41 @@
+import struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from rkcu.audio import PCMSource
+
+
+class ChunkedStream:
+    """Returns the data in the given chunk sizes, like a pipe delivering partial reads."""
+
+    def __init__(self, data: bytes, sizes):
+        self.data = data
+        self.sizes = list(sizes)
+
+    def read(self, size):
+        count = min(size, self.sizes.pop(0) if self.sizes else size)
+        chunk, self.data = self.data[:count], self.data[count:]
+        return chunk
+
+
+def test_partial_samples_carry_over():
+    samples = [0, 16384, -16384, 32767, -32768, 8192]
+    data = struct.pack('<6h', *samples)
+    blocks = list(PCMSource(ChunkedStream(data, [3, 1, 5, 3]), block=4).blocks())
+    decoded = np.concatenate(blocks)
+    assert np.allclose(decoded, np.array(samples) / 32768)
+
+
+def test_stereo_frames_split_between_channels():
+    # left/right pairs averaged to mono
+    data = struct.pack('<4h', 16384, 0, 0, -16384)
+    blocks = list(PCMSource(ChunkedStream(data, [2, 4, 2]), channels=2, block=2).blocks())
+    assert np.allclose(np.concatenate(blocks), [0.25, -0.25])
+
+
+def test_trailing_odd_byte_is_dropped():
+    data = struct.pack('<2h', 100, 200) + b'\x01'
+    blocks = list(PCMSource(ChunkedStream(data, [5]), block=4).blocks())
+    assert np.allclose(np.concatenate(blocks), np.array([100, 200]) / 32768)
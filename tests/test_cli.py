@@ -0,0 +1,82 @@
+import sys
+
+import pytest
+
+from rkcu import __main__ as cli
+
+
+def run(monkeypatch, capsys, *argv):
+    monkeypatch.setattr(sys, 'argv', ['rkcu', '--simulate'] + list(argv))
+    cli.main()
+    return capsys.readouterr().out
+
+
+def test_simulated_apply(monkeypatch, capsys):
+    out = run(monkeypatch, capsys, '--brightness', '3', '--set-key', '15:ff0000')
+    assert 'brightness=3' in out
+    assert 'key 15: #ff0000' in out
+
+
+def test_arguments_are_parsed_once(monkeypatch, capsys):
+    calls = []
+    parse_args = cli.argparse.ArgumentParser.parse_args
+
+    def counting_parse_args(self, *args, **kwargs):
+        calls.append(self.prog)
+        return parse_args(self, *args, **kwargs)
+
+    monkeypatch.setattr(cli.argparse.ArgumentParser, 'parse_args', counting_parse_args)
+    run(monkeypatch, capsys, '--color', '00ff00')
+    assert len(calls) == 1
+
+
+def test_profile_load_error_exits(monkeypatch, capsys, tmp_path):
+    monkeypatch.setenv('RKCU_CACHE_DIR', str(tmp_path))
+    layout = tmp_path / 'keyboard_mapping.json'
+    layout.write_text('{"keyboard": "test", "mapped_keys": {"esc": 0}}')
+    with pytest.raises(SystemExit) as exit_info:
+        run(monkeypatch, capsys, '--profile', str(layout))
+    assert exit_info.value.code == 1
+    out = capsys.readouterr().out
+    assert 'Error loading profile: This is a key layout' in out
+    assert 'applied' not in out
+
+
+def test_json_profile_uses_cli_defaults(monkeypatch, capsys, tmp_path):
+    monkeypatch.setenv('RKCU_CACHE_DIR', str(tmp_path))
+    profile = tmp_path / 'red.json'
+    profile.write_text('{"15": "ff0000"}')
+    out = run(monkeypatch, capsys, '--profile', str(profile))
+    assert 'brightness=5' in out
+    assert 'sleep=sleep_never' in out
+    assert 'key 15: #ff0000' in out
+
+
+def test_cached_profile_is_not_decoded(monkeypatch, capsys, tmp_path):
+    from rkcu.compiled import ProfileCache
+    from rkcu.profile import Profile
+
+    monkeypatch.setenv('RKCU_CACHE_DIR', str(tmp_path))
+    profile = tmp_path / 'red.json'
+    profile.write_text('{"15": "ff0000"}')
+    first = run(monkeypatch, capsys, '--profile', str(profile))
+    # the first use compiled the profile
+    assert len(ProfileCache().entries()) == 1
+
+    def refuse(data):
+        raise AssertionError("decoded a cached profile")
+    monkeypatch.setattr(Profile, 'decode', refuse)
+    second = run(monkeypatch, capsys, '--profile', str(profile))
+    assert 'Loaded compiled profile' in second
+    assert second.split('Simulated keyboard')[1] == first.split('Simulated keyboard')[1]
+
+
+def test_set_key_by_index_and_name(monkeypatch, capsys, tmp_path):
+    keys = tmp_path / 'keys.json'
+    keys.write_text('{" 20 ": "00ff00", "esc": "0000ff"}')
+    out = run(monkeypatch, capsys, '--set-key', '15:ff0000', '--set-key', '1:ffffff', '--set-keys-json', str(keys))
+    assert 'key 15: #ff0000' in out
+    # "1" is LED 1, not the digit key
+    assert 'key 1: #ffffff' in out
+    assert 'key 20: #00ff00' in out
+    assert 'key 0: #0000ff' in out
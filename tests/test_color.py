@@ -0,0 +1,105 @@
+import json
+import threading
+
+import pytest
+
+from rkcu import PerKeyRGB, SimulatedBackend
+from rkcu.color import ColorCorrection
+from rkcu.daemon import RKCUClient, RKCUDaemon
+from rkcu.layout import Layout
+from rkcu.per_key_rgb import PacketPacker
+
+
+def test_identity_leaves_colors_unchanged():
+    correction = ColorCorrection(1.0, (1.0, 1.0, 1.0))
+    assert correction.is_identity()
+    assert all(table == bytes(range(256)) for table in correction.tables)
+
+    rgb = bytes(range(256)) * 2
+    assert [bytes(b) for b in PacketPacker(correction).pack_from(rgb)] == \
+        [bytes(b) for b in PacketPacker().pack_from(rgb)]
+
+
+def test_known_values():
+    correction = ColorCorrection(2.0, (1.0, 0.5, 0.0))
+    assert correction.correct(0, 0, 0) == (0, 0, 0)
+    assert correction.correct(255, 255, 255) == (255, 128, 0)
+    # 255 * (128 / 255) ** 2 = 64.25
+    assert correction.correct(128, 128, 128) == (64, 32, 0)
+
+
+def test_packing_corrects_without_changing_stored_colors():
+    rgb = PerKeyRGB()
+    rgb.set_key_color(0, 128, 128, 128)
+    rgb.color_correction = ColorCorrection(2.0, (1.0, 1.0, 0.5))
+    packet = rgb.get_custom_light_buffers()[0]
+    assert tuple(packet[6:9]) == (64, 64, 32)
+    assert rgb.custom_colors[0] == (128, 128, 128)
+
+
+def test_identity_is_stored_as_none():
+    rgb = PerKeyRGB()
+    rgb.color_correction = ColorCorrection()
+    assert rgb.color_correction is None
+
+
+@pytest.mark.parametrize('gamma, gain', [(0, '1,1,1'), (1, '1,1'), (1, '1,2,1'), (1, 'a,b,c')])
+def test_invalid_values(gamma, gain):
+    with pytest.raises(ValueError):
+        ColorCorrection.parse(gamma, gain)
+
+
+def test_layout_default(tmp_path):
+    path = tmp_path / 'layout.json'
+    path.write_text(json.dumps({
+        'keyboard': 'test',
+        'mapped_keys': {'esc': 0},
+        'color_correction': {'gamma': 2.2, 'gain': [1, 0.9, 0.8]},
+    }))
+    layout = Layout.from_file(str(path))
+    assert layout.correction == ColorCorrection(2.2, (1, 0.9, 0.8))
+    assert PerKeyRGB(layout).color_correction == layout.correction
+
+
+def test_daemon_applies_requested_correction(tmp_path):
+    daemon = RKCUDaemon(0x258a, 0x00e0, str(tmp_path / 'rkcud.sock'), SimulatedBackend(),
+                        ColorCorrection(1.0, (1.0, 1.0, 0.5)))
+    try:
+        daemon.handle({'cmd': 'apply', 'settings': {}, 'keys': {'0': '808080'}})
+        assert daemon.rk.device.key_color(0) == (128, 128, 64)
+
+        daemon.handle({'cmd': 'apply', 'settings': {}, 'keys': {'0': '808080'},
+                       'correction': {'gamma': 2.0, 'gain': [1, 1, 1]}})
+        assert daemon.rk.device.key_color(0) == (64, 64, 64)
+    finally:
+        daemon.rk.close_kb()
+
+
+def test_via_daemon_forwards_correction(tmp_path, monkeypatch, capsys):
+    from rkcu import __main__ as cli
+
+    socket_path = str(tmp_path / 'rkcud.sock')
+    daemon = RKCUDaemon(0x258a, 0x00e0, socket_path, SimulatedBackend())
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    try:
+        for _ in range(100):
+            try:
+                RKCUClient(socket_path).close()
+                break
+            except IOError:
+                threading.Event().wait(0.01)
+        monkeypatch.setattr('sys.argv', ['rkcu', '--via-daemon', socket_path, '--set-key', '0:808080', '--gamma', '2'])
+        cli.main()
+        assert 'Configuration sent to rkcud' in capsys.readouterr().out
+        assert daemon.rk.device.key_color(0) == (64, 64, 64)
+    finally:
+        daemon.shutdown()
+        thread.join()
+
+
+def test_tables_are_shared():
+    correction = ColorCorrection(2.2, (1, 0.9, 0.8))
+    assert correction.tables is ColorCorrection(2.2, [1, 0.9, 0.8]).tables
+    assert correction.correct(128, 128, 128) == tuple(
+        round(255 * gain * (128 / 255) ** 2.2) for gain in (1, 0.9, 0.8))
@@ -0,0 +1,79 @@
+import pytest
+
+from rkcu import SimulatedBackend, get_base_config
+from rkcu.daemon import RKCUDaemon
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = RKCUDaemon(0x258a, 0x00e0, str(tmp_path / 'rkcud.sock'), SimulatedBackend())
+    yield daemon
+    daemon.rk.close_kb()
+
+
+def test_set_keys(daemon):
+    response = daemon.handle({'cmd': 'set_keys', 'keys': {'15': 'ff0000', '16': '00ff00'}})
+    assert response == {'ok': True, 'custom_keys': 2}
+    assert daemon.rk.device.key_color(16) == (0, 255, 0)
+
+    daemon.handle({'cmd': 'set_keys', 'clear': ['15']})
+    assert daemon.config.PER_KEY_RGB.custom_colors == {16: (0, 255, 0)}
+
+
+@pytest.mark.parametrize('request_', [
+    {'cmd': 'set_keys', 'keys': {'15': 'ff0000', '16': 'nothex'}},
+    {'cmd': 'set_keys', 'keys': {'15': 'ff0000', '999': '00ff00'}},
+    {'cmd': 'set_keys', 'keys': {'15': 'ff0000'}, 'clear': ['esc']},
+])
+def test_invalid_set_keys_changes_nothing(daemon, request_):
+    daemon.handle({'cmd': 'set_keys', 'keys': {'20': '0000ff'}})
+    with pytest.raises(ValueError):
+        daemon.handle(request_)
+    assert daemon.config.PER_KEY_RGB.custom_colors == {20: (0, 0, 255)}
+
+
+def test_apply_replaces_config(daemon):
+    daemon.handle({'cmd': 'set_keys', 'keys': {'20': '0000ff'}})
+    daemon.handle({'cmd': 'apply', 'settings': {'brightness': 3}, 'keys': {'1': '010203'}})
+    assert daemon.config.PER_KEY_RGB.custom_colors == {1: (1, 2, 3)}
+    assert daemon.config.ANIMATION_BRIGHTNESS == 3
+
+
+def test_via_daemon_sends_profile_mode(tmp_path, monkeypatch, capsys):
+    import threading
+
+    from rkcu import __main__ as cli
+    from rkcu.daemon import RKCUClient
+    from rkcu.profile import Profile
+
+    config = get_base_config()
+    config.update({'animation': 'breathing', 'speed': 2, 'brightness': 3, 'sleep': 1,
+                   'red': 10, 'green': 20, 'blue': 30, 'rainbow': False})
+    profile_path = str(tmp_path / 'p.rkp')
+    Profile.from_config(config).save(profile_path)
+
+    monkeypatch.setenv('RKCU_CACHE_DIR', str(tmp_path / 'cache'))
+    socket_path = str(tmp_path / 'rkcud.sock')
+    daemon = RKCUDaemon(0x258a, 0x00e0, socket_path, SimulatedBackend())
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    try:
+        for _ in range(100):
+            try:
+                RKCUClient(socket_path).close()
+                break
+            except IOError:
+                threading.Event().wait(0.01)
+        monkeypatch.setattr('sys.argv', ['rkcu', '--via-daemon', socket_path, '--profile', profile_path, '--speed', '4'])
+        cli.main()
+        assert 'Configuration sent to rkcud' in capsys.readouterr().out
+        state = daemon.rk.device.config()
+        assert state.ANIMATION_TYPE.name == 'BREATHING'
+        # the command line still wins over the profile
+        assert state.ANIMATION_SPEED.value == 4
+        assert state.ANIMATION_BRIGHTNESS == 3
+        assert state.ANIMATION_SLEEP_DURATION.value == 1
+        assert (state.ANIMATION_RED, state.ANIMATION_GREEN, state.ANIMATION_BLUE) == (10, 20, 30)
+    finally:
+        daemon.shutdown()
+        thread.join()
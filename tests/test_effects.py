@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from rkcu.effects import EffectEngine, RainbowWave, Ripple
+from rkcu.framebuffer import FrameBuffer
+from rkcu.geometry import load_geometry
+
+
+@pytest.fixture
+def geometry():
+    return load_geometry()
+
+
+def test_rainbow_wave_without_geometry(rk, device):
+    engine = EffectEngine(rk, RainbowWave(), fps=200)
+    engine.run(duration=0.05)
+    assert engine.stats.frames > 0
+    assert engine.frame.pixels.any(axis=1).all()
+
+
+@pytest.mark.parametrize('make_effect', [
+    lambda geometry: RainbowWave(geometry=geometry),
+    lambda geometry: Ripple(geometry, center=0),
+])
+def test_effects_run_under_the_default_engine(rk, device, geometry, make_effect):
+    engine = EffectEngine(rk, make_effect(geometry), fps=200)
+    engine.run(duration=0.05)
+    assert engine.stats.frames > 0
+    assert device.mode_report is not None
+    # the frame is larger than the geometry; LEDs past it stay black
+    assert engine.frame.n_leds > geometry.n_leds
+    assert not engine.frame.pixels[geometry.n_leds:].any()
+
+
+def test_rainbow_wave_follows_geometry(geometry):
+    frame = FrameBuffer()
+    effect = RainbowWave(geometry=geometry)
+    effect.start(frame)
+    effect.render(frame, 0.0)
+    # LEDs in the same hardware column share a hue
+    assert (frame.pixels[0] == frame.pixels[5]).all()
+    assert (frame.pixels[:geometry.n_leds].any(axis=1)).all()
+
+
+def test_ripple_starts_at_center(geometry):
+    frame = FrameBuffer()
+    effect = Ripple(geometry, center=0, color=(255, 0, 0))
+    effect.start(frame)
+    effect.render(frame, 0.0)
+    assert tuple(frame.pixels[0]) == (255, 0, 0)
+    assert not frame.pixels[60].any()
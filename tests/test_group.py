@@ -0,0 +1,44 @@
+from rkcu import RKCU, DeviceGroup, SimulatedBackend, get_base_config
+
+
+class MultiInterfaceBackend(SimulatedBackend):
+    """Simulated boards that each expose a second configuration interface, as on Linux and macOS."""
+
+    def __init__(self, count: int = 1, serials: bool = True):
+        super().__init__(count)
+        self.serials = serials
+
+    def enumerate(self, vid, pid) -> list:
+        interfaces = []
+        for info in super().enumerate(vid, pid):
+            if not self.serials:
+                info['serial_number'] = ''
+            second = dict(info, path=info['path'] + b':2', interface_number=2)
+            interfaces += [info, second]
+        return interfaces
+
+
+def test_one_interface_per_board():
+    backend = MultiInterfaceBackend(2)
+    interfaces = RKCU.find_kb_interfaces(0x258a, 0x00e0, backend)
+    assert [info['path'] for info in interfaces] == [b'sim:0', b'sim:1']
+
+
+def test_boards_without_serial_numbers():
+    backend = MultiInterfaceBackend(2, serials=False)
+    interfaces = RKCU.find_kb_interfaces(0x258a, 0x00e0, backend)
+    assert [info['path'] for info in interfaces] == [b'sim:0', b'sim:1']
+
+
+def test_group_writes_each_board_once():
+    backend = SimulatedBackend(3)
+    group = DeviceGroup.open(0x258a, 0x00e0, backend)
+    assert len(group) == 3
+
+    config = get_base_config()
+    config.PER_KEY_RGB.set_key_color(15, 0, 0, 255)
+    group.apply_config(config)
+    group.close_kb()
+    for device in backend.devices:
+        assert device.writes == 8
+        assert device.key_color(15) == (0, 0, 255)
@@ -0,0 +1,103 @@
+import pytest
+
+from rkcu import RKCU, SimulatedBackend, cache
+from rkcu.backends import usage_pages
+from rkcu.config import get_base_config
+
+
+class TwoInterfaceBackend(SimulatedBackend):
+    """One board exposing a keyboard interface and its configuration interface, whose paths can swap."""
+
+    cache_paths = True
+
+    def __init__(self):
+        super().__init__(count=2)
+        keyboard, config = self.devices
+        keyboard.serial = config.serial = 'SIM0'
+        keyboard.interface, config.interface = (0, 1), (1, 65280)
+        self.enumerations = 0
+
+    def enumerate(self, vid, pid) -> list:
+        self.enumerations += 1
+        interfaces = super().enumerate(vid, pid)
+        for info, device in zip(interfaces, self.devices):
+            info['interface_number'], info['usage_page'] = device.interface
+        return interfaces
+
+    def interface_info(self, path):
+        device = self._device_at(path)
+        number, usage_page = device.interface
+        return {'interface_number': number, 'usage_pages': [usage_page]}
+
+    def renumber(self):
+        self.devices.reverse()
+
+    @property
+    def config_device(self):
+        return next(device for device in self.devices if device.interface[0] == 1)
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setenv('RKCU_CACHE_DIR', str(tmp_path))
+    return TwoInterfaceBackend()
+
+
+def connect(backend):
+    return RKCU(0x258a, 0x00e0, backend=backend)
+
+
+def test_cached_path_skips_enumeration(backend):
+    connect(backend).close_kb()
+    assert cache.load_hid_path(0x258a, 0x00e0)['interface_number'] == 1
+
+    rk = connect(backend)
+    assert backend.enumerations == 1
+    rk.apply_config(get_base_config())
+    assert backend.config_device.writes == 1
+
+
+def test_renumbered_interface_is_not_reused(backend):
+    connect(backend).close_kb()
+    backend.renumber()
+
+    rk = connect(backend)
+    assert backend.enumerations == 2
+    rk.apply_config(get_base_config())
+    assert backend.config_device.writes == 1
+    assert cache.load_hid_path(0x258a, 0x00e0)['path'] == b'sim:0'
+
+
+def test_failed_write_rediscovers(backend, monkeypatch):
+    connect(backend).close_kb()
+    # a platform where the interface behind a path isn't known up front
+    monkeypatch.setattr(backend, 'interface_info', lambda path: None)
+    backend.renumber()
+
+    def refuse(data):
+        raise IOError("broken pipe")
+    keyboard = backend.devices[1]
+    monkeypatch.setattr(keyboard, 'send_feature_report', refuse)
+
+    rk = connect(backend)
+    assert rk.device is keyboard
+    rk.apply_config(get_base_config())
+    assert rk.device is backend.config_device
+    assert backend.config_device.writes == 1
+    assert cache.load_hid_path(0x258a, 0x00e0)['path'] == b'sim:0'
+
+
+def test_failed_write_without_cache_raises(backend, monkeypatch):
+    rk = connect(backend)
+
+    def refuse(data):
+        raise IOError("broken pipe")
+    monkeypatch.setattr(rk.device, 'send_feature_report', refuse)
+    with pytest.raises(IOError):
+        rk.apply_config(get_base_config())
+    assert backend.enumerations == 1
+
+
+def test_usage_pages():
+    # Usage Page (Generic Desktop), Usage Page (0xff00) as a 2-byte item, Usage (0x01)
+    assert usage_pages(bytes([0x05, 0x01, 0x06, 0x00, 0xff, 0x09, 0x01])) == [0x01, 0xff00]
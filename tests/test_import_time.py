@@ -0,0 +1,11 @@
+import pytest
+
+from rkcu.bench import IMPORT_BUDGETS_MS, measure_import
+
+
+@pytest.mark.parametrize('module', sorted(IMPORT_BUDGETS_MS))
+def test_import_budget(module):
+    result = measure_import(module)
+    assert result['loaded'] == [], f"import {module} loaded {', '.join(result['loaded'])}"
+    assert result['best_ms'] <= IMPORT_BUDGETS_MS[module], \
+        f"import {module} took {result['best_ms']:.1f} ms, budget is {IMPORT_BUDGETS_MS[module]:.0f} ms"
@@ -0,0 +1,52 @@
+import pytest
+
+from rkcu import PerKeyRGB, load_layout
+
+
+def frame_buffer(layout=None):
+    pytest.importorskip('numpy')
+    from rkcu.framebuffer import FrameBuffer
+    return FrameBuffer(layout=layout)
+
+
+@pytest.fixture
+def layout():
+    return load_layout('rk100v2')
+
+
+def test_names(layout):
+    assert layout.resolve('esc') == 0
+    assert layout.resolve(' Space ') == 35
+    assert layout.name_of(35) == 'space'
+    with pytest.raises(ValueError):
+        layout.resolve('no such key')
+
+
+def test_numeric_strings_are_indices(layout):
+    assert layout.resolve('1') == 1
+    assert layout.resolve(1) == 1
+    assert layout.resolve('digit1') == 7
+    assert layout.name_of(7) == 'digit1'
+
+
+@pytest.mark.parametrize('per_key_rgb', [PerKeyRGB, frame_buffer])
+def test_numeric_strings_light_the_same_key_everywhere(layout, per_key_rgb):
+    rgb = per_key_rgb(layout)
+    rgb.set_key_color('1', 255, 0, 0)
+    rgb.set_key_color('digit1', 0, 255, 0)
+    assert rgb.custom_colors == {1: (255, 0, 0), 7: (0, 255, 0)}
+
+    # numeric strings don't need a layout at all
+    rgb = per_key_rgb()
+    rgb.set_key_color_hex('1', 'ff0000')
+    assert dict(rgb.custom_colors) == {1: (255, 0, 0)}
+
+
+def test_timeline_keys(layout):
+    pytest.importorskip('numpy')
+    from rkcu.timeline import Timeline
+
+    timeline = Timeline.from_dict({'keyframes': [{'time': 0, 'keys': {'1': 'ff0000', 'digit1': '00ff00'}}]})
+    keyframe = timeline.keyframes[0]
+    assert tuple(keyframe.colors[1]) == (255, 0, 0)
+    assert tuple(keyframe.colors[7]) == (0, 255, 0)
@@ -0,0 +1,44 @@
+import pytest
+
+from rkcu import RKCU, SimulatedBackend, get_base_config
+
+
+class ShortWriteBackend(SimulatedBackend):
+    """Simulated board whose writes stop one byte short."""
+
+    def open_path(self, path):
+        device = super().open_path(path)
+        send = device.send_feature_report
+        device.send_feature_report = lambda data: send(data) - 1
+        return device
+
+
+def test_writes_are_counted(rk):
+    config = get_base_config()
+    config.PER_KEY_RGB.set_key_color(15, 255, 0, 0)
+    rk.apply_config(config)
+    rk.apply_config(config)
+
+    snapshot = rk.metrics.snapshot()
+    assert snapshot['mode']['reports'] == 1
+    assert snapshot['per_key']['reports'] == 7
+    assert snapshot['per_key']['bytes_written'] == 7 * 65
+    assert snapshot['per_key']['skipped'] == 7
+    assert snapshot['mode']['errors'] == 0
+
+
+def test_short_write_is_an_error():
+    rk = RKCU(0x258a, 0x00e0, use_cache=False, backend=ShortWriteBackend())
+    with pytest.raises(IOError) as excinfo:
+        rk.apply_config(get_base_config())
+    assert str(excinfo.value) == "Short write of config: expected 65 bytes, sent 64"
+
+    snapshot = rk.metrics.snapshot()['mode']
+    assert snapshot['errors'] == 1
+    assert snapshot['short_writes'] == 1
+    assert snapshot['reports'] == 0
+    assert snapshot['bytes_written'] == 64
+    # nothing was cached, so the report is retried
+    with pytest.raises(IOError):
+        rk.apply_config(get_base_config())
+    assert rk.metrics.errors['mode'] == 2
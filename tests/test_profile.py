@@ -0,0 +1,87 @@
+import pytest
+
+from rkcu import get_base_config
+from rkcu.color import ColorCorrection
+from rkcu.per_key_rgb import PacketPacker
+from rkcu.profile import FLAG_CUSTOM, HEADER_V1, MAGIC, Profile, load_reports
+
+
+@pytest.fixture
+def config():
+    config = get_base_config()
+    config.update({'animation': 'breathing', 'speed': 3, 'brightness': 4, 'red': 10, 'green': 20,
+                   'blue': 30, 'rainbow': False, 'sleep': 2})
+    config.PER_KEY_RGB.set_key_color(0, 255, 0, 0)
+    config.PER_KEY_RGB.set_key_color(35, 0, 0, 255)
+    config.PER_KEY_RGB.set_key_color(112, 1, 2, 3)
+    return config
+
+
+def test_round_trip(tmp_path, config):
+    path = str(tmp_path / 'test.rkp')
+    Profile.from_config(config, 113, 'RK100V2').save(path)
+
+    profile = Profile.load(path)
+    assert (profile.n_leds, profile.model, profile.correction) == (113, 'RK100V2', None)
+    loaded = profile.to_config()
+    assert loaded.report() == config.report()
+    assert loaded.PER_KEY_RGB.custom_colors == config.PER_KEY_RGB.custom_colors
+
+
+def test_load_reports_match_config(tmp_path, config):
+    path = str(tmp_path / 'test.rkp')
+    Profile.from_config(config, 113).save(path)
+    reports = [bytes(report) for report in load_reports(path)]
+    assert reports == [bytes(config.report())] + [bytes(b) for b in config.get_custom_light_buffers()]
+
+
+def test_round_trip_with_correction(tmp_path, config):
+    config.PER_KEY_RGB.color_correction = ColorCorrection(2.2, (1.0, 0.9, 0.8))
+    path = str(tmp_path / 'test.rkp')
+    Profile.from_config(config, 113).save(path)
+
+    profile = Profile.load(path)
+    assert profile.correction == ColorCorrection(2.2, (1.0, 0.9, 0.8))
+    assert Profile.from_json_dict(profile.to_json_dict()).correction == profile.correction
+    assert [bytes(report) for report in load_reports(path)][1:] == \
+        [bytes(b) for b in PacketPacker(profile.correction).pack_from(profile.rgb)]
+
+
+def test_reads_version_1(tmp_path):
+    n_leds = 16
+    rgb = bytearray(n_leds * 3)
+    rgb[3:6] = b'\x11\x22\x33'
+    mask = bytes([0b10, 0])
+    mode = bytes([1, 5, 5, 255, 255, 255, 0, 5])
+    path = tmp_path / 'v1.rkp'
+    path.write_bytes(HEADER_V1.pack(MAGIC, 1, FLAG_CUSTOM, n_leds, b'RK61', *mode) + rgb + mask)
+
+    profile = Profile.load(str(path))
+    assert (profile.n_leds, profile.model, profile.correction) == (n_leds, 'RK61', None)
+    assert bytes(profile.mode) == mode
+    assert profile.to_config().PER_KEY_RGB.custom_colors == {1: (0x11, 0x22, 0x33)}
+
+
+@pytest.mark.parametrize('data', [b'', b'RKCP', b'XXXX' + bytes(60)])
+def test_rejects_invalid_files(tmp_path, data):
+    path = tmp_path / 'bad.rkp'
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        Profile.load(str(path))
+
+
+def test_compile_rejects_layouts(tmp_path):
+    from rkcu.compiled import ProfileCache, compile_profiles
+
+    (tmp_path / 'red.json').write_text('{"15": "ff0000"}')
+    (tmp_path / 'keyboard_mapping.json').write_text('{"keyboard": "test", "mapped_keys": {"esc": 0}}')
+    cache = ProfileCache(str(tmp_path / 'compiled'))
+    results = compile_profiles([str(tmp_path)], cache, jobs=1)
+    assert isinstance(results[str(tmp_path / 'keyboard_mapping.json')], ValueError)
+
+    reports = cache.get(results[str(tmp_path / 'red.json')])
+    config = get_base_config()
+    config.update(dict.fromkeys(('animation', 'speed', 'brightness', 'red', 'green', 'blue', 'rainbow', 'sleep')))
+    config.PER_KEY_RGB.set_key_color(15, 255, 0, 0)
+    # the same reports as --set-keys-json red.json
+    assert reports == [bytes(config.report())] + [bytes(b) for b in config.get_custom_light_buffers()]
@@ -0,0 +1,55 @@
+import time
+
+from rkcu.reactive import ReactiveLighting
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_pressed_key_fades_out_and_scheduler_idles(rk, device):
+    with ReactiveLighting(rk, color=(255, 0, 0), hold=0.01, fade=0.03, fps=200) as lighting:
+        lighting.press(15)
+        assert lighting.active_keys == 1
+        assert wait_for(lambda: lighting.active_keys == 0)
+        assert lighting.writer.flush(timeout=2)
+        assert device.key_color(15) == (0, 0, 0)
+
+        # nothing is lit, so no more frames are rendered
+        frames = lighting.frames
+        time.sleep(0.05)
+        assert lighting.frames == frames
+
+
+def test_press_again_restarts_the_fade(rk):
+    with ReactiveLighting(rk, hold=10, fade=10, fps=1) as lighting:
+        lighting.press(15)
+        first = lighting._active[15][0]
+        lighting.press(15, (0, 255, 0))
+        second = lighting._active[15][0]
+        colors = lighting.config.PER_KEY_RGB.custom_colors
+
+        with lighting._cond:
+            # the first press's deadline has passed, but the key was pressed again since
+            lighting._render(first + 20)
+            assert lighting.active_keys == 1
+
+            lighting._render(second + 15)
+            assert colors[15] == (0, 127, 0)
+
+            lighting._render(second + 20)
+            assert not lighting._active
+            assert colors[15] == (0, 0, 0)
+
+
+def test_stop_turns_lit_keys_off(rk, device):
+    lighting = ReactiveLighting(rk, color=(0, 0, 255), hold=10, fade=10, fps=200)
+    lighting.press(20)
+    assert wait_for(lambda: lighting.frames > 0)
+    lighting.stop()
+    assert device.key_color(20) == (0, 0, 0)
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from rkcu import SimulatedBackend
+from rkcu.daemon import RKCUDaemon
+from rkcu.shm import HEADER, SEQ, SEQ_OFFSET, SharedFrameBuffer
+
+
+@pytest.fixture
+def shared(tmp_path):
+    owner = SharedFrameBuffer.create(str(tmp_path / 'rkcu.fb'), n_leds=4)
+    yield owner
+    owner.close()
+
+
+def test_update_bumps_the_sequence_by_two(shared):
+    with SharedFrameBuffer.open(shared.path) as producer:
+        producer.set_key_color(1, 255, 0, 0)
+        producer.set_colors({0: (0, 0, 255), '3': (0, 255, 0)})
+
+    frame = bytearray(shared.frame_size)
+    assert shared.read(frame) == 4
+    assert frame == bytes([0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 255, 0])
+
+
+def test_readers_skip_a_frame_being_written(shared):
+    frame = bytearray(shared.frame_size)
+    with SharedFrameBuffer.open(shared.path) as producer:
+        with producer.update() as rgb:
+            rgb[0:3] = b'\xff\xff\xff'
+            assert shared.seq % 2 == 1
+            assert shared.read(frame) is None
+        assert shared.read(frame) == 2
+    assert frame[0:3] == b'\xff\xff\xff'
+
+
+def test_odd_counter_from_a_dead_writer(shared):
+    SEQ.pack_into(shared._map, SEQ_OFFSET, 7)
+    shared.fill((1, 2, 3))
+    assert shared.seq == 8
+
+
+def test_reader_never_sees_a_torn_frame(shared):
+    stop = threading.Event()
+
+    def write():
+        with SharedFrameBuffer.open(shared.path) as producer:
+            value = 0
+            while not stop.is_set():
+                value = (value + 1) % 256
+                producer.fill((value, value, value))
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        frame = bytearray(shared.frame_size)
+        seen = 0
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            if shared.read(frame) is not None:
+                assert len(set(frame)) == 1
+                seen += 1
+        assert seen
+    finally:
+        stop.set()
+        writer.join()
+
+
+@pytest.mark.parametrize('data', [b'', b'RKFB', HEADER.pack(b'XXXX', 1, 0, 4, 0) + bytes(12),
+                                  HEADER.pack(b'RKFB', 1, 0, 4, 0) + bytes(6)])
+def test_rejects_invalid_files(tmp_path, data):
+    path = tmp_path / 'bad.fb'
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        SharedFrameBuffer.open(str(path))
+
+
+def test_key_checks(shared):
+    with pytest.raises(ValueError):
+        shared.set_key_color(4, 1, 1, 1)
+    with pytest.raises(ValueError):
+        shared.set_key_color('esc', 1, 1, 1)
+    with pytest.raises(ValueError):
+        shared.write(bytes(15))
+
+
+def test_daemon_shows_shared_frames(tmp_path):
+    daemon = RKCUDaemon(0x258a, 0x00e0, str(tmp_path / 'rkcud.sock'), SimulatedBackend(),
+                        shm_path=str(tmp_path / 'rkcu.fb'), shm_poll=0.002)
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    try:
+        for _ in range(500):
+            if daemon.shared is not None:
+                break
+            time.sleep(0.002)
+        with SharedFrameBuffer.open(daemon.shm_path) as producer:
+            producer.set_key_color(15, 0, 128, 255)
+        device = daemon.rk.device
+        for _ in range(500):
+            if device.key_color(15) == (0, 128, 255):
+                break
+            time.sleep(0.002)
+        assert device.key_color(15) == (0, 128, 255)
+    finally:
+        daemon.shutdown()
+        thread.join()
+        daemon.rk.close_kb()
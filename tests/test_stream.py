@@ -0,0 +1,69 @@
+import io
+
+import pytest
+
+from rkcu.stream import stream_frames
+from rkcu.writer import FrameWriter
+
+
+def test_complete_frames_are_shown_and_the_partial_one_is_not(rk, device):
+    frames = bytes([255, 0, 0] * 3) + bytes([0, 0, 255] * 3) + bytes([9, 9, 9, 9])
+    stats = stream_frames(rk, io.BytesIO(frames), n_leds=3)
+    assert stats.frames == 2
+    assert stats.trailing == 4
+    assert stats.sent + stats.coalesced == 2
+    assert device.key_colors(4) == [(0, 0, 255)] * 3 + [(0, 0, 0)]
+    assert device.config().ANIMATION_TYPE.name == 'CUSTOM'
+
+
+def test_frames_arrive_in_pieces(rk, device):
+    class Trickle(io.RawIOBase):
+        """Hands out at most two bytes per read, like a slow pipe."""
+
+        def __init__(self, data):
+            self.data = data
+
+        def readable(self):
+            return True
+
+        def readinto(self, view):
+            count = min(2, len(view), len(self.data))
+            view[:count], self.data = self.data[:count], self.data[count:]
+            return count
+
+    stats = stream_frames(rk, Trickle(bytes([1, 2, 3, 4, 5, 6])), n_leds=2)
+    assert (stats.frames, stats.trailing) == (1, 0)
+    assert device.key_colors(2) == [(1, 2, 3), (4, 5, 6)]
+
+
+def test_led_count_is_checked(rk):
+    with pytest.raises(ValueError):
+        stream_frames(rk, io.BytesIO(), n_leds=0)
+    with pytest.raises(ValueError):
+        stream_frames(rk, io.BytesIO(), n_leds=144)
+
+
+def test_write_errors_are_raised(rk, device):
+    writer = FrameWriter(rk)
+    device.close()
+    with pytest.raises(IOError):
+        stream_frames(rk, io.BytesIO(bytes(6)), n_leds=2, writer=writer)
+    writer.close()
+
+
+def test_cli_stream_with_leds(monkeypatch, capsys, tmp_path):
+    import sys
+
+    from rkcu import __main__ as cli
+
+    source = tmp_path / 'frames.raw'
+    source.write_bytes(bytes([0, 255, 0] * 2) + bytes([7]))
+    monkeypatch.setattr(sys, 'argv', ['rkcu', '--simulate', 'stream', str(source), '--leds', '2'])
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main()
+    assert exit_info.value.code == 0
+    out = capsys.readouterr().out
+    assert 'Ignored an incomplete frame of 1 bytes' in out
+    assert '1 frames read' in out
+    assert 'key 0: #00ff00' in out and 'key 1: #00ff00' in out
+    assert 'key 2:' not in out
@@ -0,0 +1,65 @@
+import types
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from rkcu.timeline import Timeline, TimelinePlayer
+
+
+@pytest.fixture
+def timeline():
+    return Timeline.from_dict({'fps': 200, 'keyframes': [
+        {'time': 0, 'keys': {'0': '000000'}},
+        {'time': 0.1, 'keys': {'0': 'ff0000'}},
+        {'time': 0.2, 'keys': {'0': 'ff0000'}, 'interpolation': 'step'},
+    ]})
+
+
+def test_render_is_lazy(timeline):
+    frames = timeline.render()
+    assert isinstance(frames, types.GeneratorType)
+    frames = list(frames)
+    assert len(frames) == timeline.frame_count == 41
+    # the hold between the last two keyframes repeats one encoded frame
+    assert frames[-1] is frames[-2]
+    assert frames[0] is not frames[1]
+
+
+def test_player_keeps_at_most_a_ring_of_frames(rk, device, timeline, monkeypatch):
+    source = timeline.render
+    ahead = []
+
+    def counting_render():
+        for rendered, frame in enumerate(source(), 1):
+            # frames rendered but not yet played or dropped
+            ahead.append(rendered - player.stats.frames - player.stats.dropped)
+            yield frame
+    monkeypatch.setattr(timeline, 'render', counting_render)
+
+    player = TimelinePlayer.from_timeline(rk, timeline)
+    player.ring_size = 4
+    player.play()
+    assert max(ahead) == 4
+    assert player.stats.frames + player.stats.dropped == timeline.frame_count
+    assert device.key_color(0) == (255, 0, 0)
+
+
+def test_looping_restarts_the_timeline(rk, device, timeline):
+    player = TimelinePlayer(rk, timeline.render, timeline.fps, loop=True, ring_size=8)
+    player.start()
+    try:
+        deadline = timeline.frame_count * 2
+        while player.stats.frames + player.stats.dropped < deadline:
+            player._stop.wait(0.01)
+    finally:
+        player.stop()
+    assert player.stats.frames + player.stats.dropped >= deadline
+
+
+def test_list_of_frames(rk, device, timeline):
+    player = TimelinePlayer(rk, list(timeline.render()), timeline.fps)
+    player.play()
+    assert device.key_color(0) == (255, 0, 0)
+    with pytest.raises(ValueError):
+        TimelinePlayer(rk, [], 30)
@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from rkcu import get_base_config
+from rkcu.framebuffer import FrameBuffer
+from rkcu.transitions import EASINGS, Transition, crossfade
+
+
+def make_config(colors):
+    config = get_base_config()
+    for key_index, color in colors.items():
+        config.PER_KEY_RGB.set_key_color(key_index, *color)
+    return config
+
+
+@pytest.fixture
+def source():
+    return make_config({0: (255, 0, 0), 1: (0, 255, 0), 2: (10, 20, 30)})
+
+
+@pytest.fixture
+def target():
+    return make_config({0: (0, 0, 255), 2: (10, 20, 30), 50: (255, 255, 255)})
+
+
+@pytest.mark.parametrize('easing', sorted(EASINGS))
+def test_easings_end_at_zero_and_one(easing):
+    assert EASINGS[easing](0.0) == 0.0
+    assert EASINGS[easing](1.0) == 1.0
+
+
+def test_endpoints_match_source_and_target(source, target):
+    transition = Transition(source.PER_KEY_RGB, target.PER_KEY_RGB, duration=1.0)
+    assert sorted(transition.changed) == [0, 1, 50]
+
+    frame = FrameBuffer()
+    transition.start(frame)
+    transition.render(frame, 0.0)
+    assert dict(frame.custom_colors) == {**source.PER_KEY_RGB.custom_colors, 50: (0, 0, 0)}
+
+    transition.render(frame, 0.5)
+    assert frame.custom_colors[0] == (128, 0, 128)
+    assert frame.custom_colors[2] == (10, 20, 30)
+
+    transition.render(frame, 1.0)
+    assert dict(frame.custom_colors) == target.PER_KEY_RGB.custom_colors
+
+
+def test_crossfade_ends_on_target(rk, device, source, target):
+    rk.apply_config(source)
+    stats = crossfade(rk, target, duration=0.05, easing='linear', current=source, fps=100)
+    assert stats.frames > 0
+    assert device.config().PER_KEY_RGB.custom_colors == target.PER_KEY_RGB.custom_colors
+    # the caller's config is left alone
+    assert target.PER_KEY_RGB.custom_colors == {0: (0, 0, 255), 2: (10, 20, 30), 50: (255, 255, 255)}
+
+
+def test_crossfade_to_same_colors_writes_nothing(rk, device, source):
+    rk.apply_config(source)
+    writes = device.writes
+    stats = crossfade(rk, source, duration=0.05, current=source)
+    assert stats.frames == 0
+    assert device.writes == writes
@@ -0,0 +1,41 @@
+from rkcu import get_base_config
+
+
+def test_unchanged_reports_are_not_written_again(rk, device):
+    config = get_base_config()
+    config.PER_KEY_RGB.set_key_color(15, 255, 0, 0)
+
+    rk.apply_config(config)
+    first = device.writes
+    assert first == 8
+
+    rk.apply_config(config)
+    assert device.writes == first
+    assert rk.metrics.skipped['per_key'] == 7
+    assert rk.metrics.skipped['mode'] == 1
+
+
+def test_only_changed_packets_are_written(rk, device):
+    config = get_base_config()
+    config.PER_KEY_RGB.set_key_color(15, 255, 0, 0)
+    rk.apply_config(config)
+    writes = device.writes
+
+    # key 16 lives in the first packet, like key 15
+    config.PER_KEY_RGB.set_key_color(16, 0, 255, 0)
+    rk.apply_config(config)
+    assert device.writes == writes + 1
+    assert device.key_color(16) == (0, 255, 0)
+
+
+def test_force_and_invalidate_resend(rk, device):
+    config = get_base_config()
+    rk.apply_config(config)
+    writes = device.writes
+
+    rk.apply_config(config, force=True)
+    assert device.writes == writes + 1
+
+    rk.invalidate_cache()
+    rk.apply_config(config)
+    assert device.writes == writes + 2
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from rkcu import get_base_config
+from rkcu.writer import FrameWriter
+
+
+def red_frame(red):
+    config = get_base_config()
+    config.ANIMATION_RED = red
+    return config
+
+
+@pytest.fixture
+def gate(device, monkeypatch):
+    """Holds every write on the device until released."""
+    entered, release = threading.Event(), threading.Event()
+    send = device.send_feature_report
+
+    def blocked(data):
+        entered.set()
+        release.wait(5)
+        return send(data)
+    monkeypatch.setattr(device, 'send_feature_report', blocked)
+    return entered, release
+
+
+def test_waiting_frames_are_replaced(rk, device, gate):
+    entered, release = gate
+    writer = FrameWriter(rk)
+    writer.submit(red_frame(1))
+    assert entered.wait(5)
+
+    # the writer is busy with the first frame, so only the newest of these is kept
+    for red in (2, 3, 4):
+        writer.submit(red_frame(red))
+    assert writer.coalesced == 2
+    assert not writer.flush(timeout=0.05)
+
+    release.set()
+    assert writer.flush(timeout=5)
+    assert writer.sent == 2
+    assert device.config().ANIMATION_RED == 4
+    writer.close()
+
+
+def test_replaced_forced_frame_stays_forced(rk, device, gate):
+    entered, release = gate
+    release.set()
+    rk.apply_config(red_frame(9))
+    writes = device.writes
+    entered.clear()
+    release.clear()
+
+    writer = FrameWriter(rk)
+    writer.submit(red_frame(1))
+    assert entered.wait(5)
+    writer.submit(red_frame(9), force=True)
+    writer.submit(red_frame(9))
+    release.set()
+    writer.close()
+    # frame 1, then frame 9 resent although it matches what the keyboard had before
+    assert device.writes == writes + 2
+
+
+def test_close_writes_the_pending_frame(rk, device):
+    writer = FrameWriter(rk)
+    writer.submit(red_frame(7))
+    writer.close()
+    assert device.config().ANIMATION_RED == 7
+    with pytest.raises(RuntimeError):
+        writer.submit(red_frame(8))
+
+
+def test_errors_are_reported(rk, device):
+    errors = []
+    writer = FrameWriter(rk, on_error=errors.append)
+    # a closed simulated device refuses writes
+    device.close()
+    writer.submit(red_frame(1))
+    assert writer.flush(timeout=5)
+    assert writer.sent == 0
+    assert isinstance(writer.last_error, IOError)
+    assert errors == [writer.last_error]
+    writer.close()